@@ -0,0 +1,114 @@
+"""
+Nom : Analysis.py
+Auteurs : Dylan, Samuel
+Date 11.11.2024
+"""
+###############################################################################
+# Analyse en arrière-plan pour l'interface (conseils de coup, évaluation).
+#
+# - Un processus séparé fait tourner engine.Searcher sur un autre cœur
+# - L'interface envoie la position après chaque coup (submit)
+# - Le processus publie (profondeur, coup, score) après chaque itération
+# - L'interface lit la file sans bloquer, une fois par image (poll)
+# - Une nouvelle position interrompt la recherche en cours
+###############################################################################
+
+import multiprocessing  # Processus d'analyse et files de messages
+import queue  # Exception queue.Empty
+
+import backend  # Couleurs
+import engine  # Recherche alpha-bêta
+
+ANALYSIS_MAX_DEPTH = 12  # Profondeur maximale d'une analyse
+STOP = "stop"  # Message qui termine le processus d'analyse
+
+
+def _analysis_loop(requests, updates, max_depth, variant=backend.DEFAULT_VARIANT):
+    """
+    Boucle du processus d'analyse : attend une position, l'analyse en profondeur croissante
+    et publie chaque itération. S'arrête sur le message STOP.
+    """
+    backend.set_variant(variant)  # Même plateau que l'interface (processus lancé sans fork)
+    searcher = engine.Searcher()
+    pending = [None]  # Dernière demande reçue pendant une recherche
+
+    def newer_request():
+        # Appelée régulièrement par la recherche : une nouvelle position l'interrompt
+        try:
+            while True:
+                pending[0] = requests.get_nowait()  # On ne garde que la plus récente
+        except queue.Empty:
+            pass
+        return pending[0] is not None
+
+    searcher.should_stop = newer_request
+    while True:
+        job = pending[0] if pending[0] is not None else requests.get()
+        pending[0] = None
+        if job == STOP:
+            break  # Demande d'arrêt
+        generation, black_pieces, gray_pieces, color = job
+        for depth, move, score in searcher.iterate(black_pieces, gray_pieces, color, max_depth):
+            if move is None:
+                break
+            updates.put((generation, depth, (move.piece[0], move.piece[1]),
+                         (move.dest[0], move.dest[1]), score, searcher.nodes))
+            if pending[0] is not None:
+                break
+        # Recherche terminée : requests.get() attend la position suivante sans consommer de CPU
+
+
+class AnalysisWorker:
+    """
+    Côté interface : envoie les positions au processus d'analyse et récupère
+    les résultats sans jamais bloquer la boucle d'affichage.
+    """
+
+    def __init__(self, max_depth=ANALYSIS_MAX_DEPTH):
+        self.requests = multiprocessing.Queue()
+        self.updates = multiprocessing.Queue()
+        self.process = multiprocessing.Process(target=_analysis_loop,
+                                               args=(self.requests, self.updates, max_depth, backend.variant),
+                                               daemon=True)
+        self.generation = 0  # Numéro de la position analysée (les anciens résultats sont ignorés)
+        self.last_hash = None  # Clé de la dernière position envoyée
+        self.latest = None  # Dernier résultat pour la position courante
+
+    def start(self):
+        self.process.start()
+
+    def stop(self):
+        """
+        Arrête le processus d'analyse.
+        """
+        if self.process.is_alive():
+            self.requests.put(STOP)
+            self.process.join(timeout=1.0)
+            if self.process.is_alive():
+                self.process.terminate()
+
+    def submit(self, black_pieces, gray_pieces, color):
+        """
+        Envoie la position si elle a changé depuis le dernier envoi (copie des listes).
+        """
+        h = backend.position_hash(black_pieces, gray_pieces, color == backend.PIECE_BLACK)
+        if h == self.last_hash:
+            return
+        self.last_hash = h
+        self.generation += 1
+        self.latest = None
+        self.requests.put((self.generation, [p[:] for p in black_pieces], [p[:] for p in gray_pieces], color))
+
+    def poll(self):
+        """
+        Lit tous les résultats disponibles sans attendre ; retourne le plus récent pour
+        la position courante sous la forme (profondeur, départ, arrivée, score, nœuds), ou None.
+        """
+        try:
+            while True:
+                update = self.updates.get_nowait()
+                if update[0] == self.generation:
+                    self.latest = update[1:]
+        except queue.Empty:
+            pass
+        return self.latest
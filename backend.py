@@ -4,26 +4,35 @@ Auteurs : Dylan, Samuel
 Date 11.11.2024
 """
 ###############################################################################
-# Logique du jeu de Dames 10x10 (règles suisses).
+# Logique du jeu de Dames (règles suisses, plateau 10x10 par défaut).
 #
+# - Variant : taille du plateau, rangées de départ, dames volantes ou courtes, avec tables
+#   précalculées (rayons, sauts, pas des pions) ; set_variant choisit la variante jouée
 # - 50 coups sans capture (no_capture_turns)
-# - Historique de positions (positions_history) pour nulle par répétition
+# - Historique de positions (positions_history) pour nulle par répétition,
+#   limité aux positions depuis le dernier coup irréversible
 # - Captures, promotions, find_all_possible_moves, etc.
 # - Statistiques (moves_count, total_captures) : game_stats
+# - Annulation / rétablissement des coups (MoveStack)
 # - Sauvegarde/Chargement (JSON)
 ###############################################################################
 
 import json  # Import de json pour la sauvegarde et le chargement
+import random  # Générateur déterministe pour les clés de hachage Zobrist
 
 # Couleurs logiques des pions
 PIECE_BLACK = (10, 10, 10)  # On définit la couleur noire : plus visible !
 PIECE_GRAY = (200, 200, 200)  # Définition de la couleur grise
 PIECE_QUEEN = (250, 250, 0)  # Pour la dame, on utilise un jaune vif
 
+# Mode Blitz : temps imposé par joueur (partagé par l'interface et le serveur)
+BLITZ_TIME_LIMIT = 120  # Limite de temps en secondes pour chaque joueur
+
 # Variables globales du jeu
 no_capture_turns = 0  # Compteur des coups sans capture (pour règle des 50 coups)
-positions_history = {}  # Historique des positions sous forme de dictionnaire
+positions_history = []  # Pile des clés Zobrist depuis le dernier coup irréversible
 current_player_color = PIECE_BLACK  # Couleur du joueur actuel, on commence par les noirs
+last_delta = None  # Différence produite par le dernier apply_move / apply_delta
 
 # Statistiques globales du jeu
 game_stats = {
@@ -32,14 +41,342 @@ game_stats = {
 }
 
 
+class Move:
+    """
+    Représentation compacte d'un coup (à la place d'un dictionnaire à 7 clés).
+    Les attributs sont stockés dans des __slots__ et le chemin des captures est un tuple.
+    L'accès par clé (move['dest'], move.get('type'), move.copy()) reste disponible
+    pour le code existant.
+    """
+    __slots__ = ('piece', 'type', 'dest', 'count', 'path', 'isQueen', 'queenCapt', 'src')
+
+    def __init__(self, piece, type, dest, count=0, path=(), isQueen=False, queenCapt=0, src=None):
+        self.piece = piece  # Pièce déplacée (référence vers la liste [row, col, isQueen])
+        self.type = type  # 'capture' ou 'move'
+        self.dest = dest  # Destination [row, col]
+        self.count = count  # Nombre de captures de la séquence
+        self.path = path  # Tuple des cases capturées
+        self.isQueen = isQueen  # La pièce était-elle une dame au moment de la génération
+        self.queenCapt = queenCapt  # Nombre de dames adverses capturées
+        self.src = src  # Case de départ (row, col) au moment de la génération
+
+    def __getitem__(self, key):
+        """
+        Accès de compatibilité : move['dest'] équivaut à move.dest.
+        """
+        if key not in Move.__slots__:  # Clé inconnue : même erreur qu'un dictionnaire
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        """
+        Modification de compatibilité : move['dest'] = ... équivaut à move.dest = ...
+        """
+        if key not in Move.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in Move.__slots__  # Toutes les clés existent toujours
+
+    def get(self, key, default=None):
+        """
+        Équivalent de dict.get pour le code existant.
+        """
+        if key not in Move.__slots__:
+            return default
+        return getattr(self, key)
+
+    def keys(self):
+        return Move.__slots__  # Liste des clés historiques
+
+    def copy(self):
+        """
+        Copie superficielle (comme dict.copy) : la pièce reste partagée.
+        """
+        return Move(self.piece, self.type, self.dest, self.count,
+                    self.path, self.isQueen, self.queenCapt, self.src)
+
+    def to_dict(self):
+        """
+        Retourne l'ancien format dictionnaire (utile pour l'affichage ou le JSON).
+        """
+        return {k: getattr(self, k) for k in Move.__slots__}
+
+    def __repr__(self):
+        return (f"Move({self.type}, piece={self.piece}, dest={self.dest}, "
+                f"count={self.count}, path={self.path})")
+
+
+NO_PATH = ()  # Chemin vide partagé par tous les déplacements simples
+DIRECTIONS = ((-1, -1), (-1, 1), (1, -1), (1, 1))  # Les quatre diagonales
+MAX_SIZE = 12  # Plus grand plateau géré (taille des tables de hachage et d'historique)
+MAX_SQUARES = MAX_SIZE * MAX_SIZE
+
+
+# Hachage Zobrist : une valeur aléatoire 64 bits par (type de pièce, case)
+# Types : 0 = pion noir, 1 = dame noire, 2 = pion gris, 3 = dame grise
+_zobrist_rng = random.Random(11112024)  # Graine fixe : mêmes clés à chaque lancement
+ZOBRIST_PIECES = [[_zobrist_rng.getrandbits(64) for _ in range(100)] for _ in range(4)]
+ZOBRIST_BLACK_TURN = _zobrist_rng.getrandbits(64)  # Valeur ajoutée quand c'est aux noirs de jouer
+for _keys in ZOBRIST_PIECES:  # Cases au-delà de 100 (plateau 12x12) tirées ensuite : clés du 10x10 inchangées
+    _keys.extend(_zobrist_rng.getrandbits(64) for _ in range(MAX_SQUARES - 100))
+
+
+class Variant:
+    """
+    Description d'une variante et tables précalculées de sa géométrie.
+    Les cases sont indexées r * size + c (cases foncées : r + c pair).
+    """
+
+    def __init__(self, name, size, rows, flying_kings=True):
+        if size % 2 or not 2 * rows < size <= MAX_SIZE:
+            raise ValueError(f"Variante {name} : plateau {size}x{size} avec {rows} rangées non géré")
+        self.name = name
+        self.size = size
+        self.rows = rows  # Rangées de pions de chaque camp au départ
+        self.flying_kings = flying_kings  # Dame volante (toute la diagonale) ou courte (une case)
+        n = self.squares = size * size
+        self.coords = [(sq // size, sq % size) for sq in range(n)]  # Case -> (r, c)
+        self.dark = [sq for sq in range(n) if sum(self.coords[sq]) % 2 == 0]  # Cases jouables
+        self.promotion_row = {PIECE_BLACK: size - 1, PIECE_GRAY: 0}
+        # Rayons : pour chaque case, les cases de chaque diagonale jusqu'au bord (ordre de DIRECTIONS)
+        self.rays = [tuple(self.ray(sq, dr, dc) for dr, dc in DIRECTIONS) for sq in range(n)]
+        # Sauts : (case prise, case d'arrivée) pour les diagonales assez longues
+        self.jumps = [tuple((ray[0], ray[1]) for ray in self.rays[sq] if len(ray) >= 2) for sq in range(n)]
+        # Rayons utiles à une prise de dame volante (au moins deux cases)
+        self.capture_rays = [tuple(ray for ray in self.rays[sq] if len(ray) >= 2) for sq in range(n)]
+        # Pas des pions : vers l'avant, colonne -1 puis +1
+        self.steps = {}
+        for color, dr in ((PIECE_BLACK, 1), (PIECE_GRAY, -1)):
+            self.steps[color] = [tuple(self.rays[sq][DIRECTIONS.index((dr, dc))][0]
+                                       for dc in (-1, 1) if self.rays[sq][DIRECTIONS.index((dr, dc))])
+                                 for sq in range(n)]
+        self.king_steps = [tuple(ray[0] for ray in self.rays[sq] if ray) for sq in range(n)]  # Dames courtes
+        # Symétrie du plateau : rotation de 180° + échange des couleurs (la case sq devient n - 1 - sq).
+        # Une position et son image ont la même valeur pour le camp au trait ; les tables ne gardent que
+        # la forme canonique. Table image : zobrist_mirror[type][case] = clé du type de couleur opposée
+        # sur la case symétrique (type ^ 2 échange noir et gris), pour calculer les deux clés en un passage.
+        self.zobrist_mirror = [[ZOBRIST_PIECES[k ^ 2][n - 1 - sq] for sq in range(n)] for k in range(4)]
+
+    def __repr__(self):
+        return f"Variant({self.name})"
+
+    def ray(self, sq, dr, dc):
+        r, c = self.coords[sq]
+        out = []
+        r, c = r + dr, c + dc
+        while self.in_bounds(r, c):
+            out.append(r * self.size + c)
+            r, c = r + dr, c + dc
+        return tuple(out)
+
+    def in_bounds(self, row, col):
+        return 0 <= row < self.size and 0 <= col < self.size
+
+    def initial_pieces(self):
+        """
+        Position de départ : 'rows' rangées de pions noirs en haut, grises en bas (cases foncées).
+        """
+        black = [[r, c, False] for r, c in (self.coords[sq] for sq in self.dark) if r < self.rows]
+        gray = [[r, c, False] for r, c in (self.coords[sq] for sq in self.dark) if r >= self.size - self.rows]
+        return black, gray
+
+    def _captures(self, sq, isQ, occupied, enemy_at, path, qcount, best, out):
+        """
+        Séquences de prises depuis la case 'sq' : la pièce prise est retirée tout de suite,
+        l'arrivée est la case juste derrière, la case de départ de la pièce reste occupée.
+        - occupied : liste case -> occupée (les pièces prises en sont retirées)
+        - enemy_at : dictionnaire case -> pièce ennemie encore présente
+        - path : pile des cases (r, c) prises jusqu'ici (modifiée puis restaurée)
+        - best : [nb_prises, nb_dames] meilleure séquence connue, ou None (pas d'élagage)
+        Ajoute (case d'arrivée, nb_prises, chemin, nb_dames) à 'out' pour chaque séquence terminée.
+        """
+        count = len(path)
+        if best is not None:
+            reach = count + len(enemy_at)  # Au mieux : toutes les pièces ennemies restantes
+            if reach < best[0]:
+                return  # Impossible d'égaler la meilleure séquence connue
+            if reach == best[0] and qcount + sum(1 for e in enemy_at.values() if e[2]) < best[1]:
+                return  # Même nombre de prises au mieux, mais moins de dames
+        found = False
+        if isQ and self.flying_kings:
+            for ray in self.capture_rays[sq]:
+                last = len(ray) - 1
+                for i, x in enumerate(ray):
+                    if occupied[x]:  # Dame volante : première pièce rencontrée sur la diagonale
+                        if i < last:
+                            victim = enemy_at.get(x)
+                            land = ray[i + 1]
+                            if victim is not None and not occupied[land]:
+                                found = True
+                                self._take(x, land, victim, isQ, occupied, enemy_at, path, qcount, best, out)
+                        break
+        else:
+            for x, land in self.jumps[sq]:  # Pion ou dame courte : pièce voisine
+                victim = enemy_at.get(x)
+                if victim is not None and not occupied[land]:
+                    found = True
+                    self._take(x, land, victim, isQ, occupied, enemy_at, path, qcount, best, out)
+        if not found and path:
+            if best is not None:
+                if (count, qcount) < (best[0], best[1]):
+                    return
+                best[0], best[1] = count, qcount  # Nouvelle meilleure séquence
+            out.append((sq, count, tuple(path), qcount))
+
+    def _take(self, x, land, victim, isQ, occupied, enemy_at, path, qcount, best, out):
+        # Retire la pièce prise, continue la séquence depuis 'land', puis la remet
+        del enemy_at[x]
+        occupied[x] = False
+        path.append(self.coords[x])
+        self._captures(land, isQ, occupied, enemy_at, path, qcount + (1 if victim[2] else 0), best, out)
+        path.pop()
+        occupied[x] = True
+        enemy_at[x] = victim
+
+    def board(self, black_pieces, gray_pieces, color):
+        """
+        Tables de la recherche des prises : (cases occupées, ennemis de 'color' par case).
+        """
+        size = self.size
+        occupied = [False] * self.squares
+        for p in black_pieces:
+            occupied[p[0] * size + p[1]] = True
+        for p in gray_pieces:
+            occupied[p[0] * size + p[1]] = True
+        enemies = gray_pieces if color == PIECE_BLACK else black_pieces
+        return occupied, {e[0] * size + e[1]: e for e in enemies}
+
+    def generate_moves(self, color, black_pieces, gray_pieces):
+        """
+        Coups légaux de 'color' (objets Move), captures prioritaires
+        avec la règle de la majorité (nombre de prises, puis nombre de dames prises).
+        """
+        size = self.size
+        occupied, enemy_at = self.board(black_pieces, gray_pieces, color)
+        ally = black_pieces if color == PIECE_BLACK else gray_pieces
+        coords = self.coords
+        best = [1, 0]  # Meilleure séquence (nb_prises, nb_dames) connue, partagée entre les pièces
+        captures = []
+        found = []
+        for pi in ally:
+            self._captures(pi[0] * size + pi[1], pi[2], occupied, enemy_at, [], 0, best, found)
+            if found:
+                src = (pi[0], pi[1])  # Case de départ, partagée par tous les coups de la pièce
+                for dest, cnt, path, qhit in found:
+                    captures.append(Move(pi, 'capture', list(coords[dest]), cnt, path, pi[2], qhit, src))
+                found.clear()
+        if captures:
+            # Les séquences trouvées avant l'amélioration de 'best' sont écartées ici
+            return [m for m in captures if m.count == best[0] and m.queenCapt == best[1]]
+
+        normals = []
+        steps = self.steps[color]
+        for pc in ally:
+            r, c, isQ = pc
+            sq = r * size + c
+            src = (r, c)
+            if isQ and self.flying_kings:
+                for ray in self.rays[sq]:
+                    for t in ray:
+                        if occupied[t]:
+                            break
+                        normals.append(Move(pc, 'move', list(coords[t]), 0, NO_PATH, True, 0, src))
+            else:
+                for t in (self.king_steps[sq] if isQ else steps[sq]):
+                    if not occupied[t]:
+                        normals.append(Move(pc, 'move', list(coords[t]), 0, NO_PATH, isQ, 0, src))
+        return normals
+
+
+DEFAULT_VARIANT = Variant("10x10", 10, 4)  # Règles suisses : plateau 10x10, 4 rangées, dames volantes
+variant = DEFAULT_VARIANT  # Variante jouée par toutes les fonctions de ce module
+
+
+def set_variant(new_variant):
+    """
+    Change la variante jouée (à appeler avant de placer les pièces d'une partie).
+    """
+    global variant
+    variant = new_variant
+
+
+def position_hash(black_pieces, gray_pieces, is_black_turn):
+    """
+    Calcule la clé Zobrist (entier 64 bits) de la position.
+    Équivalent compact de create_position_key, utilisé par les tables de transposition.
+    """
+    size = variant.size
+    h = ZOBRIST_BLACK_TURN if is_black_turn else 0  # Le trait fait partie de la position
+    for r, c, isQ in black_pieces:
+        h ^= ZOBRIST_PIECES[1 if isQ else 0][r * size + c]  # Pion ou dame noire
+    for r, c, isQ in gray_pieces:
+        h ^= ZOBRIST_PIECES[3 if isQ else 2][r * size + c]  # Pion ou dame grise
+    return h
+
+
+def mirror_pieces(pieces):
+    """
+    Image des pièces par la rotation de 180° (la couleur est changée par l'appelant).
+    """
+    last = variant.size - 1
+    return [[last - r, last - c, isQ] for r, c, isQ in pieces]
+
+
+def mirror_position(black_pieces, gray_pieces, is_black_turn):
+    """
+    Position symétrique : les gris deviennent les noirs (et inversement), trait inversé.
+    """
+    return mirror_pieces(gray_pieces), mirror_pieces(black_pieces), not is_black_turn
+
+
+def canonical_position_key(black_pieces, gray_pieces, is_black_turn):
+    """
+    Forme canonique de create_position_key : la plus petite des clés de la position
+    et de son image. Retourne (clé, symétrique) ; symétrique vaut True si la clé
+    est celle de l'image (les coups stockés doivent alors être retournés, voir mirror_square).
+    """
+    key = create_position_key(black_pieces, gray_pieces, is_black_turn)
+    mkey = create_position_key(*mirror_position(black_pieces, gray_pieces, is_black_turn))
+    return (mkey, True) if mkey < key else (key, False)
+
+
+def mirror_square(sq):
+    """
+    Case symétrique d'une case codée r * taille + c.
+    """
+    return variant.squares - 1 - sq
+
+
+def canonical_hash(black_pieces, gray_pieces, is_black_turn):
+    """
+    Équivalent Zobrist de canonical_position_key : clé et clé de l'image calculées
+    dans le même passage, retourne (min des deux, symétrique).
+    """
+    size, mirror = variant.size, variant.zobrist_mirror
+    h = ZOBRIST_BLACK_TURN if is_black_turn else 0
+    m = 0 if is_black_turn else ZOBRIST_BLACK_TURN  # Le trait change de camp dans l'image
+    for r, c, isQ in black_pieces:
+        k, sq = (1 if isQ else 0), r * size + c
+        h ^= ZOBRIST_PIECES[k][sq]
+        m ^= mirror[k][sq]
+    for r, c, isQ in gray_pieces:
+        k, sq = (3 if isQ else 2), r * size + c
+        h ^= ZOBRIST_PIECES[k][sq]
+        m ^= mirror[k][sq]
+    return (m, True) if m < h else (h, False)
+
+
 def reset_game_state():
     """
     Réinitialise l'état global avant le début d'une nouvelle partie.
     (Remise à zéro du compteur de 50 coups, historique, stats, etc.)
     """
-    global no_capture_turns, positions_history, current_player_color, game_stats
+    global no_capture_turns, positions_history, current_player_color, game_stats, last_delta
     no_capture_turns = 0  # On remet le compteur à zéro
     positions_history.clear()  # On vide l'historique des positions
+    last_delta = None  # Aucun coup joué
     current_player_color = PIECE_BLACK  # On remet le joueur actif aux noirs
     game_stats = {  # Réinitialisation des statistiques
         "moves_count": 0,
@@ -47,6 +384,14 @@ def reset_game_state():
     }
 
 
+def initial_pieces():
+    """
+    Placement initial de la variante : pions noirs sur les premières lignes, gris sur les dernières
+    (4 lignes en 10x10, cases alternées). Retourne (black_pieces, gray_pieces).
+    """
+    return variant.initial_pieces()
+
+
 def check_winner(black_pieces, gray_pieces):
     """
     Vérifie si un camp a perdu toutes ses pièces.
@@ -70,29 +415,55 @@ def create_position_key(black_pieces, gray_pieces, is_black_turn):
     return (sb, sg, is_black_turn)  # Retourne le tuple clé
 
 
-def update_position_history(black_pieces, gray_pieces, is_black_turn):
+def is_irreversible(delta, black_pieces, gray_pieces):
+    """
+    Vrai si le coup décrit par la différence ne peut pas être défait :
+    une capture, ou un déplacement de pion (les pions n'avancent que vers l'avant).
+    Aucune position antérieure ne peut alors se répéter.
     """
-    Met à jour l'historique des positions en incrémentant le compteur.
+    if delta["captured"] or delta["promoted"]:
+        return True
+    movers = black_pieces if delta["color"] == "black" else gray_pieces
+    r, c = divmod(delta["to"], variant.size)
+    for p in movers:
+        if p[0] == r and p[1] == c:
+            return not p[2]  # Un pion qui a avancé : coup irréversible
+    return True  # Pièce introuvable : par prudence, on repart d'un historique vide
+
+
+def update_position_history(black_pieces, gray_pieces, is_black_turn, irreversible=None):
+    """
+    Empile la clé de la position courante dans l'historique.
+    Après un coup irréversible (par défaut, déduit de last_delta), la pile est remplacée
+    par une pile vide : elle ne couvre que la fenêtre des coups réversibles.
+    Retourne l'ancienne pile dans ce cas (pour l'annulation, voir MoveStack), sinon None.
     """
     global positions_history
-    key = create_position_key(black_pieces, gray_pieces, is_black_turn)  # Création de la clé
-    positions_history[key] = positions_history.get(key, 0) + 1  # Incrémente ou initialise à 1
+    if irreversible is None:
+        irreversible = last_delta is not None and is_irreversible(last_delta, black_pieces, gray_pieces)
+    previous = None
+    if irreversible:
+        previous = positions_history  # Les positions antérieures ne peuvent plus revenir
+        positions_history = []
+    positions_history.append(position_hash(black_pieces, gray_pieces, is_black_turn))
+    return previous
 
 
 def is_repeated_position(black_pieces, gray_pieces, is_black_turn):
     """
     Vérifie si la position courante a déjà été atteinte 3 fois,
     ce qui indique une situation de nulle.
+    Seule la fenêtre depuis le dernier coup irréversible est parcourue.
     """
-    key = create_position_key(black_pieces, gray_pieces, is_black_turn)  # Création de la clé
-    return positions_history.get(key, 0) >= 3  # Retourne True si comptage >= 3
+    key = position_hash(black_pieces, gray_pieces, is_black_turn)  # Clé Zobrist de la position
+    return positions_history.count(key) >= 3  # Retourne True si comptage >= 3
 
 
 def is_in_bounds(row, col):
     """
-    Vérifie si la case (row, col) se trouve dans le plateau de 10x10.
+    Vérifie si la case (row, col) se trouve dans le plateau de la variante.
     """
-    return 0 <= row < 10 and 0 <= col < 10  # Test des bornes
+    return variant.in_bounds(row, col)  # Test des bornes
 
 
 def is_occupied(row, col, black_pieces, gray_pieces):
@@ -111,10 +482,8 @@ def promote_to_queen_if_needed(piece, color):
     On réinitialise aussi le compteur de coups sans capture.
     """
     global no_capture_turns
-    if color == PIECE_BLACK and piece[0] == 9:  # Si pion noir atteint la dernière ligne
+    if piece[0] == variant.promotion_row[color]:  # Dernière ligne pour les noirs, première pour les gris
         piece[2] = True  # Il devient dame
-    if color == PIECE_GRAY and piece[0] == 0:  # Si pion gris atteint la première ligne
-        piece[2] = True  # Il est promu
     if piece[2]:  # Si la pièce est devenue dame
         no_capture_turns = 0  # On réinitialise le compteur de non-captures
 
@@ -129,14 +498,20 @@ def move_piece(piece, dest):
 def apply_move(move, black_pieces, gray_pieces, color, black_caps, gray_caps):
     """
     Applique un coup (capture ou simple déplacement), met à jour le compteur de non-captures et les statistiques.
-    - move : dictionnaire décrivant le coup
+    - move : coup à jouer (Move, ou ancien dictionnaire)
     - black_caps / gray_caps : captures effectuées par chaque camp.
+    La différence correspondante (voir make_delta) est rangée dans last_delta.
     Retourne les compteurs mis à jour.
     """
-    global no_capture_turns, game_stats
+    global no_capture_turns, game_stats, last_delta
+    size = variant.size
     piece = move['piece']  # On récupère la pièce à déplacer
     is_capture = (move.get('type') == 'capture')  # Vérifie si c'est une capture
     captured_count = 0  # Initialisation du compteur de captures
+    captured = []  # Cases capturées (avec le type de pièce) pour la différence
+    nct_before = no_capture_turns  # Valeur du compteur avant le coup
+    src = move.get('src') or (piece[0], piece[1])  # Case de départ
+    was_queen = move.get('isQueen', piece[2])  # Type de la pièce avant le coup
 
     game_stats["moves_count"] += 1  # On incrémente le nombre de coups joués
 
@@ -144,6 +519,7 @@ def apply_move(move, black_pieces, gray_pieces, color, black_caps, gray_caps):
         enemies = gray_pieces if color == PIECE_BLACK else black_pieces  # Détermine l'adversaire
         before = len(enemies)  # Nombre d'ennemis avant capture
         for (rr, cc) in move['path']:  # Pour chaque position de capture
+            captured.extend((rr * size + cc, x[2]) for x in enemies if x[0] == rr and x[1] == cc)
             enemies[:] = [x for x in enemies if not (x[0] == rr and x[1] == cc)]
             # On supprime l'ennemi capturé
         captured_count = before - len(enemies)  # Calcul du nombre de pièces capturées
@@ -158,91 +534,262 @@ def apply_move(move, black_pieces, gray_pieces, color, black_caps, gray_caps):
 
     move_piece(piece, move['dest'])  # Déplace la pièce
     promote_to_queen_if_needed(piece, color)  # Teste la promotion
+    last_delta = make_delta(color, src[0] * size + src[1], piece[0] * size + piece[1], captured,
+                            piece[2] and not was_queen, nct_before, no_capture_turns,
+                            position_hash(black_pieces, gray_pieces, color != PIECE_BLACK))
     return black_caps, gray_caps  # Retourne les compteurs mis à jour
 
 
+# --- Différences (deltas) : description compacte d'un coup appliqué ---
+def make_delta(color, src, dest, captured, promoted, nct_before, nct_after, hash_after):
+    """
+    Construit la différence décrivant un coup appliqué :
+    - color : camp qui a joué ('black' ou 'gray')
+    - from / to : cases de départ et d'arrivée (indice row * taille + col)
+    - captured : liste de (case, était_dame) des pièces retirées
+    - promoted : True si la pièce est devenue dame
+    - no_capture_turns : (avant, après) du compteur des 50 coups
+    - hash : clé Zobrist de la position obtenue, l'adversaire ayant le trait
+    """
+    return {
+        "color": "black" if color == PIECE_BLACK else "gray",
+        "from": src,
+        "to": dest,
+        "captured": captured,
+        "promoted": bool(promoted),
+        "no_capture_turns": (nct_before, nct_after),
+        "hash": hash_after
+    }
+
+
+def move_to_delta(move, black_pieces, gray_pieces, color, nct_before=0):
+    """
+    Calcule la différence d'un coup sans l'appliquer (les pièces doivent être à leur place).
+    La clé Zobrist est obtenue par mise à jour incrémentale.
+    """
+    piece = move.piece
+    enemies = gray_pieces if color == PIECE_BLACK else black_pieces
+    kind = 0 if color == PIECE_BLACK else 2  # Pion de la couleur ; +1 pour une dame
+    size = variant.size
+    src = piece[0] * size + piece[1]
+    dest = move.dest[0] * size + move.dest[1]
+    promoted = not piece[2] and move.dest[0] == variant.promotion_row[color]
+    is_queen_after = piece[2] or promoted
+    h = position_hash(black_pieces, gray_pieces, color != PIECE_BLACK)
+    h ^= ZOBRIST_PIECES[kind + (1 if piece[2] else 0)][src]  # Retire la pièce de sa case
+    h ^= ZOBRIST_PIECES[kind + (1 if is_queen_after else 0)][dest]  # La pose à l'arrivée
+    captured = []
+    for (rr, cc) in move.path:
+        for e in enemies:
+            if e[0] == rr and e[1] == cc:
+                captured.append((rr * size + cc, e[2]))
+                h ^= ZOBRIST_PIECES[(2 - kind) + (1 if e[2] else 0)][rr * size + cc]  # Retire la pièce capturée
+                break
+    # Même règle que apply_move / promote_to_queen_if_needed
+    nct_after = 0 if (move.type == 'capture' or is_queen_after) else nct_before + 1
+    return make_delta(color, src, dest, captured, promoted, nct_before, nct_after, h)
+
+
+def apply_delta_to_pieces(delta, black_pieces, gray_pieces):
+    """
+    Rejoue une différence sur les listes de pièces uniquement (aucune globale modifiée).
+    Retourne la pièce déplacée.
+    """
+    movers = black_pieces if delta["color"] == "black" else gray_pieces
+    enemies = gray_pieces if movers is black_pieces else black_pieces
+    size = variant.size
+    if delta["captured"]:
+        gone = {sq for sq, _ in delta["captured"]}
+        enemies[:] = [e for e in enemies if e[0] * size + e[1] not in gone]  # Retire les pièces capturées
+    fr, fc = divmod(delta["from"], size)
+    for p in movers:
+        if p[0] == fr and p[1] == fc:
+            p[0], p[1] = divmod(delta["to"], size)  # Déplace la pièce
+            if delta["promoted"]:
+                p[2] = True  # Promotion
+            return p
+    raise ValueError(f"Aucune pièce sur la case de départ {delta['from']}")
+
+
+def apply_delta(delta, black_pieces, gray_pieces, black_caps=0, gray_caps=0, check_hash=False):
+    """
+    Rejoue une différence produite par apply_move (spectateur, relecture, synchronisation réseau).
+    Met à jour les pièces, le compteur des 50 coups et les statistiques comme apply_move.
+    Si check_hash est vrai, vérifie la clé Zobrist et lève ValueError en cas de désynchronisation.
+    Retourne les compteurs de captures mis à jour.
+    """
+    global no_capture_turns, last_delta
+    apply_delta_to_pieces(delta, black_pieces, gray_pieces)
+    n = len(delta["captured"])
+    if delta["color"] == "black":
+        black_caps += n
+    else:
+        gray_caps += n
+    no_capture_turns = delta["no_capture_turns"][1]
+    game_stats["moves_count"] += 1
+    game_stats["total_captures"] += n
+    last_delta = delta
+    if check_hash and position_hash(black_pieces, gray_pieces, delta["color"] != "black") != delta["hash"]:
+        raise ValueError("Position désynchronisée (clé Zobrist différente)")
+    return black_caps, gray_caps
+
+
+def unapply_delta_to_pieces(delta, black_pieces, gray_pieces):
+    """
+    Inverse de apply_delta_to_pieces : ramène la pièce sur sa case de départ,
+    annule la promotion et remet en place les pièces capturées (avec leur type).
+    Retourne la pièce déplacée.
+    """
+    movers = black_pieces if delta["color"] == "black" else gray_pieces
+    enemies = gray_pieces if movers is black_pieces else black_pieces
+    size = variant.size
+    tr, tc = divmod(delta["to"], size)
+    for p in movers:
+        if p[0] == tr and p[1] == tc:
+            p[0], p[1] = divmod(delta["from"], size)  # Retour à la case de départ
+            if delta["promoted"]:
+                p[2] = False  # La dame redevient pion
+            break
+    else:
+        raise ValueError(f"Aucune pièce sur la case d'arrivée {delta['to']}")
+    for sq, isQ in delta["captured"]:
+        r, c = divmod(sq, size)
+        enemies.append([r, c, isQ])  # Pièce capturée remise sur le plateau
+    return p
+
+
+class MoveStack:
+    """
+    Pile des coups joués pour l'annulation / le rétablissement sans relire de fichier.
+    Chaque entrée contient la différence du coup (ou d'une étape de capture en chaîne),
+    les pendules au moment du coup et, en fin de tour, la fenêtre de positions_history
+    remplacée par un coup irréversible. Annuler ou rétablir ne touche que ces valeurs.
+    """
+
+    def __init__(self):
+        self.done = []  # Entrées jouées (la dernière en haut)
+        self.undone = []  # Entrées annulées, rétablies dans l'ordre inverse
+
+    def push(self, delta, clocks):
+        """
+        Enregistre un coup ou une étape de capture qui vient d'être appliqué (apply_move).
+        Un nouveau coup efface les coups annulés.
+        """
+        self.done.append({"delta": delta, "clocks": clocks, "turn_end": False, "history": None})
+        self.undone.clear()
+
+    def end_turn(self, black_pieces, gray_pieces, is_black_turn):
+        """
+        Fin du tour (après la dernière étape) : met à jour positions_history
+        et garde de quoi l'annuler sur l'entrée du dessus.
+        """
+        previous = update_position_history(black_pieces, gray_pieces, is_black_turn)
+        if self.done:
+            self.done[-1]["turn_end"] = True
+            self.done[-1]["history"] = previous
+
+    def undo(self, black_pieces, gray_pieces, black_caps, gray_caps):
+        """
+        Annule le dernier coup ou la dernière étape de capture.
+        Retourne (entrée annulée ou None, black_caps, gray_caps).
+        """
+        global no_capture_turns, positions_history, last_delta
+        if not self.done:
+            return None, black_caps, gray_caps
+        entry = self.done.pop()
+        delta = entry["delta"]
+        if entry["turn_end"]:
+            positions_history.pop()  # Position atteinte en fin de tour
+            if entry["history"] is not None:
+                positions_history = entry["history"]  # Fenêtre d'avant le coup irréversible
+        unapply_delta_to_pieces(delta, black_pieces, gray_pieces)
+        n = len(delta["captured"])
+        if delta["color"] == "black":
+            black_caps -= n
+        else:
+            gray_caps -= n
+        no_capture_turns = delta["no_capture_turns"][0]
+        game_stats["moves_count"] -= 1
+        game_stats["total_captures"] -= n
+        last_delta = self.done[-1]["delta"] if self.done else None
+        self.undone.append(entry)
+        return entry, black_caps, gray_caps
+
+    def redo(self, black_pieces, gray_pieces, black_caps, gray_caps):
+        """
+        Rejoue le dernier coup annulé (apply_delta), avec sa fin de tour éventuelle.
+        Retourne (entrée rétablie ou None, black_caps, gray_caps).
+        """
+        if not self.undone:
+            return None, black_caps, gray_caps
+        entry = self.undone.pop()
+        black_caps, gray_caps = apply_delta(entry["delta"], black_pieces, gray_pieces, black_caps, gray_caps)
+        if entry["turn_end"]:
+            entry["history"] = update_position_history(black_pieces, gray_pieces,
+                                                       entry["delta"]["color"] != "black")
+        self.done.append(entry)
+        return entry, black_caps, gray_caps
+
+
+def queen_mark():
+    """
+    Décalage des dames capturées dans encode_delta : 100 (ancien format) tant que
+    les cases tiennent sous 100, sinon le nombre de cases du plateau.
+    """
+    return max(100, variant.squares)
+
+
+def encode_delta(delta):
+    """
+    Forme compacte (liste JSON de quelques dizaines d'octets) d'une différence.
+    Les dames capturées sont notées case + queen_mark() (100 jusqu'au 10x10).
+    """
+    mark = queen_mark()
+    return [0 if delta["color"] == "black" else 1, delta["from"], delta["to"],
+            [sq + mark if q else sq for sq, q in delta["captured"]],
+            1 if delta["promoted"] else 0,
+            delta["no_capture_turns"][0], delta["no_capture_turns"][1], delta["hash"]]
+
+
+def decode_delta(data):
+    """
+    Inverse de encode_delta.
+    """
+    c, src, dest, caps, promo, nb, na, h = data
+    mark = queen_mark()
+    return make_delta(PIECE_BLACK if c == 0 else PIECE_GRAY, src, dest,
+                      [(x - mark, True) if x >= mark else (x, False) for x in caps],
+                      promo, nb, na, h)
+
+
+def iter_captures(piece, black_pieces, gray_pieces, color, captured_list=(), best=None):
+    """
+    Séquences de captures d'une pièce, sur les tables de la variante.
+    Retourne une liste de tuples (destination, nb_captures, path, nb_dames_capt), path étant un tuple
+    qui commence par les cases de 'captured_list' (pièces déjà prises, qui ne comptent plus).
+    Si 'best' est une liste [nb_captures, nb_dames] partagée, les branches qui ne peuvent
+    pas atteindre cette séquence sont élaguées et 'best' est mis à jour au fil des résultats.
+    """
+    occupied, enemy_at = variant.board(black_pieces, gray_pieces, color)
+    size, coords = variant.size, variant.coords
+    for r, c in captured_list:
+        enemy_at.pop(r * size + c, None)
+        occupied[r * size + c] = False
+    found = []
+    variant._captures(piece[0] * size + piece[1], piece[2], occupied, enemy_at,
+                      [tuple(sq) for sq in captured_list], 0, best, found)
+    return [(list(coords[dest]), cnt, path_, qC) for dest, cnt, path_, qC in found]
+
+
 def explore_captures(piece, black_pieces, gray_pieces, color, captured_list):
     """
     Recherche récursive pour les captures multiples (pions ou dames).
     Retourne une liste de tuples (destination, nb_captures, path, nb_dames_capt).
+    Version complète (sans élagage) construite à partir de iter_captures.
     """
-    found_capture = False  # Indique si une capture a été trouvée
-    results = []  # Liste des résultats
-    r, c, isQ = piece  # Décompose la pièce (row, col, is_dame)
-    enemies = gray_pieces if color == PIECE_BLACK else black_pieces  # Définit les ennemis
-    directions = [(-1, -1), (-1, 1), (1, -1), (1, 1)]  # Directions possibles pour capturer
-
-    if isQ:
-        # Pour une dame
-        for dr, dc in directions:  # Pour chaque direction
-            step = 1  # Commence par un pas
-            while True:
-                nr = r + dr * step  # Calcul de la nouvelle ligne
-                nc = c + dc * step  # Calcul de la nouvelle colonne
-                if not is_in_bounds(nr, nc):  # Si en dehors du plateau
-                    break  # On arrête cette direction
-                if is_occupied(nr, nc, black_pieces, gray_pieces):  # Si une pièce est rencontrée
-                    # Si c'est un pion ennemi et pas déjà capturé
-                    if any(e[0] == nr and e[1] == nc for e in enemies) and (nr, nc) not in captured_list:
-                        nr2, nc2 = nr + dr, nc + dc  # Case derrière l'ennemi
-                        if is_in_bounds(nr2, nc2) and not is_occupied(nr2, nc2, black_pieces, gray_pieces):
-                            oldpos = (piece[0], piece[1], piece[2])  # Enregistre la position d'origine
-                            captured_p = [xx for xx in enemies if xx[0] == nr and xx[1] == nc][0]
-                            # Récupère la pièce ennemie capturable
-                            piece[0], piece[1] = nr2, nc2  # Déplace temporairement la dame
-                            if color == PIECE_BLACK:
-                                newB = black_pieces
-                                newG = [g for g in gray_pieces if g != captured_p]  # Supprime l'ennemi capturé
-                            else:
-                                newB = [b for b in black_pieces if b != captured_p]
-                                newG = gray_pieces
-                            subcaps = explore_captures(piece, newB, newG, color, captured_list + [(nr, nc)])
-                            # Exploration récursive pour capture multiple
-                            qhit = 1 if captured_p[2] else 0  # Compte si c'était une dame adverse
-                            if not subcaps:  # Si pas d'autres captures possibles
-                                results.append(([nr2, nc2], 1, [(nr, nc)], qhit))
-                            else:
-                                for (dest, cn, path_, qC) in subcaps:
-                                    results.append((dest, cn + 1, [(nr, nc)] + path_, qC + qhit))
-                            piece[0], piece[1], piece[2] = oldpos  # Restaure la position initiale
-                            found_capture = True  # Capture trouvée
-                    break  # Arrête le déplacement dans cette direction
-                step += 1  # Passe à la case suivante dans la direction
-    else:
-        # Pour un pion simple (non dame)
-        for dr, dc in directions:  # Pour chaque direction diagonale
-            mr = r + dr  # Case de mouvement intermédiaire
-            mc = c + dc
-            er = r + 2 * dr  # Destination après saut
-            ec = c + 2 * dc
-            if is_in_bounds(mr, mc) and is_in_bounds(er, ec):  # Vérifie que tout est dans les limites
-                if any(e[0] == mr and e[1] == mc for e in enemies) and not is_occupied(er, ec, black_pieces,
-                                                                                       gray_pieces):
-                    # Si l'ennemi est bien à la bonne position et destination libre
-                    if (mr, mc) not in captured_list:  # Et que cette capture n'a pas été déjà faite
-                        old_ = (piece[0], piece[1], piece[2])  # Enregistre la position d'origine
-                        capp_ = [xx for xx in enemies if xx[0] == mr and xx[1] == mc][0]
-                        # Récupère l'ennemi à capturer
-                        piece[0], piece[1] = er, ec  # Déplace temporairement la pièce
-                        if color == PIECE_BLACK:
-                            newB = black_pieces
-                            newG = [gg for gg in gray_pieces if gg != capp_]
-                        else:
-                            newB = [bb for bb in black_pieces if bb != capp_]
-                            newG = gray_pieces
-                        subc = explore_captures(piece, newB, newG, color, captured_list + [(mr, mc)])
-                        # Recherche récursive d'autres captures
-                        qh = 1 if capp_[2] else 0  # Vérifie si la pièce capturée est une dame
-                        if not subc:  # Si aucune capture supplémentaire
-                            results.append(([er, ec], 1, [(mr, mc)], qh))
-                        else:
-                            for (dest, cn2, path2, qC2) in subc:
-                                results.append((dest, cn2 + 1, [(mr, mc)] + path2, qC2 + qh))
-                        piece[0], piece[1], piece[2] = old_  # Restaure la position d'origine
-                        found_capture = True  # Capture trouvée
-    if not found_capture:  # Si aucune capture trouvée
-        return []  # Retourne une liste vide
-    return results  # Retourne la liste des captures possibles
+    offset = len(captured_list)  # Les captures déjà faites ne comptent pas dans le résultat
+    return [(dest, cnt - offset, list(path_[offset:]), qC)
+            for (dest, cnt, path_, qC) in iter_captures(piece, black_pieces, gray_pieces, color, captured_list)]
 
 
 def can_capture(piece, black_pieces, gray_pieces, color):
@@ -255,69 +802,10 @@ def can_capture(piece, black_pieces, gray_pieces, color):
 
 def find_all_possible_moves(color, black_pieces, gray_pieces):
     """
-    Rassemble tous les coups possibles pour le joueur donné.
+    Rassemble tous les coups possibles pour le joueur donné (règles de la variante jouée).
     Les captures sont prioritaires sur les déplacements simples.
     """
-    ally = black_pieces if color == PIECE_BLACK else gray_pieces
-    captures = []  # Liste pour stocker les coups de capture
-    normals = []  # Liste pour stocker les déplacements simples
-
-    for pi in ally:  # Pour chaque pièce alliée
-        subc = can_capture(pi, black_pieces, gray_pieces, color)
-        for (dest, cnt, path_, qhit) in subc:
-            captures.append({
-                'piece': pi,
-                'type': 'capture',  # Type de coup : capture
-                'dest': dest,  # Destination finale de la capture
-                'count': cnt,  # Nombre total de captures dans cette séquence
-                'path': path_,  # Chemin des captures
-                'isQueen': pi[2],  # Indique si la pièce est déjà une dame
-                'queenCapt': qhit  # Nombre de captures de dames effectuées
-            })
-    if captures:  # Si au moins une capture est possible
-        maxC = max(x['count'] for x in captures)  # On cherche le maximum de captures possibles
-        best = [x for x in captures if x['count'] == maxC]  # On retient uniquement les meilleurs
-        maxQ = max(x['queenCapt'] for x in best)  # Priorise la capture impliquant une dame adverse
-        return [b for b in best if b['queenCapt'] == maxQ]  # Retourne la liste filtrée
-
-    # Sinon, on cherche les déplacements simples
-    for pc in ally:
-        r, c, isQ = pc
-        if isQ:  # Pour une dame
-            dirs = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
-            for dr, dc in dirs:
-                st = 1  # Pas initial
-                while True:
-                    nr = r + dr * st  # Calcul de la nouvelle position
-                    nc = c + dc * st
-                    if not is_in_bounds(nr, nc) or is_occupied(nr, nc, black_pieces, gray_pieces):
-                        break  # On arrête dès que l'on sort du plateau ou que la case est occupée
-                    normals.append({
-                        'piece': pc,
-                        'type': 'move',  # Type de coup : déplacement simple
-                        'dest': [nr, nc],  # Destination
-                        'count': 0,  # Pas de capture ici
-                        'path': [],  # Chemin vide pour un déplacement
-                        'isQueen': True,  # Confirme que la pièce est une dame
-                        'queenCapt': 0  # Aucune capture de dame
-                    })
-                    st += 1  # Essai à la case suivante dans la même direction
-        else:
-            dFwd = 1 if color == PIECE_BLACK else -1  # Détermine le sens de déplacement selon la couleur
-            for dC in [-1, 1]:  # Pour les diagonales gauche et droite
-                nr = r + dFwd  # Calcul de la destination
-                nc = c + dC
-                if is_in_bounds(nr, nc) and not is_occupied(nr, nc, black_pieces, gray_pieces):
-                    normals.append({
-                        'piece': pc,
-                        'type': 'move',
-                        'dest': [nr, nc],
-                        'count': 0,
-                        'path': [],
-                        'isQueen': False,  # Pion normal, pas une dame
-                        'queenCapt': 0
-                    })
-    return normals  # Retourne les déplacements simples possibles
+    return variant.generate_moves(color, black_pieces, gray_pieces)
 
 
 def break_down_captures(moves, piece):
@@ -328,17 +816,14 @@ def break_down_captures(moves, piece):
     arr = []  # Liste pour stocker le résultat
     r0, c0, _ = piece  # Position de départ de la pièce
     for mv in moves:
-        if mv['count'] > 1:  # Si plusieurs captures sont prévues
-            fc = mv['path'][0]  # On prend la première capture du chemin
-            dr = fc[0] - r0
-            dc = fc[1] - c0
-            nr = r0 + 2 * dr  # Nouvelle destination après capture simple
-            nc = c0 + 2 * dc
-            cp = mv.copy()  # Copie du dictionnaire pour modification
-            cp['dest'] = [nr, nc]  # Mise à jour de la destination
-            cp['path'] = [mv['path'][0]]  # Garde uniquement la première capture
-            cp['count'] = 1  # Fixe le compte à 1 capture
-            arr.append(cp)  # Ajoute à la liste
+        if mv.count > 1:  # Si plusieurs captures sont prévues
+            fc = mv.path[0]  # On prend la première capture du chemin
+            dr = 1 if fc[0] > r0 else -1  # Sens de la diagonale (la dame peut prendre à distance)
+            dc = 1 if fc[1] > c0 else -1
+            nr = fc[0] + dr  # Nouvelle destination après capture simple : juste derrière la pièce prise
+            nc = fc[1] + dc
+            # Coup unitaire : nouvelle destination, seulement la première capture
+            arr.append(Move(mv.piece, mv.type, [nr, nc], 1, (fc,), mv.isQueen, mv.queenCapt, (r0, c0)))
         else:
             arr.append(mv)  # Sinon, ajoute directement le coup
     return arr  # Retourne la liste des coups décomposés
@@ -353,13 +838,14 @@ def save_game_state(filename, black_pieces, gray_pieces, black_turn,
     Cela inclut l'état des pions, compteurs, statistiques et temps.
     """
     data = {
+        "variant": variant.name,  # Variante jouée (les cases n'ont de sens que sur son plateau)
         "black_pieces": black_pieces,  # Positions et états des pièces noires
         "gray_pieces": gray_pieces,  # Positions et états des pièces grises
         "is_black_turn": black_turn,  # Indique le tour des noirs
         "black_caps": black_caps,  # Captures effectuées par les noirs
         "gray_caps": gray_caps,  # Captures réalisées par les gris
         "no_capture_turns": no_capture_turns,  # Compteur de non-captures
-        "positions_history": list(positions_history.items()),  # Historique des positions converti en liste
+        "positions_history": positions_history,  # Clés Zobrist depuis le dernier coup irréversible
         "current_player_color": list(current_player_color),  # Couleur actuelle convertie en liste
         "game_stats": game_stats,  # Statistiques du jeu
         "total_time": total_time,  # Temps total écoulé
@@ -370,22 +856,41 @@ def save_game_state(filename, black_pieces, gray_pieces, black_turn,
         json.dump(data, f, indent=2)  # Sauvegarde en format JSON avec indentations
 
 
+def load_positions_history(saved):
+    """
+    Relit l'historique sauvegardé : liste de clés Zobrist, ou ancien format
+    (liste de couples [clé de create_position_key, compteur]).
+    """
+    history = []
+    for entry in saved:
+        if isinstance(entry, int):
+            history.append(entry)
+        else:
+            (sb, sg, turn), count = entry  # Ancien format : position complète et nombre d'occurrences
+            history.extend([position_hash(sb, sg, turn)] * count)
+    return history
+
+
 def load_game_state(filename):
     """
     Charge l'état du jeu depuis un fichier JSON.
     Retourne un tuple avec toutes les informations ou None en cas d'erreur.
     """
-    global no_capture_turns, positions_history, current_player_color, game_stats
+    global no_capture_turns, positions_history, current_player_color, game_stats, last_delta
     try:
         with open(filename, "r") as f:  # Ouverture du fichier en lecture
             data = json.load(f)  # Chargement des données JSON
+        saved_variant = data.get("variant", DEFAULT_VARIANT.name)  # Anciennes sauvegardes : 10x10
+        if saved_variant != variant.name:
+            raise ValueError(f"partie sauvegardée en {saved_variant}, variante jouée : {variant.name}")
         black_pieces = data["black_pieces"]  # Récupération des pièces noires
         gray_pieces = data["gray_pieces"]  # Récupération des pièces grises
         is_black_turn = data["is_black_turn"]  # Tour des noirs ou non
         black_caps = data["black_caps"]  # Captures pour les noirs
         gray_caps = data["gray_caps"]  # Captures pour les gris
         no_capture_turns = data["no_capture_turns"]  # Rétablissement du compteur de non-captures
-        positions_history = dict(data["positions_history"])  # Récupération de l'historique
+        positions_history = load_positions_history(data["positions_history"])  # Récupération de l'historique
+        last_delta = None  # Le dernier coup n'est pas sauvegardé
         current_player_color = tuple(data["current_player_color"])  # Rétablissement de la couleur du joueur
         game_stats = data["game_stats"]  # Récupération des statistiques
         total_time = data["total_time"]  # Temps total
@@ -0,0 +1,148 @@
+"""
+Nom : Bench_captures.py
+Auteurs : Dylan, Samuel
+Date 11.11.2024
+"""
+###############################################################################
+# Benchmark de la génération des captures sur des positions à plusieurs dames.
+#
+# - Positions à captures multiples : dames sur les grandes diagonales, pions gris espacés
+#   d'une case (chaque prise laisse une case libre derrière), séquences très ramifiées
+# - Référence : copie de l'ancienne exploration (listes reconstruites à chaque prise,
+#   toutes les séquences construites puis filtrées), comparée à find_all_possible_moves
+#   (recherche élaguée sur les tables de backend.Variant)
+# - Usage : python bench_captures.py [nb_positions] [répétitions]
+###############################################################################
+
+import random  # Génération reproductible des positions
+import sys  # Lecture des arguments de la ligne de commande
+import time  # Mesure des temps
+
+import backend  # Règles du jeu
+
+DARK_SQUARES = [(r, c) for r in range(10) for c in range(10) if (r + c) % 2 == 0]  # Cases jouables
+DIRECTIONS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+
+def branching_position(rng, queens=4, men=4, targets=14):
+    """
+    Construit une position où les captures se ramifient fortement : les pions gris sont sur
+    les cases (paire, paire) intérieures, les cases (impaire, impaire) restent libres
+    pour s'y poser ; les noirs (dames sur les grandes diagonales, pions) sont sur (impaire, impaire).
+    """
+    inner = [(r, c) for r in range(2, 9, 2) for c in range(2, 9, 2)]  # 16 cases (paire, paire)
+    gray = rng.sample(inner, targets)
+    long_diagonals = [(r, r) for r in range(1, 10, 2)] + [(r, 10 - r) for r in range(1, 10, 2)]
+    queens_at = rng.sample(sorted(set(long_diagonals)), queens)
+    odd = [(r, c) for r in range(1, 10, 2) for c in range(1, 10, 2) if (r, c) not in queens_at]
+    men_at = rng.sample(odd, men)
+    return ([[r, c, True] for r, c in queens_at] + [[r, c, False] for r, c in men_at],
+            [[r, c, rng.random() < 0.2] for r, c in gray])  # Quelques dames grises aussi
+
+
+def baseline_explore_captures(piece, black_pieces, gray_pieces, color, captured_list):
+    """
+    Ancienne méthode (backend.explore_captures avant le générateur élagué) : à chaque prise,
+    nouvelles listes de pièces, chemins concaténés, toutes les séquences construites.
+    """
+    def occupied(row, col, black, gray):
+        for pc in black + gray:
+            if pc[0] == row and pc[1] == col:
+                return True
+        return False
+
+    results = []
+    r, c, isQ = piece
+    enemies = gray_pieces if color == backend.PIECE_BLACK else black_pieces
+    for dr, dc in DIRECTIONS:
+        if isQ:
+            step = 1
+            while True:
+                nr, nc = r + dr * step, c + dc * step
+                if not (0 <= nr < 10 and 0 <= nc < 10):
+                    break
+                if occupied(nr, nc, black_pieces, gray_pieces):
+                    break
+                step += 1
+        else:
+            nr, nc = r + dr, c + dc  # Un pion ne prend que la pièce voisine
+            if not (0 <= nr < 10 and 0 <= nc < 10):
+                continue
+        nr2, nc2 = nr + dr, nc + dc  # Case derrière l'ennemi
+        if not (0 <= nr2 < 10 and 0 <= nc2 < 10) or (nr, nc) in captured_list:
+            continue
+        if not any(e[0] == nr and e[1] == nc for e in enemies) or occupied(nr2, nc2, black_pieces, gray_pieces):
+            continue
+        captured_p = [xx for xx in enemies if xx[0] == nr and xx[1] == nc][0]
+        old = (piece[0], piece[1], piece[2])
+        piece[0], piece[1] = nr2, nc2
+        if color == backend.PIECE_BLACK:
+            newB, newG = black_pieces, [g for g in gray_pieces if g != captured_p]
+        else:
+            newB, newG = [b for b in black_pieces if b != captured_p], gray_pieces
+        subcaps = baseline_explore_captures(piece, newB, newG, color, captured_list + [(nr, nc)])
+        qhit = 1 if captured_p[2] else 0
+        if not subcaps:
+            results.append(([nr2, nc2], 1, [(nr, nc)], qhit))
+        else:
+            for (dest, cn, path_, qC) in subcaps:
+                results.append((dest, cn + 1, [(nr, nc)] + path_, qC + qhit))
+        piece[0], piece[1], piece[2] = old
+    return results
+
+
+def eager_best_captures(color, black_pieces, gray_pieces):
+    """
+    Sélection des captures de l'ancien find_all_possible_moves : toutes les séquences
+    de toutes les pièces sont construites, puis filtrées (maximum de prises, puis de dames).
+    Retourne (nombre de séquences construites, nombre de coups retenus).
+    """
+    ally = black_pieces if color == backend.PIECE_BLACK else gray_pieces
+    allc = []
+    for pi in ally:
+        allc.extend(baseline_explore_captures(pi[:], black_pieces, gray_pieces, color, []))
+    if not allc:
+        return 0, 0
+    maxC = max(x[1] for x in allc)
+    best = [x for x in allc if x[1] == maxC]
+    maxQ = max(x[3] for x in best)
+    return len(allc), len([x for x in best if x[3] == maxQ])
+
+
+def run_benchmark(n_positions=200, repeat=3):
+    """
+    Mesure les deux méthodes et affiche les temps par position.
+    """
+    rng = random.Random(2024)
+    positions = [branching_position(rng) for _ in range(n_positions)]
+
+    materialised = 0  # Séquences construites par la méthode complète
+    eager_kept = 0  # Coups retenus par la méthode complète (doit égaler 'kept')
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for black, gray in positions:
+            built, retained = eager_best_captures(backend.PIECE_BLACK, black, gray)
+            materialised += built
+            eager_kept += retained
+    t_eager = (time.perf_counter() - t0) / (repeat * n_positions)
+
+    kept = 0  # Coups retenus par la génération élaguée
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for black, gray in positions:
+            kept += len(backend.find_all_possible_moves(backend.PIECE_BLACK, black, gray))
+    t_lazy = (time.perf_counter() - t0) / (repeat * n_positions)
+
+    print(f"Positions : {n_positions} (x{repeat})")
+    print(f"Exploration complète : {t_eager * 1000:.3f} ms/position, "
+          f"{materialised // repeat} séquences construites, {eager_kept // repeat} coups retenus")
+    print(f"Générateur élagué    : {t_lazy * 1000:.3f} ms/position, "
+          f"{kept // repeat} coups retenus")
+    if t_lazy > 0:
+        print(f"Accélération : x{t_eager / t_lazy:.1f}")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rep = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    run_benchmark(n, rep)
@@ -0,0 +1,224 @@
+"""
+Nom : Bench_frontend.py
+Auteurs : Dylan, Samuel
+Date 11.11.2024
+"""
+###############################################################################
+# Banc d'essai de l'interface sans écran (pilote vidéo SDL "dummy").
+#
+# - Fenêtre de taille fixe (1080p, 4K, ...) au lieu du plein écran
+# - Script d'événements rejoué image par image : menus, saisie des noms,
+#   clics de coups (captures en plusieurs étapes), touches S / L et proposition de nulle D
+# - Le script est généré à partir d'une partie reproductible ou lu depuis un fichier JSON
+# - Temps par image (moyenne, médiane, p95, p99, max) pour chaque phase (menu, noms, partie, fin)
+# - Usage : python bench_frontend.py [coups] [1080p|4K|LxH ...] [--script f.json] [--save-script f.json]
+###############################################################################
+
+import os  # Pilote vidéo, dossier temporaire
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # Avant l'initialisation de pygame : aucun écran requis
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import json  # Lecture / écriture des scripts
+import random  # Partie reproductible
+import sys  # Lecture des arguments de la ligne de commande
+import tempfile  # Sauvegardes (S) et relecture écrites hors du dossier du projet
+import time  # Mesure des temps
+
+import pygame  # Construction des événements
+import backend  # Règles du jeu (génération du script)
+import frontend  # Interface mesurée
+
+RESOLUTIONS = {"1080p": (1920, 1080), "4K": (3840, 2160)}  # Résolutions nommées
+IDLE_FRAMES = 2  # Images sans événement entre deux coups (coût du rendu seul)
+
+
+class ScriptDesync(Exception):
+    """
+    Levée quand l'interface demande des événements pour une autre phase que celle du script.
+    """
+
+
+def key_step(phase, name, text=""):
+    return {"phase": phase, "events": [{"key": name, "text": text}]}
+
+
+def click_step(cell):
+    return {"phase": "partie", "events": [{"click": [cell[0], cell[1]]}]}
+
+
+def make_script(plies=40, seed=0, save_at=10, draw_at=15, load_at=20):
+    """
+    Génère un script reproductible : menu, noms, 'plies' coups joués à la souris
+    (mêmes calculs que run_game), sauvegarde (S), proposition de nulle (D), chargement (L),
+    puis Esc pour quitter la partie et le menu de fin.
+    La partie s'arrête avant toute fin automatique (victoire, blocage, 50 coups, répétition)
+    qui afficherait un message temporisé.
+    """
+    rng = random.Random(seed)
+    steps = [key_step("menu", "return")]
+    for name in ("Noir", "Gris"):
+        steps += [key_step("noms", ch.lower(), ch) for ch in name]
+        steps.append(key_step("noms", "return"))
+
+    backend.reset_game_state()
+    black, gray = backend.initial_pieces()
+    black_turn = True
+    backend.update_position_history(black, gray, black_turn)
+    save_file = os.path.join(tempfile.mkdtemp(), "script_save.json")  # Copie de l'état au moment du S
+
+    for ply in range(plies):
+        if ply == save_at:
+            steps.append(key_step("partie", "s"))
+            backend.save_game_state(save_file, black, gray, black_turn, 0, 0, 0.0, 0.0, 0.0)
+        if ply == draw_at:
+            steps.append(key_step("partie", "d"))
+        if ply == load_at and os.path.exists(save_file):
+            steps.append(key_step("partie", "l"))
+            black, gray, black_turn = backend.load_game_state(save_file)[:3]
+        color = backend.PIECE_BLACK if black_turn else backend.PIECE_GRAY
+        if (backend.check_winner(black, gray) or backend.no_capture_turns >= 50
+                or backend.is_repeated_position(black, gray, black_turn)):
+            break
+        moves = backend.find_all_possible_moves(color, black, gray)
+        if not moves:
+            break
+        piece = rng.choice(moves).piece
+        steps.append(click_step(piece))  # Sélection de la pièce
+        candidates = [m for m in moves if m.piece == piece]
+        if candidates[0].type == 'capture':
+            candidates = backend.break_down_captures(candidates, piece)  # Une capture par clic
+        while True:
+            dest = rng.choice(candidates).dest
+            step = next(m for m in candidates if m.dest == dest)  # Premier coup vers cette case (comme run_game)
+            steps.append(click_step(dest))
+            backend.apply_move(step, black, gray, color, 0, 0)
+            if step.type != 'capture':
+                break
+            seq = [m for m in backend.find_all_possible_moves(color, black, gray)
+                   if m.piece == piece and m.type == 'capture']
+            if not seq:
+                break
+            candidates = backend.break_down_captures(seq, piece)  # Capture en chaîne : même pièce
+        black_turn = not black_turn
+        backend.update_position_history(black, gray, black_turn)
+        steps += [{"phase": "partie", "events": []} for _ in range(IDLE_FRAMES)]
+
+    steps.append(key_step("partie", "escape"))
+    steps.append(key_step("fin", "escape"))
+    backend.reset_game_state()
+    if os.path.exists(save_file):
+        os.remove(save_file)
+    os.rmdir(os.path.dirname(save_file))
+    return steps
+
+
+def build_event(spec):
+    """
+    Convertit un événement du script en événement pygame (les clics sont donnés en cases
+    et placés au centre de la case pour la taille d'affichage courante).
+    """
+    if "click" in spec:
+        row, col = spec["click"]
+        half = frontend.CELL_SIZE // 2
+        pos = (col * frontend.CELL_SIZE + frontend.BOARD_MARGIN + half,
+               row * frontend.CELL_SIZE + frontend.BOARD_MARGIN + half)
+        return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)
+    return pygame.event.Event(pygame.KEYDOWN, key=pygame.key.key_code(spec["key"]),
+                              unicode=spec.get("text", ""), mod=0)
+
+
+class ScriptedInput:
+    """
+    Source d'événements pour frontend.EVENT_SOURCE : une étape du script par appel.
+    Le temps entre deux appels est le temps d'une image (logique, rendu et flip).
+    """
+
+    def __init__(self, steps):
+        self.steps = steps
+        self.index = 0
+        self.last = None  # Fin du dernier appel
+        self.frames = {}  # phase -> liste des temps d'image (secondes)
+
+    def __call__(self, phase):
+        now = time.perf_counter()
+        if self.last is not None:
+            self.frames.setdefault(phase, []).append(now - self.last)
+        if self.index >= len(self.steps):
+            raise ScriptDesync(f"Script terminé mais l'interface attend encore ({phase})")
+        step = self.steps[self.index]
+        if step["phase"] != phase:
+            raise ScriptDesync(f"Étape {self.index} : phase {step['phase']} attendue, {phase} demandée")
+        self.index += 1
+        events = [build_event(e) for e in step["events"]]
+        self.last = time.perf_counter()  # La construction des événements n'est pas comptée
+        return events
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+def run_benchmark(steps, size):
+    """
+    Lance run_game dans une fenêtre 'size' avec le script donné.
+    Retourne les temps d'image par phase.
+    """
+    source = ScriptedInput(steps)
+    saved = (frontend.WINDOW_SIZE, frontend.FPS, frontend.ANIMATION_STEP_MS, frontend.EVENT_SOURCE)
+    frontend.WINDOW_SIZE, frontend.FPS, frontend.ANIMATION_STEP_MS = size, 0, 0  # Aucune attente volontaire
+    frontend.EVENT_SOURCE = source
+    cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)  # damestemp.json (S/L) et la relecture restent hors du projet
+            source.last = time.perf_counter()  # Première image du menu : démarrage compris
+            frontend.run_game()
+    finally:
+        os.chdir(cwd)
+        frontend.WINDOW_SIZE, frontend.FPS, frontend.ANIMATION_STEP_MS, frontend.EVENT_SOURCE = saved
+    if source.index != len(steps):
+        raise ScriptDesync(f"Partie terminée après {source.index} étapes sur {len(steps)}")
+    return source.frames
+
+
+def report(label, frames):
+    print(f"--- {label} ---")
+    for phase in ("menu", "noms", "partie", "fin"):
+        values = sorted(frames.get(phase, []))
+        if not values:
+            continue
+        ms = [v * 1000 for v in values]
+        print(f"{phase:7s} images {len(ms):4d} | moyenne {sum(ms) / len(ms):7.2f} ms | "
+              f"médiane {percentile(ms, 50):7.2f} | p95 {percentile(ms, 95):7.2f} | "
+              f"p99 {percentile(ms, 99):7.2f} | max {ms[-1]:7.2f}")
+
+
+def parse_size(text):
+    if text in RESOLUTIONS:
+        return RESOLUTIONS[text]
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {}
+    for opt in ("--script", "--save-script"):
+        if opt in args:
+            i = args.index(opt)
+            options[opt] = args[i + 1]
+            del args[i:i + 2]
+    n_plies = int(args.pop(0)) if args and args[0].isdigit() else 40
+    sizes = args or ["1080p", "4K"]
+
+    if "--script" in options:
+        with open(options["--script"], "r") as f:
+            script = json.load(f)
+    else:
+        script = make_script(n_plies)
+    if "--save-script" in options:
+        with open(options["--save-script"], "w") as f:
+            json.dump(script, f)
+    for s in sizes:
+        report(f"{s} {parse_size(s)}", run_benchmark(script, parse_size(s)))
@@ -0,0 +1,492 @@
+"""
+Nom : Engine.py
+Auteurs : Dylan, Samuel
+Date 11.11.2024
+"""
+###############################################################################
+# Moteur de recherche (IA) pour le jeu de Dames (variante jouée par backend).
+#
+# - Évaluation statique (matériel + avancement des pions), table de valeur des pions par case
+#   remplaçable par des poids réglés pour le 10x10 (tuner.py, fichier WEIGHTS_FILE lu au démarrage)
+# - make_move / unmake_move : jouer et annuler un coup sans toucher aux globales du backend
+# - Recherche alpha-bêta (negamax) avec table de transposition (clé Zobrist)
+# - Tri des coups : coup de la table, promotions, coups "killer", historique
+# - Approfondissement itératif interruptible (should_stop)
+# - Recherche de quiescence : les captures obligatoires sont résolues avant l'évaluation
+###############################################################################
+
+import json  # Lecture du fichier de poids
+import os  # Emplacement du fichier de poids
+
+import backend  # Règles du jeu (génération des coups, hachage, couleurs)
+
+# Valeurs de l'évaluation
+MAN_VALUE = 100  # Valeur d'un pion
+QUEEN_VALUE = 300  # Valeur d'une dame
+ADVANCE_BONUS = 2  # Bonus par rangée d'avancement d'un pion
+WIN_SCORE = 100000  # Score d'une position gagnée (adversaire bloqué ou sans pièces)
+WIN_BOUND = WIN_SCORE - 1000  # Au-delà (en valeur absolue), le score est une victoire / défaite en N coups
+# Valeur d'un pion noir sur chaque case du 10x10 (r * 10 + c) ; un pion gris en (r, c) vaut la case
+# symétrique 99 - (r * 10 + c). Par défaut : MAN_VALUE + ADVANCE_BONUS par rangée avancée.
+MAN_TABLE = [MAN_VALUE + ADVANCE_BONUS * (sq // 10) for sq in range(100)]
+OTHER_MAN_TABLES = {}  # Taille du plateau -> table par défaut (plateaux autres que 10x10)
+WEIGHTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "poids_eval.json")  # Poids réglés
+
+# Priorités utilisées par le tri des coups
+HASH_MOVE_SCORE = 1000000  # Coup conseillé par la table de transposition
+PROMOTION_SCORE = 500000  # Coup qui amène un pion sur la rangée de promotion
+KILLER_SCORES = (400000, 300000)  # Premier et second coup "killer" de la profondeur
+MAX_PLY = 64  # Profondeur maximale gérée par les tables killer
+
+STOP_CHECK_INTERVAL = 512  # Nombre de nœuds entre deux appels à should_stop
+QS_NODE_CAP = 256  # Nœuds de quiescence au maximum par feuille de la recherche principale
+TT_MAX_ENTRIES = 1 << 20  # Entrées au plus dans la table de transposition (mémoire bornée)
+
+# Drapeaux des entrées de la table de transposition
+TT_EXACT = 0  # Score exact
+TT_LOWER = 1  # Borne inférieure (coupure bêta)
+TT_UPPER = 2  # Borne supérieure (aucun coup n'a dépassé alpha)
+
+
+def opponent(color):
+    """
+    Retourne la couleur adverse.
+    """
+    return backend.PIECE_GRAY if color == backend.PIECE_BLACK else backend.PIECE_BLACK
+
+
+def move_key(move):
+    """
+    Clé hachable identifiant un coup : (départ, arrivée, cases capturées).
+    Sert pour la table de transposition, les killers et la comparaison de coups.
+    """
+    piece = move.piece
+    size = backend.variant.size
+    return (piece[0] * size + piece[1], move.dest[0] * size + move.dest[1], move.path)
+
+
+def mirror_move_key(key):
+    """
+    Image d'une clé de coup par la symétrie du plateau (voir backend.canonical_hash).
+    La symétrie étant une involution, la même fonction sert à stocker et à relire.
+    """
+    if key is None:
+        return None
+    src, dest, path = key
+    last = backend.variant.size - 1
+    return (backend.mirror_square(src), backend.mirror_square(dest), tuple((last - r, last - c) for r, c in path))
+
+
+def is_promotion(move, color):
+    """
+    Vrai si le coup amène un pion (pas encore dame) sur sa rangée de promotion
+    (cible de promote_to_queen_if_needed).
+    """
+    if move.piece[2]:  # Une dame ne peut plus être promue
+        return False
+    return move.dest[0] == backend.variant.promotion_row[color]
+
+
+def load_weights(filename=WEIGHTS_FILE):
+    """
+    Remplace QUEEN_VALUE et MAN_TABLE par les poids exportés par tuner.py :
+    {"queen": valeur, "man": {"<case r*10+c>": valeur, ...}} (cases foncées, point de vue des noirs).
+    Retourne True si le fichier a été lu ; sans fichier, ou s'il est illisible (tronqué,
+    clé manquante, valeur non numérique, case hors du plateau ou claire), l'évaluation par défaut est gardée.
+    """
+    global QUEEN_VALUE, MAN_TABLE
+    try:
+        with open(filename, "r") as f:
+            data = json.load(f)
+        table = list(MAN_TABLE)
+        for key, value in data["man"].items():
+            sq = int(key)
+            if not 0 <= sq < len(table) or sum(divmod(sq, 10)) % 2:  # Seules les cases foncées sont lues
+                raise ValueError(f"case invalide : {key!r}")
+            table[sq] = int(round(value))
+        queen = int(round(data["queen"]))
+    except (OSError, ValueError, KeyError, TypeError, AttributeError, IndexError):
+        return False  # Tables par défaut inchangées (rien n'est modifié avant la fin de la lecture)
+    QUEEN_VALUE = queen
+    MAN_TABLE = table
+    return True
+
+
+def man_table(size):
+    """
+    Valeur d'un pion noir par case (r * size + c) : MAN_TABLE (poids réglés) pour le 10x10,
+    MAN_VALUE + ADVANCE_BONUS par rangée avancée pour les autres plateaux.
+    """
+    if size == 10:
+        return MAN_TABLE
+    table = OTHER_MAN_TABLES.get(size)
+    if table is None:
+        table = OTHER_MAN_TABLES[size] = [MAN_VALUE + ADVANCE_BONUS * (sq // size) for sq in range(size * size)]
+    return table
+
+
+def evaluate(black_pieces, gray_pieces, color):
+    """
+    Évaluation statique du point de vue de 'color' (positif = avantage).
+    Matériel et valeur des pions selon leur case (man_table, symétrique pour les gris).
+    """
+    size = backend.variant.size
+    table = man_table(size)
+    last = size * size - 1
+    score = 0
+    for r, c, isQ in black_pieces:
+        score += QUEEN_VALUE if isQ else table[r * size + c]  # Les noirs avancent vers la dernière ligne
+    for r, c, isQ in gray_pieces:
+        score -= QUEEN_VALUE if isQ else table[last - r * size - c]  # Les gris vers la ligne 0 : case symétrique
+    return score if color == backend.PIECE_BLACK else -score
+
+
+load_weights()  # Poids réglés pris en compte dès le démarrage (s'ils existent)
+
+
+def make_move(move, black_pieces, gray_pieces, color):
+    """
+    Joue le coup directement dans les listes (sans modifier les globales du backend).
+    Retourne les informations nécessaires à unmake_move.
+    """
+    piece = move.piece
+    enemies = gray_pieces if color == backend.PIECE_BLACK else black_pieces
+    removed = []  # (indice, pièce) des ennemis retirés, dans l'ordre de retrait
+    for (rr, cc) in move.path:
+        for i, e in enumerate(enemies):
+            if e[0] == rr and e[1] == cc:  # Pièce capturée trouvée
+                removed.append((i, e))
+                del enemies[i]
+                break
+    old = (piece[0], piece[1], piece[2])  # État d'origine de la pièce
+    piece[0], piece[1] = move.dest[0], move.dest[1]  # Déplacement
+    if is_promotion(move, color):
+        piece[2] = True  # Promotion en dame
+    return (piece, old, enemies, removed)
+
+
+def unmake_move(undo):
+    """
+    Annule un coup joué par make_move (ordre inverse des retraits).
+    """
+    piece, old, enemies, removed = undo
+    piece[0], piece[1], piece[2] = old  # Remet la pièce à sa place
+    for i, e in reversed(removed):
+        enemies.insert(i, e)  # Réinsère les pièces capturées à leur indice d'origine
+
+
+def score_to_tt(score, ply):
+    """
+    Score de victoire / défaite compté depuis le nœud (et non plus depuis la racine) pour la table :
+    la même position atteinte à une autre profondeur garde la bonne distance au gain.
+    """
+    if score >= WIN_BOUND:
+        return score + ply
+    if score <= -WIN_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_tt(score, ply):
+    """
+    Inverse de score_to_tt : score de la table compté à nouveau depuis la racine.
+    """
+    if score >= WIN_BOUND:
+        return score - ply
+    if score <= -WIN_BOUND:
+        return score + ply
+    return score
+
+
+class SearchAborted(Exception):
+    """
+    Levée pendant la recherche quand should_stop() demande l'arrêt.
+    """
+
+
+class MoveOrderer:
+    """
+    Tri des coups avant la recherche alpha-bêta.
+    Priorités : coup de la table de transposition, promotions, deux coups "killer"
+    par profondeur, puis table d'historique indexée par (case de départ, case d'arrivée).
+    Garde des statistiques sur les coupures obtenues dès le premier coup.
+    """
+
+    def __init__(self, max_ply=MAX_PLY):
+        self.max_ply = max_ply
+        self.killers = [[None, None] for _ in range(max_ply)]  # Deux killers par profondeur
+        self.history = [[0] * backend.MAX_SQUARES for _ in range(backend.MAX_SQUARES)]  # history[départ][arrivée]
+        self.reset_stats()
+
+    def reset_stats(self):
+        """
+        Remet à zéro les statistiques de coupures.
+        """
+        self.stats = {
+            "ordered_nodes": 0,  # Nœuds où les coups ont été triés
+            "cutoffs": 0,  # Nombre total de coupures bêta
+            "first_move_cutoffs": 0,  # Coupures obtenues sur le premier coup essayé
+            "hash_move_cutoffs": 0,  # Coupures obtenues par le coup de la table
+            "killer_cutoffs": 0  # Coupures obtenues par un coup killer
+        }
+
+    def clear(self):
+        """
+        Oublie killers et historique (nouvelle partie).
+        """
+        self.killers = [[None, None] for _ in range(self.max_ply)]
+        self.history = [[0] * backend.MAX_SQUARES for _ in range(backend.MAX_SQUARES)]
+
+    def score_move(self, move, key, ply, color, hash_key):
+        """
+        Score de tri d'un coup (plus grand = essayé en premier).
+        """
+        if key == hash_key:
+            return HASH_MOVE_SCORE
+        if is_promotion(move, color):
+            return PROMOTION_SCORE
+        if ply < self.max_ply:
+            k0, k1 = self.killers[ply]
+            if key == k0:
+                return KILLER_SCORES[0]
+            if key == k1:
+                return KILLER_SCORES[1]
+        return self.history[key[0]][key[1]]
+
+    def order(self, moves, ply, color, hash_key=None):
+        """
+        Retourne la liste de couples (clé, coup) triée du plus prometteur au moins prometteur.
+        """
+        self.stats["ordered_nodes"] += 1
+        keyed = [(move_key(mv), mv) for mv in moves]
+        if len(keyed) > 1:  # Rien à trier pour un coup forcé
+            keyed.sort(key=lambda km: self.score_move(km[1], km[0], ply, color, hash_key), reverse=True)
+        return keyed
+
+    def record_cutoff(self, key, move, ply, depth, index, hash_key=None):
+        """
+        Met à jour killers, historique et statistiques après une coupure bêta
+        provoquée par le coup d'indice 'index' dans la liste triée.
+        """
+        self.stats["cutoffs"] += 1
+        if index == 0:
+            self.stats["first_move_cutoffs"] += 1
+        if key == hash_key:
+            self.stats["hash_move_cutoffs"] += 1
+        elif ply < self.max_ply and key in self.killers[ply]:
+            self.stats["killer_cutoffs"] += 1
+        if move.type == 'capture':  # Les captures sont forcées : inutile de les retenir
+            return
+        if ply < self.max_ply and self.killers[ply][0] != key:
+            self.killers[ply][1] = self.killers[ply][0]  # L'ancien killer devient le second
+            self.killers[ply][0] = key
+        self.history[key[0]][key[1]] += depth * depth  # Les coupures profondes pèsent plus
+
+    def first_move_cutoff_rate(self):
+        """
+        Proportion des coupures obtenues dès le premier coup (1.0 = tri parfait).
+        """
+        if not self.stats["cutoffs"]:
+            return 0.0
+        return self.stats["first_move_cutoffs"] / self.stats["cutoffs"]
+
+    def report(self):
+        """
+        Résumé lisible des statistiques de tri.
+        """
+        return (f"Coupures : {self.stats['cutoffs']} | "
+                f"au 1er coup : {self.first_move_cutoff_rate() * 100:.1f}% | "
+                f"coup table : {self.stats['hash_move_cutoffs']} | "
+                f"killers : {self.stats['killer_cutoffs']}")
+
+
+class Searcher:
+    """
+    Recherche alpha-bêta (negamax) à approfondissement itératif.
+    Utilise une table de transposition indexée par backend.canonical_hash
+    (une position et son image symétrique partagent la même entrée)
+    et un MoveOrderer pour le tri des coups.
+    """
+
+    def __init__(self):
+        self.tt = {}  # Table de transposition : hash -> (profondeur, score, drapeau, clé du meilleur coup)
+        # (score de victoire / défaite compté depuis la position, voir score_to_tt)
+        self.tt_max_entries = TT_MAX_ENTRIES  # Taille maximale de la table
+        self.orderer = MoveOrderer()
+        self.nodes = 0  # Nœuds visités pendant la dernière recherche (quiescence comprise)
+        self.qnodes = 0  # Nœuds de quiescence
+        self.use_quiescence = True  # Résout les captures en attente avant d'évaluer
+        self.qs_node_cap = QS_NODE_CAP  # Plafond de nœuds de quiescence par feuille
+        self.qs_budget = 0  # Nœuds de quiescence encore autorisés pour la feuille courante
+        self.undo_stack = []  # Coups en cours d'exploration (annulés si la recherche est interrompue)
+        self.should_stop = None  # Fonction sans argument : True pour interrompre la recherche
+        self.stop_interval = STOP_CHECK_INTERVAL  # Nœuds entre deux appels à should_stop
+        self.evaluate = evaluate  # Évaluation des feuilles (remplaçable, ex. evalserver.EvalClient.evaluate)
+
+    def new_game(self):
+        """
+        Vide les tables avant une nouvelle partie.
+        """
+        self.tt.clear()
+        self.orderer.clear()
+
+    def probe(self, black_pieces, gray_pieces, color):
+        """
+        Entrée de la table pour la position, avec la clé du meilleur coup remise
+        dans l'orientation de la position, ou None.
+        """
+        h, flipped = backend.canonical_hash(black_pieces, gray_pieces, color == backend.PIECE_BLACK)
+        entry = self.tt.get(h)
+        if entry and flipped:
+            entry = entry[:3] + (mirror_move_key(entry[3]),)
+        return entry
+
+    def search(self, black_pieces, gray_pieces, color, depth):
+        """
+        Cherche le meilleur coup pour 'color' jusqu'à la profondeur donnée.
+        Retourne (meilleur coup, score). Les listes sont restaurées à la fin.
+        Si la recherche est interrompue, retourne le résultat de la dernière itération complète.
+        """
+        best_move, best_score = None, 0
+        for _, best_move, best_score in self.iterate(black_pieces, gray_pieces, color, depth):
+            pass
+        return best_move, best_score
+
+    def iterate(self, black_pieces, gray_pieces, color, max_depth):
+        """
+        Approfondissement itératif : produit (profondeur, meilleur coup, score)
+        après chaque itération complète. S'arrête sans erreur si should_stop() devient vrai.
+        """
+        self.nodes = 0
+        self.qnodes = 0
+        self.orderer.reset_stats()
+        if len(self.tt) >= self.tt_max_entries:  # Table pleine (analyse, match) : on repart à vide
+            self.tt.clear()
+        moves = backend.find_all_possible_moves(color, black_pieces, gray_pieces)
+        for d in range(1, max_depth + 1):  # Chaque itération remplit la table pour trier la suivante
+            undo_stack = []  # Coups joués au moment d'une interruption (pour restaurer la position)
+            self.undo_stack = undo_stack
+            try:
+                score = self.negamax(black_pieces, gray_pieces, color, d, -WIN_SCORE - 1, WIN_SCORE + 1, 0)
+            except SearchAborted:
+                for undo in reversed(undo_stack):
+                    unmake_move(undo)  # Remet les listes dans leur état d'origine
+                return
+            entry = self.probe(black_pieces, gray_pieces, color)
+            best_move = None
+            if entry and entry[3] is not None:
+                for mv in moves:
+                    if move_key(mv) == entry[3]:
+                        best_move = mv
+                        break
+            yield d, best_move, score
+            if len(moves) <= 1:  # Coup unique ou aucun coup : inutile d'approfondir
+                return
+
+    def negamax(self, black_pieces, gray_pieces, color, depth, alpha, beta, ply):
+        """
+        Recherche alpha-bêta classique, score du point de vue de 'color'.
+        """
+        self.nodes += 1
+        if self.should_stop and self.nodes % self.stop_interval == 0 and self.should_stop():
+            raise SearchAborted()
+        h, flipped = backend.canonical_hash(black_pieces, gray_pieces, color == backend.PIECE_BLACK)
+        entry = self.tt.get(h)
+        hash_key = None
+        if entry:
+            e_depth, e_score, e_flag, hash_key = entry
+            e_score = score_from_tt(e_score, ply)  # Distance au gain depuis la racine
+            if flipped:
+                hash_key = mirror_move_key(hash_key)  # Coup stocké dans l'orientation canonique
+            if e_depth >= depth and ply > 0:  # Entrée suffisamment profonde
+                if e_flag == TT_EXACT:
+                    return e_score
+                if e_flag == TT_LOWER and e_score >= beta:
+                    return e_score
+                if e_flag == TT_UPPER and e_score <= alpha:
+                    return e_score
+
+        moves = backend.find_all_possible_moves(color, black_pieces, gray_pieces)
+        if not moves:  # Blocage ou plus de pièces : défaite
+            return -WIN_SCORE + ply
+        if depth <= 0:
+            if self.use_quiescence and moves[0].type == 'capture':
+                self.qs_budget = self.qs_node_cap  # Captures en attente : on les résout
+                return self.quiesce(black_pieces, gray_pieces, color, alpha, beta, ply, moves)
+            return self.evaluate(black_pieces, gray_pieces, color)
+
+        alpha_orig = alpha
+        best_score = -WIN_SCORE - 1
+        best_key = None
+        for index, (key, mv) in enumerate(self.orderer.order(moves, ply, color, hash_key)):
+            undo = make_move(mv, black_pieces, gray_pieces, color)
+            self.undo_stack.append(undo)
+            score = -self.negamax(black_pieces, gray_pieces, opponent(color), depth - 1, -beta, -alpha, ply + 1)
+            self.undo_stack.pop()
+            unmake_move(undo)
+            if score > best_score:
+                best_score, best_key = score, key
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:  # Coupure bêta
+                self.orderer.record_cutoff(key, mv, ply, depth, index, hash_key)
+                break
+
+        if best_score <= alpha_orig:
+            flag = TT_UPPER
+        elif best_score >= beta:
+            flag = TT_LOWER
+        else:
+            flag = TT_EXACT
+        old = self.tt.get(h)
+        if old is None and len(self.tt) >= self.tt_max_entries and ply > 0:
+            return best_score  # Table pleine : pas de nouvelle entrée avant la prochaine recherche
+        if old is not None and old[0] > depth and ply > 0:
+            return best_score  # On garde l'entrée la plus profonde
+        self.tt[h] = (depth, score_to_tt(best_score, ply), flag, mirror_move_key(best_key) if flipped else best_key)
+        return best_score
+
+    def quiesce(self, black_pieces, gray_pieces, color, alpha, beta, ply, moves=None):
+        """
+        Recherche de quiescence : tant que le camp au trait doit capturer, on joue
+        toutes les captures (obligatoires, donc pas d'évaluation "sans jouer").
+        Une position sans capture est évaluée statiquement. Le nombre de nœuds est plafonné.
+        """
+        self.nodes += 1
+        self.qnodes += 1
+        if self.should_stop and self.nodes % self.stop_interval == 0 and self.should_stop():
+            raise SearchAborted()
+        if moves is None:
+            moves = backend.find_all_possible_moves(color, black_pieces, gray_pieces)
+            if not moves:  # Blocage ou plus de pièces : défaite
+                return -WIN_SCORE + ply
+        if moves[0].type != 'capture' or self.qs_budget <= 0:
+            return self.evaluate(black_pieces, gray_pieces, color)  # Position calme (ou plafond atteint)
+        self.qs_budget -= 1
+        best_score = -WIN_SCORE - 1
+        for mv in moves:
+            undo = make_move(mv, black_pieces, gray_pieces, color)
+            self.undo_stack.append(undo)
+            score = -self.quiesce(black_pieces, gray_pieces, opponent(color), -beta, -alpha, ply + 1)
+            self.undo_stack.pop()
+            unmake_move(undo)
+            if score > best_score:
+                best_score = score
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+        return best_score
+
+    def qnode_share(self):
+        """
+        Part des nœuds de quiescence dans la dernière recherche.
+        """
+        return self.qnodes / self.nodes if self.nodes else 0.0
+
+    def report(self):
+        """
+        Résumé lisible des statistiques de la dernière recherche.
+        """
+        return (f"Nœuds : {self.nodes} | quiescence : {self.qnodes} "
+                f"({self.qnode_share() * 100:.1f}%) | {self.orderer.report()}")
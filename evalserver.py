@@ -0,0 +1,325 @@
+"""
+Nom : Evalserver.py
+Auteurs : Dylan, Samuel
+Date 11.11.2024
+"""
+###############################################################################
+# Service d'évaluation par lots partagé par plusieurs processus de recherche.
+#
+# - Un processus serveur et, par processus de recherche, un anneau en mémoire partagée
+#   (positions encodées, heure d'envoi, numéro de requête, score, numéro de réponse)
+# - Le serveur regroupe les requêtes de tous les anneaux en un lot : évaluation NumPy
+#   (caractéristiques et poids de tuner.py) dès que le lot est plein ou que la plus ancienne
+#   requête a attendu 'window' secondes ; sans requête, il dort (sommeil croissant, pas d'attente active)
+# - Le client attend par courts sommeils et s'arrête avant 'deadline', avec une marge mesurée
+#   (durée de ses attentes, coût d'une évaluation locale) : il évalue alors lui-même la position
+#   (engine.evaluate) et la réponse tardive du serveur est ignorée. Seule une préemption par le
+#   système (plus de processus actifs que de cœurs) peut encore faire dépasser le délai
+# - Serveur arrêté (signe de vie trop ancien) : les clients évaluent localement sans attendre
+# - Positions codées sur les 50 cases du 10x10 (tuner.py) : sur un autre plateau, évaluation locale
+# - Branchement dans la recherche : searcher.evaluate = client.evaluate
+# - Usage : python evalserver.py [processus] [requêtes par processus]
+#   (débit et latence selon la taille maximale des lots et la fenêtre d'attente)
+###############################################################################
+
+import bisect  # Latences au-delà du délai (liste triée)
+import multiprocessing  # Processus serveur et clients
+import random  # Positions de mesure
+import sys  # Lecture des arguments de la ligne de commande
+import time  # Heures d'envoi, délais, mesures
+from multiprocessing import shared_memory  # Anneaux partagés
+
+import numpy as np  # Lots et évaluation vectorisée
+
+import backend  # Couleurs, génération des positions de mesure
+import engine  # Évaluation de secours
+import tuner  # Encodage des positions, caractéristiques et poids
+
+RING_SLOTS = 64  # Requêtes en attente au plus par client
+MAX_BATCH = 64  # Taille maximale d'un lot
+BATCH_WINDOW = 0.0005  # Attente maximale du serveur avant d'évaluer un lot incomplet (secondes)
+CLIENT_DEADLINE = 0.002  # Attente maximale d'un client avant d'évaluer lui-même (secondes)
+IDLE_SLEEP_MIN = 0.00005  # Sommeil du serveur sans requête : commence à 50 µs...
+IDLE_SLEEP_MAX = 0.002  # ... et double jusqu'à 2 ms au repos (pas d'attente active)
+HEARTBEAT_TIMEOUT = 0.1  # Serveur considéré arrêté sans signe de vie depuis 100 ms
+POLL_SLEEP = 0.00002  # Attente d'un client entre deux lectures de sa réponse (bloquante : le serveur tourne)
+POLL_DECAY = 0.99  # Oubli progressif (à chaque requête) de la pire durée d'attente mesurée par un client
+SQUARES = len(tuner.DARK_SQUARES)
+
+
+class EvalRings:
+    """
+    Anneaux de tous les clients dans un seul bloc de mémoire partagée.
+    Chaque anneau n'a qu'un écrivain de requêtes (son client) et un lecteur (le serveur) :
+    le client écrit la position puis avance 'head', le serveur écrit le score puis le numéro de réponse.
+    """
+
+    def __init__(self, n_clients, slots=RING_SLOTS, name=None):
+        self.n_clients, self.slots = n_clients, slots
+        layout = [("control", np.int64, (4,)),  # [arrêt, lots, requêtes évaluées, requêtes périmées]
+                  ("heartbeat", np.float64, (1,)),  # Dernier tour de boucle du serveur (time.perf_counter)
+                  ("head", np.int64, (n_clients,)),  # Requêtes envoyées par chaque client
+                  ("sent", np.float64, (n_clients, slots)),  # Heure d'envoi (time.perf_counter)
+                  ("req_seq", np.int64, (n_clients, slots)),  # Numéro de la requête dans la case
+                  ("resp_seq", np.int64, (n_clients, slots)),  # Numéro de la requête à laquelle le score répond
+                  ("scores", np.float32, (n_clients, slots)),  # Score (point de vue des noirs)
+                  ("boards", np.int8, (n_clients, slots, SQUARES))]  # Positions (tuner.encode_board)
+        size = sum(int(np.prod(shape)) * np.dtype(dtype).itemsize for _, dtype, shape in layout)
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        self.name = self.shm.name
+        offset = 0
+        for field, dtype, shape in layout:
+            array = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)
+            setattr(self, field, array)
+            offset += array.nbytes
+        if self.owner:
+            self.control[:] = 0
+            self.heartbeat[:] = 0.0
+            self.head[:] = 0
+            self.req_seq[:] = -1
+            self.resp_seq[:] = -1
+
+    def close(self):
+        for field in ("control", "heartbeat", "head", "sent", "req_seq", "resp_seq", "scores", "boards"):
+            setattr(self, field, None)  # Les vues doivent disparaître avant la fermeture du bloc
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def serve(name, n_clients, slots=RING_SLOTS, max_batch=MAX_BATCH, window=BATCH_WINDOW):
+    """
+    Boucle du processus serveur : lit les anneaux, forme les lots, évalue et répond,
+    jusqu'à ce que control[0] passe à 1. Retourne l'histogramme des tailles de lots.
+    """
+    rings = EvalRings(n_clients, slots, name)
+    weights = tuner.initial_weights().astype(np.float32)  # Poids du moteur (engine.load_weights compris)
+    consumed = np.zeros(n_clients, dtype=np.int64)  # Requêtes déjà lues par anneau
+    sizes = np.zeros(max_batch + 1, dtype=np.int64)
+    control, heartbeat = rings.control, rings.heartbeat
+    idle = IDLE_SLEEP_MIN
+    try:
+        while not control[0]:
+            now = time.perf_counter()
+            heartbeat[0] = now  # Signe de vie pour les clients
+            heads = rings.head.copy()
+            waiting = np.nonzero(heads > consumed)[0]
+            if not len(waiting):
+                time.sleep(idle)  # Rien à faire : sommeil de plus en plus long, le processeur reste aux clients
+                idle = min(2 * idle, IDLE_SLEEP_MAX)
+                continue
+            idle = IDLE_SLEEP_MIN
+            pending = int((heads - consumed).sum())
+            oldest = min(rings.sent[w, consumed[w] % slots] for w in waiting)
+            if pending < max_batch and now - oldest < window:
+                time.sleep(window - (now - oldest))  # Lot incomplet : on dort jusqu'à la fin de la fenêtre
+                continue
+            cw, cs, seqs = [], [], []
+            for w in waiting:
+                first = max(consumed[w], heads[w] - slots)  # Cases écrasées : requêtes perdues (client parti)
+                last = min(heads[w], first + max_batch - len(seqs))
+                for seq in range(first, last):
+                    cw.append(w)
+                    cs.append(seq % slots)
+                    seqs.append(seq)
+                consumed[w] = last
+                if len(seqs) >= max_batch:
+                    break
+            seqs = np.array(seqs, dtype=np.int64)
+            valid = rings.req_seq[cw, cs] == seqs  # La case peut déjà contenir une requête plus récente
+            boards = rings.boards[cw, cs]
+            scores = tuner.features(boards) @ weights
+            keep = np.nonzero(valid)[0]
+            cw, cs = np.array(cw)[keep], np.array(cs)[keep]
+            rings.scores[cw, cs] = scores[keep]
+            rings.resp_seq[cw, cs] = seqs[keep]  # Après le score : la réponse devient visible
+            sizes[len(seqs)] += 1
+            control[1] += 1
+            control[2] += len(keep)
+            control[3] += len(seqs) - len(keep)
+    finally:
+        rings.close()
+    return sizes
+
+
+def _serve_process(name, n_clients, slots, max_batch, window, out):
+    out.put(serve(name, n_clients, slots, max_batch, window))
+
+
+class EvalClient:
+    """
+    Côté processus de recherche : envoie une position dans son anneau et attend le score
+    au plus 'deadline' secondes, sinon évalue lui-même.
+    Marge mesurée : le client cesse d'attendre dès qu'une attente de plus (pire durée récente
+    d'un time.sleep(POLL_SLEEP)) puis l'évaluation locale risqueraient de dépasser 'deadline'.
+    Serveur arrêté (plus de signe de vie) : évaluation locale immédiate, sans attente.
+    """
+
+    def __init__(self, name, n_clients, index, slots=RING_SLOTS, deadline=CLIENT_DEADLINE):
+        self.rings = EvalRings(n_clients, slots, name)
+        self.index = index
+        self.slots = slots
+        self.deadline = deadline
+        self.seq = int(self.rings.head[index])
+        self.requests = 0
+        self.fallbacks = 0  # Réponses arrivées trop tard : évaluation locale
+        self.offline = 0  # Requêtes évaluées localement car le serveur ne répond plus
+        black, gray = backend.initial_pieces()
+        t0 = time.perf_counter()
+        for _ in range(8):
+            engine.evaluate(black, gray, backend.PIECE_BLACK)
+        self.local_cost = 2 * (time.perf_counter() - t0) / 8  # Coût d'une évaluation locale (avec marge)
+        self.poll_cost = POLL_SLEEP  # Pire durée récente d'un time.sleep(POLL_SLEEP)
+
+    def evaluate(self, black_pieces, gray_pieces, color):
+        """
+        Même signature et même convention que engine.evaluate.
+        """
+        rings, w, seq = self.rings, self.index, self.seq
+        now = time.perf_counter()
+        if rings.control[0] or now - rings.heartbeat[0] > HEARTBEAT_TIMEOUT or backend.variant.size != 10:
+            self.offline += 1
+            return engine.evaluate(black_pieces, gray_pieces, color)
+        slot = seq % self.slots
+        rings.boards[w, slot] = tuner.encode_board(black_pieces, gray_pieces)
+        rings.req_seq[w, slot] = seq
+        rings.sent[w, slot] = now
+        rings.head[w] = seq + 1  # Publication : le serveur peut lire la case
+        self.seq = seq + 1
+        self.requests += 1
+        limit = now + self.deadline - self.local_cost
+        self.poll_cost = max(POLL_SLEEP, self.poll_cost * POLL_DECAY)  # Une attente lente ne bloque pas pour toujours
+        resp = rings.resp_seq[w]
+        while resp[slot] != seq:
+            t = time.perf_counter()
+            if t + self.poll_cost >= limit:  # Attendre encore risquerait de dépasser le délai
+                self.fallbacks += 1
+                return engine.evaluate(black_pieces, gray_pieces, color)
+            time.sleep(POLL_SLEEP)  # Processus bloqué (pas d'attente active) : le processeur va au serveur
+            self.poll_cost = max(self.poll_cost, time.perf_counter() - t)
+        score = int(rings.scores[w, slot])
+        return score if color == backend.PIECE_BLACK else -score
+
+    def close(self):
+        self.rings.close()
+
+
+class EvalService:
+    """
+    Crée les anneaux et lance le processus serveur ; client(i) pour chaque processus de recherche.
+    """
+
+    def __init__(self, n_clients, slots=RING_SLOTS, max_batch=MAX_BATCH, window=BATCH_WINDOW):
+        self.n_clients, self.slots = n_clients, slots
+        self.rings = EvalRings(n_clients, slots)
+        self.name = self.rings.name
+        self.results = multiprocessing.Queue()
+        self.process = multiprocessing.Process(target=_serve_process, daemon=True,
+                                               args=(self.name, n_clients, slots, max_batch, window, self.results))
+        self.process.start()
+        give_up = time.perf_counter() + 10.0
+        while not self.rings.heartbeat[0] and self.process.is_alive() and time.perf_counter() < give_up:
+            time.sleep(0.001)  # Serveur prêt (premier signe de vie) avant de donner des clients
+
+    def client(self, index, deadline=CLIENT_DEADLINE):
+        return EvalClient(self.name, self.n_clients, index, self.slots, deadline)
+
+    def stop(self):
+        """
+        Arrête le serveur et retourne (histogramme des tailles de lots, lots, requêtes évaluées, périmées).
+        """
+        self.rings.control[0] = 1
+        sizes = self.results.get()
+        self.process.join()
+        stats = tuple(int(x) for x in self.rings.control[1:4])
+        self.rings.close()
+        return (sizes,) + stats
+
+
+def sample_positions(n, seed):
+    """
+    Positions de parties aléatoires (mesures).
+    """
+    rng = random.Random(seed)
+    out = []
+    while len(out) < n:
+        black, gray = backend.initial_pieces()
+        color = backend.PIECE_BLACK
+        for _ in range(rng.randrange(80)):
+            moves = backend.find_all_possible_moves(color, black, gray)
+            if not moves:
+                break
+            engine.make_move(rng.choice(moves), black, gray, color)
+            color = engine.opponent(color)
+            out.append(([p[:] for p in black], [p[:] for p in gray], color))
+    return out[:n]
+
+
+def _bench_client(name, n_clients, index, slots, deadline, n_requests, out, go):
+    client = EvalClient(name, n_clients, index, slots, deadline)
+    positions = sample_positions(n_requests, index)
+    out.put(None)  # Prêt : les positions sont générées
+    go.wait()  # Départ commun (pas de génération de positions pendant les mesures)
+    latencies = []
+    start = time.perf_counter()
+    for black, gray, color in positions:
+        t0 = time.perf_counter()
+        client.evaluate(black, gray, color)
+        latencies.append(time.perf_counter() - t0)
+    out.put((time.perf_counter() - start, latencies, client.fallbacks))
+    client.close()
+
+
+def run_benchmark(n_clients=4, n_requests=2000, max_batch=MAX_BATCH, window=BATCH_WINDOW,
+                  deadline=CLIENT_DEADLINE):
+    """
+    n_clients processus envoient chacun n_requests évaluations à la suite.
+    Retourne (débit en évaluations/s, latences triées, évaluations locales, taille moyenne des lots).
+    """
+    service = EvalService(n_clients, RING_SLOTS, max_batch, window)
+    out, go = multiprocessing.Queue(), multiprocessing.Event()
+    clients = [multiprocessing.Process(target=_bench_client,
+                                       args=(service.name, n_clients, i, RING_SLOTS, deadline, n_requests, out, go))
+               for i in range(n_clients)]
+    for p in clients:
+        p.start()
+    for _ in clients:
+        out.get()
+    go.set()
+    results = [out.get() for _ in clients]
+    for p in clients:
+        p.join()
+    sizes, batches, served, stale = service.stop()
+    wall = max(r[0] for r in results)
+    latencies = sorted(x for r in results for x in r[1])
+    fallbacks = sum(r[2] for r in results)
+    mean_batch = served / batches if batches else 0.0
+    return len(latencies) / wall, latencies, fallbacks, mean_batch
+
+
+def report(n_clients=4, n_requests=2000):
+    """
+    Débit et latence selon la taille maximale des lots et la fenêtre d'attente du serveur.
+    """
+    positions = sample_positions(n_requests, 0)
+    t0 = time.perf_counter()
+    for black, gray, color in positions:
+        engine.evaluate(black, gray, color)
+    local = n_requests / (time.perf_counter() - t0)
+    print(f"Référence : engine.evaluate dans le processus, {local:.0f} évaluations/s")
+    print(f"{n_clients} clients x {n_requests} requêtes, délai client {CLIENT_DEADLINE * 1000:.1f} ms")
+    for max_batch in (1, 8, 32, 128):
+        for window in (0.0001, 0.0005, 0.001):
+            rate, lat, fallbacks, mean_batch = run_benchmark(n_clients, n_requests, max_batch, window)
+            p = [lat[min(len(lat) - 1, int(q * len(lat)))] * 1e6 for q in (0.5, 0.99)]
+            late = len(lat) - bisect.bisect_right(lat, CLIENT_DEADLINE)
+            print(f"lot max {max_batch:3d} | fenêtre {window * 1e6:5.0f} µs | {rate:7.0f} éval/s | "
+                  f"lot moyen {mean_batch:5.1f} | latence médiane {p[0]:6.0f} µs, p99 {p[1]:6.0f} µs, "
+                  f"max {lat[-1] * 1e6:6.0f} µs | au-delà du délai {late} | locales {fallbacks}")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    reqs = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    report(n, reqs)
@@ -5,7 +5,7 @@ Date 11.11.2024
 """
 
 ###############################################################################
-# Interface graphique du jeu de Dames 10x10.
+# Interface graphique du jeu de Dames (10x10 par défaut, autres variantes : main.py --variant).
 #
 # - Menus de début & fin avec dégradé
 # - Polices agrandies
@@ -13,14 +13,30 @@ Date 11.11.2024
 # - Animation des déplacements (animate_move)
 # - Sidebar affichant stats (nombre de coups, captures totales)
 # - Couleur du pion noir plus visible : (10, 10, 10) géré dans backend
+# - Touche H : conseil de coup calculé en arrière-plan (analysis)
+# - Enregistrement de la partie (replay) pour la relecture avec replay.py
+# - Pièces pré-dessinées (atlas de sprites lissés) affichées en un seul appel blits,
+#   damier vide gardé en image (un seul blit)
+# - Réglages pour le banc d'essai sans écran (bench_frontend.py) : fenêtre fixe,
+#   FPS, délai d'animation et source d'événements remplaçable
+# - Démarrage rapide : chemins des polices gardés sur disque, polices créées une seule fois,
+#   analyse importée à la première demande, temps de démarrage affiché
+# - Annulation (U) et rétablissement (R) des coups en mémoire (backend.MoveStack),
+#   y compris au milieu d'une capture en chaîne
+# - Statistiques de chaque partie terminée ajoutées au stockage par colonnes (gamestats)
 ###############################################################################
 
 import pygame  # Import de Pygame pour toute la partie graphique
 import sys  # Import de sys, pour pouvoir quitter le programme proprement
+import os  # Vérification des fichiers de polices
+import json  # Cache des chemins de polices
+import time  # Mesure du temps de démarrage
 import backend  # Import du backend pour les fonctions de logique du jeu
+import replay  # Enregistrement de la partie pour la relecture
+# analysis (processus d'analyse) est importé à la première pression sur H
 
 # Paramètres du damier
-BOARD_SIZE = 10  # Taille du plateau en cases (10x10)
+BOARD_SIZE = backend.variant.size  # Taille du plateau en cases (10x10 par défaut, voir run_game)
 CELL_SIZE = 80  # Dimension de chaque case en pixels
 BOARD_MARGIN = 20  # Marge autour du plateau
 SIDEBAR_WIDTH = 300  # Largeur de la barre latérale d'affichage des stats
@@ -36,34 +52,130 @@ BOARD_BLACK = (50, 50, 50)  # Couleur des cases noires du damier
 BOARD_WHITE = (240, 240, 240)  # Couleur des cases blanches du damier
 BOARD_FRAME = (80, 80, 80)  # Couleur du cadre entourant le damier
 PIECE_HALO = (255, 0, 0)  # Couleur pour surligner une pièce sélectionnée (halo rouge)
+HINT_COLOR = (0, 170, 60)  # Couleur du conseil de coup (cases de départ et d'arrivée)
 
 # Mode Blitz
 BLITZ_MODE = True  # Active le mode Blitz si True
-BLITZ_TIME_LIMIT = 120  # Limite de temps en secondes pour le mode Blitz
-
+BLITZ_TIME_LIMIT = backend.BLITZ_TIME_LIMIT  # Limite de temps en secondes pour le mode Blitz
+REPLAY_FILE = "derniere_partie.replay.json"  # Fichier de relecture écrit à la fin de chaque partie
+
+# Affichage et entrées (modifiés par le banc d'essai bench_frontend.py)
+WINDOW_SIZE = None  # (largeur, hauteur) : fenêtre de taille fixe au lieu du plein écran
+FPS = 60  # Images par seconde maximum (0 : pas de limite)
+ANIMATION_STEP_MS = 10  # Pause entre deux étapes de l'animation d'un coup
+EVENT_SOURCE = None  # Fonction(phase) -> liste d'événements, remplace pygame.event.get (événements scriptés)
+
+SPRITE_SUPERSAMPLE = 4  # Les sprites sont dessinés 4 fois plus grands puis réduits (anti-crénelage)
+sprites = {}  # Atlas : (couleur, dame) ou "halo" -> Surface, construit pour sprites_cell
+sprites_cell = None  # CELL_SIZE pour lequel l'atlas a été construit
+board_cache = {}  # (cases par côté, taille de case, cadre) -> image du damier vide
+
+FONT_NAME = "Arial"  # Police de l'interface
+FONT_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "polices_cache.json")  # Polices résolues
+font_paths = None  # "nom|gras" -> [chemin ou None, gras simulé], chargé depuis FONT_CACHE_FILE
+fonts = {}  # (nom, taille, gras) -> pygame.font.Font partagée par tous les écrans
 font_title = None  # Police pour les titres, initialisée plus tard
 font_menu = None  # Police pour les menus
 font_info = None  # Police pour les informations affichées
 
+STARTUP_T0 = None  # Instant du lancement (main.py, avant l'import de pygame) pour le rapport de démarrage
+startup_marks = []  # (étape, instant) pendant le démarrage ; vidée après le rapport
+
 
 def draw_label(screen, label="Dylan, Samuel"):
     """
     Affiche un label discret en bas à gauche de l'écran.
     """
-    font = pygame.font.SysFont("Arial", 20)  # Police discrète
+    font = get_font(20)  # Police discrète
     label_surface = font.render(label, True, (128, 128, 128))  # Texte gris discret
     screen.blit(label_surface, (10, screen.get_height() - 30))  # Bas à gauche avec un petit padding
 
 
+def get_events(phase):
+    """
+    Événements à traiter pour l'image courante. 'phase' indique l'écran qui les demande
+    ("menu", "noms", "partie", "fin", "popup") : utile pour les événements scriptés et les mesures.
+    """
+    if EVENT_SOURCE is not None:
+        return EVENT_SOURCE(phase)
+    return pygame.event.get()
+
+
+def font_path(name, bold):
+    """
+    Chemin du fichier de police pour (nom, gras) et indicateur de gras simulé.
+    La recherche dans les polices du système (lente sous Linux : fc-list) n'est faite
+    qu'une fois par machine : le résultat est gardé dans FONT_CACHE_FILE.
+    """
+    global font_paths
+    if font_paths is None:
+        try:
+            with open(FONT_CACHE_FILE, "r") as f:
+                font_paths = json.load(f)
+        except (OSError, ValueError):
+            font_paths = {}
+        # Une police désinstallée depuis est recherchée à nouveau
+        font_paths = {k: v for k, v in font_paths.items() if v[0] is None or os.path.exists(v[0])}
+    key = f"{name}|{int(bold)}"
+    if key not in font_paths:
+        path = pygame.font.match_font(name, bold)
+        regular = pygame.font.match_font(name) if bold else path
+        # Pas de fichier gras distinct : gras simulé, comme SysFont
+        font_paths[key] = [path, bool(bold and (path is None or path == regular))]
+        try:
+            with open(FONT_CACHE_FILE, "w") as f:
+                json.dump(font_paths, f)
+        except OSError:
+            pass  # Cache non enregistré : la recherche sera refaite au prochain lancement
+    return font_paths[key]
+
+
+def get_font(size, bold=False, name=FONT_NAME):
+    """
+    Police partagée (créée une seule fois par taille et style), remplace pygame.font.SysFont.
+    """
+    key = (name, size, bold)
+    if key not in fonts:
+        path, fake_bold = font_path(name, bold)
+        font = pygame.font.Font(path, size)  # path None : police par défaut de pygame
+        font.set_bold(fake_bold)
+        fonts[key] = font
+    return fonts[key]
+
+
 def init_fonts():
     """
     Initialise les polices pour l'affichage.
     """
     global font_title, font_menu, font_info  # On déclare globales pour pouvoir modifier ces variables
     pygame.font.init()  # Initialise le module de font de Pygame
-    font_title = pygame.font.SysFont("Arial", 56, bold=True)  # Police pour les titres en Arial taille 56, en gras
-    font_menu = pygame.font.SysFont("Arial", 40, bold=True)  # Police pour les menus en Arial taille 40, en gras
-    font_info = pygame.font.SysFont("Arial", 32, bold=True)  # Police pour les infos en Arial taille 32, en gras
+    fonts.clear()  # Les polices d'une session pygame précédente ne sont plus valides
+    font_title = get_font(56, bold=True)  # Police pour les titres en Arial taille 56, en gras
+    font_menu = get_font(40, bold=True)  # Police pour les menus en Arial taille 40, en gras
+    font_info = get_font(32, bold=True)  # Police pour les infos en Arial taille 32, en gras
+
+
+def startup_mark(label):
+    """
+    Enregistre la fin d'une étape du démarrage.
+    """
+    startup_marks.append((label, time.perf_counter()))
+
+
+def report_startup():
+    """
+    Affiche, une seule fois, la durée de chaque étape jusqu'à la première image du menu.
+    """
+    if not startup_marks:
+        return
+    startup_mark("premier menu")
+    t0 = STARTUP_T0 if STARTUP_T0 is not None else startup_marks[0][1]
+    parts, prev = [], t0
+    for label, t in startup_marks:
+        parts.append(f"{label} {(t - prev) * 1000:.0f} ms")
+        prev = t
+    print(f"Démarrage : {' | '.join(parts)} | total {(prev - t0) * 1000:.0f} ms")
+    startup_marks.clear()
 
 
 def format_time(seconds):
@@ -90,32 +202,82 @@ def fill_vertical_gradient(surface, top, bottom):
         # Dessine une ligne horizontale avec la couleur calculée
 
 
+def render_board(cell, frame=10):
+    """
+    Image du damier (cases de 'cell' pixels) entourée d'un cadre de 'frame' pixels.
+    Gardée en cache par taille : le damier ne change jamais pendant une partie.
+    """
+    key = (BOARD_SIZE, cell, frame)
+    if key not in board_cache:
+        side = BOARD_SIZE * cell + 2 * frame
+        surf = pygame.Surface((side, side))
+        surf.fill(BOARD_FRAME)  # Cadre du damier
+        for row in range(BOARD_SIZE):
+            for col in range(BOARD_SIZE):
+                # Alterne la couleur de la case en fonction des indices
+                color = BOARD_BLACK if ((row + col) % 2 == 0) else BOARD_WHITE
+                pygame.draw.rect(surf, color, (col * cell + frame, row * cell + frame, cell, cell))
+        board_cache[key] = surf.convert() if pygame.display.get_surface() else surf
+    return board_cache[key]
+
+
 def draw_board(screen):
     """
-    Dessine le damier 10x10 et son cadre.
+    Dessine le damier et son cadre.
     Le damier est centré avec des marges visibles autour.
     """
-    # Calcul de la position et dimensions du cadre
-    frame_x = BOARD_MARGIN - 10
-    frame_y = BOARD_MARGIN - 10
-    frame_width = BOARD_SIZE * CELL_SIZE + 20
-    frame_height = BOARD_SIZE * CELL_SIZE + 20
+    # Le cadre déborde de 10 pixels autour des cases
+    screen.blit(render_board(CELL_SIZE), (BOARD_MARGIN - 10, BOARD_MARGIN - 10))
 
-    # Dessine le cadre du damier
-    pygame.draw.rect(screen, BOARD_FRAME, (frame_x, frame_y, frame_width, frame_height))
 
-    # Dessine les cases du damier
-    for row in range(BOARD_SIZE):
-        for col in range(BOARD_SIZE):
-            # Alterne la couleur de la case en fonction des indices
-            color = BOARD_BLACK if ((row + col) % 2 == 0) else BOARD_WHITE
+def render_sprites(cell):
+    """
+    Pré-dessine les pions, les dames et le halo de sélection pour une taille de case.
+    Chaque image est tracée en grand puis réduite avec smoothscale : bords lissés.
+    Retourne l'atlas : (couleur, dame) ou "halo" -> Surface (toutes de la même taille).
+    """
+    r = cell // 3  # Rayon d'un pion (comme l'ancien tracé)
+    size = 2 * (r + 10)  # Le halo (rayon r + 8, épaisseur 4) tient dans l'image
+    ss = SPRITE_SUPERSAMPLE
+    center = (size * ss // 2, size * ss // 2)
+
+    def render(draw):
+        big = pygame.Surface((size * ss, size * ss), pygame.SRCALPHA)  # Fond transparent
+        draw(big)
+        small = pygame.transform.smoothscale(big, (size, size))
+        if pygame.display.get_surface():
+            small = small.convert_alpha()  # Format de l'écran (possible seulement une fois la fenêtre créée)
+        small.set_alpha(255, pygame.RLEACCEL)  # Codage RLE : les zones transparentes ne coûtent rien au blit
+        return small
+
+    atlas = {}
+    for color in (backend.PIECE_BLACK, backend.PIECE_GRAY):
+        atlas[(color, False)] = render(lambda s, c=color: pygame.draw.circle(s, c, center, r * ss))
+        atlas[(color, True)] = render(lambda s, c=color: (pygame.draw.circle(s, c, center, r * ss),
+                                                          pygame.draw.circle(s, backend.PIECE_QUEEN, center,
+                                                                             (r // 2) * ss)))
+    atlas["halo"] = render(lambda s: pygame.draw.circle(s, PIECE_HALO, center, (r + 8) * ss, 4 * ss))
+    return atlas
+
+
+def build_sprites():
+    """
+    Atlas des pièces pour la taille de case actuelle.
+    Appelée dans run_game une fois l'écran configuré (et à nouveau si CELL_SIZE change).
+    """
+    global sprites, sprites_cell
+    board_cache.clear()  # Nouvelle fenêtre : damiers refaits au format de l'écran
+    sprites, sprites_cell = render_sprites(CELL_SIZE), CELL_SIZE
 
-            # Calcul des coordonnées de la case
-            x = col * CELL_SIZE + BOARD_MARGIN
-            y = row * CELL_SIZE + BOARD_MARGIN
 
-            # Dessine la case
-            pygame.draw.rect(screen, color, (x, y, CELL_SIZE, CELL_SIZE))
+def sprite_origin():
+    """
+    Décalage (en pixels) entre le coin d'une case et le coin d'un sprite centré dessus.
+    Tous les sprites de l'atlas ont la même taille. Reconstruit l'atlas si CELL_SIZE a changé.
+    """
+    if sprites_cell != CELL_SIZE:  # Taille de case modifiée (ou atlas pas encore construit)
+        build_sprites()
+    return BOARD_MARGIN + CELL_SIZE // 2 - sprites["halo"].get_width() // 2
 
 
 def draw_pawn(screen, piece, color):
@@ -125,16 +287,25 @@ def draw_pawn(screen, piece, color):
     color = backend.PIECE_BLACK ou backend.PIECE_GRAY
     """
     row, col, isQ = piece  # Décompose la pièce (ligne, colonne, dame ou pas)
-    cx = col * CELL_SIZE + CELL_SIZE // 2 + BOARD_MARGIN
-    # Coordonnée x du centre de la case
-    cy = row * CELL_SIZE + CELL_SIZE // 2 + BOARD_MARGIN
-    # Coordonnée y du centre de la case
-    r = CELL_SIZE // 3  # Rayon pour dessiner le pion
-    pygame.draw.circle(screen, color, (cx, cy), r)
-    # Dessine le cercle représentant le pion
-    if isQ:  # Si la pièce est une dame
-        pygame.draw.circle(screen, backend.PIECE_QUEEN, (cx, cy), r // 2)
-        # Dessine un cercle plus petit au centre pour symboliser la dame
+    off = sprite_origin()
+    # Image pré-dessinée ; round() car les coordonnées sont fractionnaires pendant une animation
+    screen.blit(sprites[(color, isQ)], (round(col * CELL_SIZE) + off, round(row * CELL_SIZE) + off))
+
+
+def draw_pieces(screen, black_pieces, gray_pieces, selected=None):
+    """
+    Dessine toutes les pièces (et le halo de la pièce sélectionnée) en un seul appel blits.
+    """
+    off, cell = sprite_origin(), CELL_SIZE
+    batch = []  # (image, position) pour Surface.blits
+    for pieces, color in ((black_pieces, backend.PIECE_BLACK), (gray_pieces, backend.PIECE_GRAY)):
+        man, queen = sprites[(color, False)], sprites[(color, True)]
+        batch += [(queen if isQ else man, (round(col * cell) + off, round(row * cell) + off))
+                  for row, col, isQ in pieces]
+    if selected:  # Halo de la pièce sélectionnée : (arr, idx)
+        arr, idx = selected
+        batch.append((sprites["halo"], (round(arr[idx][1] * cell) + off, round(arr[idx][0] * cell) + off)))
+    screen.blits(batch, doreturn=False)
 
 
 def highlight_pawn(screen, selected):
@@ -144,13 +315,29 @@ def highlight_pawn(screen, selected):
     if selected:  # Si une pièce est sélectionnée
         arr, idx = selected  # Récupère l'array et l'indice de la pièce
         row, col, _ = arr[idx]  # Récupère la position de la pièce
-        cx = col * CELL_SIZE + CELL_SIZE // 2 + BOARD_MARGIN
-        # Calcule la coordonnée x du centre de la case
-        cy = row * CELL_SIZE + CELL_SIZE // 2 + BOARD_MARGIN
-        # Calcule la coordonnée y du centre de la case
-        r = CELL_SIZE // 3  # Rayon utilisé pour le pion
-        pygame.draw.circle(screen, PIECE_HALO, (cx, cy), r + 8, 4)
-        # Dessine le halo autour de la pièce
+        off = sprite_origin()
+        screen.blit(sprites["halo"], (round(col * CELL_SIZE) + off, round(row * CELL_SIZE) + off))
+        # Halo pré-dessiné autour de la pièce
+
+
+def draw_hint(screen, hint):
+    """
+    Affiche le conseil de l'analyse : cadre vert sur les cases de départ et d'arrivée,
+    profondeur et score au-dessus du message "Esc" de la sidebar.
+    hint = (profondeur, (row, col) départ, (row, col) arrivée, score, nœuds) ou None.
+    """
+    if hint is None:
+        text = "Analyse en cours..."
+    else:
+        depth, src, dest, score, _ = hint
+        for (row, col) in (src, dest):  # Cadre autour des deux cases
+            pygame.draw.rect(screen, HINT_COLOR,
+                             (col * CELL_SIZE + BOARD_MARGIN, row * CELL_SIZE + BOARD_MARGIN,
+                              CELL_SIZE, CELL_SIZE), 4)
+        text = f"Conseil : prof. {depth}, score {score / 100:+.1f}"
+    hint_surf = font_info.render(text, True, HINT_COLOR)
+    x_hint = BOARD_PIXEL_SIZE + (SIDEBAR_WIDTH - hint_surf.get_width()) // 2  # Centrage horizontal
+    screen.blit(hint_surf, (x_hint, BOARD_PIXEL_SIZE - 160))
 
 
 def animate_move(screen, piece, start_pos, end_pos, steps=10):
@@ -168,7 +355,7 @@ def animate_move(screen, piece, start_pos, end_pos, steps=10):
         piece[0] = sr + row_delta * i  # Calcule la nouvelle ligne
         piece[1] = sc + col_delta * i  # Calcule la nouvelle colonne
         pygame.display.flip()  # Actualise l'affichage
-        pygame.time.wait(10)  # Attend 10ms pour une animation plus fluide
+        pygame.time.wait(ANIMATION_STEP_MS)  # Attend 10ms pour une animation plus fluide
 
     # On place définitivement la pièce à sa position finale
     piece[0], piece[1], piece[2] = er, ec, original_state[2]
@@ -320,7 +507,7 @@ def show_start_menu(screen):
     Affiche le menu de début et retourne True pour lancer la partie, False pour quitter.
     """
     selected_option = 0  # Option sélectionnée initialement
-    item_font = pygame.font.SysFont("Arial", 40, bold=True)
+    item_font = get_font(40, bold=True)
     options = ["Lancer la partie", "Quitter"]  # Options du menu
     running = True  # Boucle de menu active
 
@@ -346,7 +533,8 @@ def show_start_menu(screen):
         draw_label(screen)
 
         pygame.display.flip()  # Actualise l'affichage
-        for ev in pygame.event.get():
+        report_startup()  # Première image du menu : rapport de démarrage (une seule fois)
+        for ev in get_events("menu"):
             if ev.type == pygame.QUIT:
                 return False  # Quitte si la fenêtre est fermée
             elif ev.type == pygame.KEYDOWN:
@@ -363,7 +551,7 @@ def get_player_names(screen):
     Permet la saisie du nom des joueurs (Noir puis Gris) avec un dégradé bleu.
     """
     # Initialisation de la police pour le texte de saisie
-    input_font = pygame.font.SysFont("Arial", 40, bold=True)
+    input_font = get_font(40, bold=True)
 
     # Variables pour stocker les noms des joueurs
     black_name = ""  # Nom du joueur Noir
@@ -399,7 +587,7 @@ def get_player_names(screen):
         pygame.display.flip()
 
         # Gère les événements clavier et de fenêtre
-        for ev in pygame.event.get():
+        for ev in get_events("noms"):
             if ev.type == pygame.QUIT:  # Si l'utilisateur ferme la fenêtre
                 pygame.quit()
                 sys.exit()  # Quitte le programme
@@ -432,8 +620,8 @@ def show_end_menu(screen,
     """
     Affiche le menu de fin avec un résumé de la partie.
     """
-    end_font = pygame.font.SysFont("Arial", 50, bold=True)
-    info_font = pygame.font.SysFont("Arial", 40)
+    end_font = get_font(50, bold=True)
+    info_font = get_font(40)
     panel_w, panel_h = 1000, 600  # Dimensions du panneau de fin
     px = (screen.get_width() - panel_w) // 2  # Position x pour centrer le panneau
     py = (screen.get_height() - panel_h) // 2  # Position y pour centrer le panneau
@@ -491,7 +679,7 @@ def show_end_menu(screen,
     pygame.display.flip()  # Met à jour l'affichage
     waiting = True
     while waiting:  # Boucle d'attente
-        for ev in pygame.event.get():
+        for ev in get_events("fin"):
             if ev.type == pygame.QUIT:  # Si l'utilisateur ferme la fenêtre
                 waiting = False  # Quitte la boucle
             elif ev.type == pygame.KEYDOWN:  # Si une touche est pressée
@@ -520,14 +708,14 @@ def show_popup(screen, message):
     pygame.draw.rect(screen, popup_border, (popup_x, popup_y, popup_width, popup_height), width=4, border_radius=10)
 
     # Affiche le message en rouge, centré dans la pop-up
-    font = pygame.font.SysFont("Arial", 40, bold=True)
+    font = get_font(40, bold=True)
     text_surface = font.render(message, True, text_color)
     text_x = popup_x + (popup_width - text_surface.get_width()) // 2
     text_y = popup_y + (popup_height - text_surface.get_height()) // 2 - 20  # Ajustement vertical
     screen.blit(text_surface, (text_x, text_y))
 
     # Ajoute un bouton "OK" au bas de la pop-up
-    button_font = pygame.font.SysFont("Arial", 30)
+    button_font = get_font(30)
     button_surface = button_font.render("OK", True, button_text_color)
     button_width, button_height = 120, 50
     button_x = popup_x + (popup_width - button_width) // 2
@@ -541,7 +729,7 @@ def show_popup(screen, message):
     # Attend que l'utilisateur clique sur "OK" pour fermer la pop-up
     waiting = True
     while waiting:
-        for event in pygame.event.get():
+        for event in get_events("popup"):
             if event.type == pygame.QUIT:
                 pygame.quit()
                 exit()
@@ -551,6 +739,51 @@ def show_popup(screen, message):
                     waiting = False  # Ferme la pop-up
 
 
+def save_game_stats(outcome, moves, clocks_start, black_caps, gray_caps, black_time, gray_time, total_time):
+    """
+    Ajoute la partie terminée au stockage des statistiques (python gamestats.py pour le résumé).
+    Temps de chaque coup : seule la pendule du joueur au trait tourne, donc la baisse
+    de la somme des deux pendules entre deux fins de tour (MoveStack) est le temps du coup.
+    'clocks_start' : somme des pendules quand la pile a commencé (début de partie ou chargement L) ;
+    les coups d'avant un chargement ne sont pas dans la pile et ne sont pas comptés.
+    """
+    try:
+        import gamestats  # Import à la demande : NumPy n'est chargé qu'en fin de partie
+    except ImportError as e:
+        print("Statistiques non enregistrées :", e)
+        return
+    limit = backend.BLITZ_TIME_LIMIT
+    previous = clocks_start  # Somme des pendules à la fin du tour précédent
+    ply_times = []
+    for entry in moves.done:
+        if entry["turn_end"]:
+            clocks = sum(entry["clocks"])
+            ply_times.append(max(0.0, previous - clocks))
+            previous = clocks
+    gamestats.record_game(outcome[0], outcome[1], black_caps, gray_caps,
+                          limit - black_time, limit - gray_time, total_time, ply_times)
+
+
+def chain_state(moves, black_pieces, gray_pieces):
+    """
+    État de la capture en chaîne après une annulation / un rétablissement :
+    si le dernier coup de la pile est une étape qui ne termine pas le tour,
+    la même pièce doit continuer à prendre.
+    Retourne (continuingCap, capturingPiece, selectedPawn, possibleMoves).
+    """
+    if not moves.done or moves.done[-1]["turn_end"]:
+        return False, None, None, []
+    delta = moves.done[-1]["delta"]
+    arr = black_pieces if delta["color"] == "black" else gray_pieces
+    color = backend.PIECE_BLACK if arr is black_pieces else backend.PIECE_GRAY
+    r, c = divmod(delta["to"], backend.variant.size)
+    idx = next(i for i, p in enumerate(arr) if p[0] == r and p[1] == c)
+    piece = arr[idx]
+    seq = [m for m in backend.find_all_possible_moves(color, black_pieces, gray_pieces)
+           if m.piece is piece and m.type == 'capture']
+    return True, piece, (arr, idx), backend.break_down_captures(seq, piece)
+
+
 def run_game():
     """
     Boucle principale du jeu.
@@ -558,13 +791,21 @@ def run_game():
     - Initialise dynamiquement les dimensions du plateau et de la sidebar.
     - Gère le reste du jeu (menus, animations, etc.) et permet de quitter avec Esc.
     """
+    if STARTUP_T0 is None:
+        startup_mark("lancement")  # Lancé sans main.py : le rapport part d'ici
+    else:
+        startup_mark("import")  # Import de pygame et des modules depuis main.py
     pygame.init()  # Initialise tous les modules Pygame
+    startup_mark("pygame.init")
     init_fonts()  # Initialise les polices utilisées dans le jeu
+    startup_mark("polices")
 
     # Récupération de la résolution de l'écran
     infoObject = pygame.display.Info()  # Récupère les informations sur l'affichage courant
     screen_w = infoObject.current_w  # Largeur actuelle de l'écran
     screen_h = infoObject.current_h  # Hauteur actuelle de l'écran
+    if WINDOW_SIZE:
+        screen_w, screen_h = WINDOW_SIZE  # Taille imposée (banc d'essai)
 
     # Définition d'un ratio pour le plateau et la sidebar (70% pour le plateau, 30% pour la sidebar)
     board_width = int(screen_w * 0.7)  # Le plateau occupe 70% de la largeur
@@ -574,39 +815,44 @@ def run_game():
     board_size_pixels = min(board_width, screen_h)  # Taille maximale du plateau carré
 
     # Détermination de la taille du plateau, du CELL_SIZE, de la marge, etc.
-    global CELL_SIZE, BOARD_MARGIN, SIDEBAR_WIDTH, BOARD_PIXEL_SIZE
-    BOARD_SIZE = 10  # Le plateau est de 10x10 cases
+    global BOARD_SIZE, CELL_SIZE, BOARD_MARGIN, SIDEBAR_WIDTH, BOARD_PIXEL_SIZE
+    BOARD_SIZE = backend.variant.size  # Nombre de cases par côté (variante choisie avant le lancement)
     CELL_SIZE = board_size_pixels // BOARD_SIZE  # Taille d'une case
     BOARD_MARGIN = CELL_SIZE // 8  # Marge autour du plateau (ici 1/8 de CELL_SIZE)
     BOARD_PIXEL_SIZE = BOARD_SIZE * CELL_SIZE + BOARD_MARGIN * 2  # Taille totale du plateau
     SIDEBAR_WIDTH = sidebar_width  # Largeur de la sidebar selon la résolution
 
     # Création de la fenêtre en plein écran
-    screen = pygame.display.set_mode((screen_w, screen_h), pygame.FULLSCREEN)
-    pygame.display.set_caption("Dames 10x10 - Adaptatif")
+    screen = pygame.display.set_mode((screen_w, screen_h), 0 if WINDOW_SIZE else pygame.FULLSCREEN)
+    pygame.display.set_caption(f"Dames {backend.variant.name} - Adaptatif")
+    build_sprites()  # Atlas des pièces pour cette taille de case (au format de la fenêtre)
+    startup_mark("fenêtre")
 
     if not show_start_menu(screen):  # Affiche le menu de démarrage et quitte si l'utilisateur choisit "Quitter"
+        pygame.quit()  # Comme en fin de partie : main.py ne ferme plus Pygame
         return
 
     black_name, gray_name = get_player_names(screen)  # Saisie des noms des joueurs
     backend.reset_game_state()  # Réinitialise l'état du jeu dans le backend
 
     # Placement initial des pions sur le plateau.
-    # Les pions noirs sur les 4 premières lignes et gris sur les 4 dernières (cases alternées)
-    black_pieces = [[r, c, False] for r in range(4) for c in range(BOARD_SIZE) if (r + c) % 2 == 0]
-    gray_pieces = [[r, c, False] for r in range(6, 10) for c in range(BOARD_SIZE) if (r + c) % 2 == 0]
+    # Les pions noirs sur les premières lignes et gris sur les dernières (cases alternées)
+    black_pieces, gray_pieces = backend.initial_pieces()
 
     black_turn = True  # Le tour commence avec le joueur Noir
     black_caps = 0  # Compteur de captures pour Noir initialisé à zéro
     gray_caps = 0  # Compteur de captures pour Gris initialisé à zéro
     total_time = 0.0  # Temps total de la partie
     BLITZ_MODE = True  # Active le mode Blitz
-    BLITZ_TIME_LIMIT = 120  # Limite de temps (en secondes) pour chaque joueur en mode Blitz
+    BLITZ_TIME_LIMIT = backend.BLITZ_TIME_LIMIT  # Limite de temps (en secondes) pour chaque joueur en mode Blitz
     black_time = BLITZ_TIME_LIMIT if BLITZ_MODE else 0.0  # Temps restant pour Noir
     gray_time = BLITZ_TIME_LIMIT if BLITZ_MODE else 0.0  # Temps restant pour Gris
     last_tick = pygame.time.get_ticks()  # Stocke le temps de départ en millisecondes
 
     backend.update_position_history(black_pieces, gray_pieces, black_turn)  # Met à jour l'historique des positions
+    recorder = replay.ReplayRecorder(black_pieces, gray_pieces)  # Enregistrement des coups pour la relecture
+    moves = backend.MoveStack()  # Pile des coups pour l'annulation (U) et le rétablissement (R)
+    clocks_start = black_time + gray_time  # Pendules au bas de la pile (temps par coup des statistiques)
 
     continuingCap = False  # Indique si une capture en chaîne est en cours
     capturingPiece = None  # La pièce qui effectue une capture en chaîne
@@ -615,9 +861,12 @@ def run_game():
     drawProposal = None  # Proposition de nulle si les joueurs s'accordent
     running = True  # Condition pour maintenir la boucle principale du jeu
     clock = pygame.time.Clock()  # Horloge pour gérer le taux d'images (FPS)
+    showHints = False  # Affichage des conseils de l'analyse (touche H)
+    analyzer = None  # Processus d'analyse, démarré à la première demande
+    outcome = ("INTERROMPU", "abandon")  # (résultat, raison) pour les statistiques (gamestats)
 
     while running:  # Boucle principale du jeu
-        clock.tick(60)  # Limite la boucle à 60 FPS
+        clock.tick(FPS)  # Limite la boucle à 60 FPS
         now = pygame.time.get_ticks()  # Temps actuel en millisecondes
         dt = (now - last_tick) / 1000.0  # Temps écoulé depuis la dernière itération (en secondes)
         total_time += dt  # Incrémente le temps total de jeu
@@ -627,6 +876,7 @@ def run_game():
                 black_time -= dt  # Décrémente le temps restant pour noir
                 if black_time <= 0:  # Si le temps est épuisé pour noir
                     black_time = 0  # On fixe le temps à 0
+                    outcome = ("GRIS", "temps")
                     screen.fill((0, 0, 0))  # Remplit l'écran de noir
                     msg = font_title.render("Temps épuisé (Noir) -> Gris gagne", True, (255, 0, 0))
                     screen.blit(msg, (screen_w // 2 - msg.get_width() // 2,
@@ -639,6 +889,7 @@ def run_game():
                 gray_time -= dt  # Décrémente le temps restant pour gris
                 if gray_time <= 0:  # Si le temps est épuisé pour gris
                     gray_time = 0  # Fixe le temps à 0
+                    outcome = ("NOIR", "temps")
                     screen.fill((0, 0, 0))  # Remplit l'écran de noir
                     msg = font_title.render("Temps épuisé (Gris) -> Noir gagne", True, (255, 0, 0))
                     screen.blit(msg, (screen_w // 2 - msg.get_width() // 2,
@@ -661,25 +912,21 @@ def run_game():
         if endVal:
             screen.fill((220, 220, 220))  # Remplit l'écran d'une couleur claire
             draw_board(screen)  # Redessine le plateau
-            for b_p in black_pieces:  # Redessine les pions noirs
-                draw_pawn(screen, b_p, backend.PIECE_BLACK)
-            for g_p in gray_pieces:  # Redessine les pions gris
-                draw_pawn(screen, g_p, backend.PIECE_GRAY)
+            draw_pieces(screen, black_pieces, gray_pieces)  # Redessine les pions noirs et gris
             # Vérification si un joueur a gagné
             endVal = backend.check_winner(black_pieces, gray_pieces)
             if endVal:
+                outcome = (endVal, "matériel")
                 show_popup(screen, f"{endVal} a gagné !")
                 running = False
                 break
 
         # Vérification de la règle des 50 coups sans capture
         if backend.no_capture_turns >= 50:
+            outcome = ("NUL", "50 coups")
             screen.fill((220, 220, 220))
             draw_board(screen)
-            for b_p in black_pieces:
-                draw_pawn(screen, b_p, backend.PIECE_BLACK)
-            for g_p in gray_pieces:
-                draw_pawn(screen, g_p, backend.PIECE_GRAY)
+            draw_pieces(screen, black_pieces, gray_pieces)
             msg = font_menu.render("Nul (50 coups)", True, (255, 0, 0))
             screen.blit(msg, (screen_w // 2 - msg.get_width() // 2,
                               screen_h // 2 - msg.get_height() // 2))
@@ -690,12 +937,10 @@ def run_game():
 
         # Vérification de la règle de répétition des positions (nul par répétition)
         if backend.is_repeated_position(black_pieces, gray_pieces, black_turn):
+            outcome = ("NUL", "répétition")
             screen.fill((220, 220, 220))
             draw_board(screen)
-            for b_p in black_pieces:
-                draw_pawn(screen, b_p, backend.PIECE_BLACK)
-            for g_p in gray_pieces:
-                draw_pawn(screen, g_p, backend.PIECE_GRAY)
+            draw_pieces(screen, black_pieces, gray_pieces)
             msg = font_menu.render("Nul (répétition)", True, (255, 0, 0))
             screen.blit(msg, (screen_w // 2 - msg.get_width() // 2,
                               screen_h // 2 - msg.get_height() // 2))
@@ -713,11 +958,9 @@ def run_game():
             if not movesAll:
                 screen.fill((220, 220, 220))
                 draw_board(screen)
-                for b_p in black_pieces:
-                    draw_pawn(screen, b_p, backend.PIECE_BLACK)
-                for g_p in gray_pieces:
-                    draw_pawn(screen, g_p, backend.PIECE_GRAY)
+                draw_pieces(screen, black_pieces, gray_pieces)
                 whoWin = "NOIR" if colorNow == backend.PIECE_GRAY else "GRIS"
+                outcome = (whoWin, "blocage")
                 msg = font_title.render(f"{whoWin} gagne (blocage) !", True, (255, 0, 0))
                 screen.blit(msg, (screen_w // 2 - msg.get_width() // 2,
                                   screen_h // 2 - msg.get_height() // 2))
@@ -729,11 +972,12 @@ def run_game():
         # Redessine l'écran : fond, plateau et les pions
         screen.fill((220, 220, 220))
         draw_board(screen)
-        for bpiece in black_pieces:
-            draw_pawn(screen, bpiece, backend.PIECE_BLACK)
-        for gpiece in gray_pieces:
-            draw_pawn(screen, gpiece, backend.PIECE_GRAY)
-        highlight_pawn(screen, selectedPawn)
+        draw_pieces(screen, black_pieces, gray_pieces, selectedPawn)  # Pions et halo en un seul blits
+
+        # Conseil de l'analyse : envoi de la position (si elle a changé) et lecture non bloquante
+        if showHints and not continuingCap:
+            analyzer.submit(black_pieces, gray_pieces, colorNow)
+            draw_hint(screen, analyzer.poll())
 
         # Affiche la sidebar avec les informations et le message "Esc pour quitter"
         draw_sidebar(screen, black_name, gray_name,
@@ -753,7 +997,7 @@ def run_game():
             mustCapture = True
 
         # Gestion des événements (clavier, souris, etc.)
-        evs = pygame.event.get()
+        evs = get_events("partie")
         for ev in evs:
             if ev.type == pygame.QUIT:
                 running = False  # Quitte le jeu si la fenêtre est fermée
@@ -769,12 +1013,10 @@ def run_game():
                         drawProposal = who  # Première proposition : enregistre le joueur
                     else:
                         if drawProposal != who:
+                            outcome = ("NUL", "accord")
                             screen.fill((220, 220, 220))
                             draw_board(screen)
-                            for bpp2 in black_pieces:
-                                draw_pawn(screen, bpp2, backend.PIECE_BLACK)
-                            for gpp2 in gray_pieces:
-                                draw_pawn(screen, gpp2, backend.PIECE_GRAY)
+                            draw_pieces(screen, black_pieces, gray_pieces)
                             msg = font_menu.render("Nulle (accord mutuel)", True, (255, 0, 0))
                             screen.blit(msg, (screen_w // 2 - msg.get_width() // 2,
                                               screen_h // 2 - msg.get_height() // 2))
@@ -782,6 +1024,13 @@ def run_game():
                             pygame.time.wait(2000)
                             running = False
                             break
+                elif ev.key == pygame.K_h:
+                    # Touche 'h' : affiche ou masque le conseil de coup
+                    showHints = not showHints
+                    if showHints and analyzer is None:
+                        import analysis  # Import à la demande : multiprocessing et moteur hors du démarrage
+                        analyzer = analysis.AnalysisWorker()
+                        analyzer.start()
                 elif ev.key == pygame.K_s:
                     # Sauvegarde de la partie
                     backend.save_game_state("damestemp.json",
@@ -796,9 +1045,29 @@ def run_game():
                         (black_pieces, gray_pieces, black_turn,
                          black_caps, gray_caps,
                          total_time, black_time, gray_time) = loaded
+                        recorder = replay.ReplayRecorder(black_pieces, gray_pieces)  # La relecture repart d'ici
+                        moves = backend.MoveStack()  # Les coups d'avant le chargement ne s'annulent plus
+                        clocks_start = black_time + gray_time
+                        continuingCap, capturingPiece, selectedPawn, possibleMoves = False, None, None, []
                         print("Partie chargée !")
                     else:
                         print("Échec du chargement.")
+                elif ev.key in (pygame.K_u, pygame.K_r):
+                    # Touche 'u' : annule le dernier coup (ou la dernière prise d'une chaîne), 'r' : le rétablit
+                    step = moves.undo if ev.key == pygame.K_u else moves.redo
+                    entry, black_caps, gray_caps = step(black_pieces, gray_pieces, black_caps, gray_caps)
+                    if entry is not None:
+                        if ev.key == pygame.K_u:
+                            recorder.undo()
+                        else:
+                            recorder.record(entry["delta"], black_pieces, gray_pieces)
+                        if entry["turn_end"]:
+                            black_turn = not black_turn
+                        black_time, gray_time = entry["clocks"]  # Pendules au moment du coup
+                        continuingCap, capturingPiece, selectedPawn, possibleMoves = chain_state(
+                            moves, black_pieces, gray_pieces)
+                        drawProposal = None
+                        break  # Position changée : les coups obligatoires sont recalculés
             elif ev.type == pygame.MOUSEBUTTONDOWN and ev.button == 1:
                 mx, my = ev.pos  # Récupère la position du clic de la souris
                 cell = cell_from_mouse(mx, my)  # Convertit la position du clic en coordonnées de case
@@ -839,6 +1108,8 @@ def run_game():
                             c_ = backend.PIECE_BLACK if p_ in black_pieces else backend.PIECE_GRAY
                             black_caps, gray_caps = backend.apply_move(chosenMv, black_pieces, gray_pieces,
                                                                        c_, black_caps, gray_caps)
+                            recorder.record(backend.last_delta, black_pieces, gray_pieces)
+                            moves.push(backend.last_delta, (black_time, gray_time))
                             if chosenMv['type'] == 'capture':
                                 seq_ = backend.find_all_possible_moves(c_, black_pieces, gray_pieces)
                                 seq_ = [xx for xx in seq_ if xx['piece'] == p_ and xx['type'] == 'capture']
@@ -855,14 +1126,14 @@ def run_game():
                                     continuingCap = False
                                     capturingPiece = None
                                     black_turn = not black_turn
-                                    backend.update_position_history(black_pieces, gray_pieces, black_turn)
+                                    moves.end_turn(black_pieces, gray_pieces, black_turn)
                                     selectedPawn = None
                                     possibleMoves = []
                             else:
                                 continuingCap = False
                                 capturingPiece = None
                                 black_turn = not black_turn
-                                backend.update_position_history(black_pieces, gray_pieces, black_turn)
+                                moves.end_turn(black_pieces, gray_pieces, black_turn)
                                 selectedPawn = None
                                 possibleMoves = []
                         else:
@@ -886,6 +1157,11 @@ def run_game():
                                             selectedPawn = (arr2, idx2)
                                             possibleMoves = newAll
 
+    if analyzer is not None:
+        analyzer.stop()  # Arrête le processus d'analyse
+    recorder.save(REPLAY_FILE)  # Relecture : python replay.py derniere_partie.replay.json
+    save_game_stats(outcome, moves, clocks_start, black_caps, gray_caps, black_time, gray_time, total_time)
+
     # Fin de la partie : affiche le menu de fin avec le résumé des statistiques
     show_end_menu(screen,
                   black_name, gray_name,
@@ -0,0 +1,259 @@
+"""
+Nom : Gamestats.py
+Auteurs : Dylan, Samuel
+Date 11.11.2024
+"""
+###############################################################################
+# Statistiques de toutes les parties jouées, stockées par colonnes sur disque.
+#
+# - Une ligne par partie terminée : longueur, captures de chaque camp, résultat,
+#   raison de la fin, temps utilisé par chaque camp, durée, date
+# - Temps de chaque coup dans une colonne à part (ply_times), découpée grâce à 'length'
+# - Blocs (chunk_XXXXX) de CHUNK_ROWS parties, un fichier NumPy .npy par colonne
+# - Agrégation en flux : un bloc à la fois (mmap), mémoire indépendante du nombre de parties
+# - Usage : python gamestats.py [dossier]
+###############################################################################
+
+import os  # Dossiers des blocs, remplacement atomique des fichiers
+import sys  # Lecture des arguments de la ligne de commande
+import time  # Date de la partie
+
+import numpy as np  # Colonnes et calculs vectorisés
+
+STATS_DIR = "statistiques"  # Dossier du stockage (relatif au dossier courant)
+CHUNK_ROWS = 65536  # Parties par bloc
+MAX_PLIES = 512  # Coups suivis dans les moyennes par numéro de coup (au-delà : regroupés)
+
+# Colonnes d'une partie et leur type ; 'length' est écrite en dernier et fait foi
+COLUMNS = {
+    "date": "f8",  # Horodatage de fin (secondes depuis l'époque)
+    "black_captures": "i2",
+    "gray_captures": "i2",
+    "result": "i1",  # Indice dans RESULTS
+    "reason": "i1",  # Indice dans REASONS
+    "black_time": "f4",  # Temps utilisé par les noirs (secondes)
+    "gray_time": "f4",  # Temps utilisé par les gris
+    "total_time": "f4",  # Durée de la partie
+    "length": "i4",  # Nombre de coups (et de valeurs dans ply_times)
+}
+PLY_TIMES = "ply_times"  # Colonne des temps par coup (float32), toutes les parties à la suite
+RESULTS = ("NOIR", "GRIS", "NUL", "INTERROMPU")
+REASONS = ("matériel", "blocage", "temps", "50 coups", "répétition", "accord", "abandon")
+
+
+def chunk_name(index):
+    return f"chunk_{index:05d}"
+
+
+def save_array(path, array):
+    """
+    Écrit un .npy via un fichier temporaire : un bloc n'est jamais lu à moitié écrit.
+    """
+    tmp = path + ".tmp.npy"
+    np.save(tmp, array)
+    os.replace(tmp, path)
+
+
+class StatsStore:
+    """
+    Stockage par colonnes : ajout de parties à la fin et lecture bloc par bloc.
+    """
+
+    def __init__(self, directory=STATS_DIR, chunk_rows=CHUNK_ROWS):
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        os.makedirs(directory, exist_ok=True)
+
+    def chunks(self):
+        """
+        Dossiers des blocs, dans l'ordre d'écriture.
+        """
+        return sorted(os.path.join(self.directory, d) for d in os.listdir(self.directory)
+                      if d.startswith("chunk_") and os.path.isdir(os.path.join(self.directory, d)))
+
+    def read_chunk(self, path):
+        """
+        Colonnes d'un bloc en lecture seule (projection mémoire) ; les colonnes sont
+        coupées au nombre de lignes de 'length' (écriture interrompue entre deux colonnes).
+        """
+        length = np.load(os.path.join(path, "length.npy"), mmap_mode="r")
+        n = len(length)
+        cols = {"length": length}
+        for name in COLUMNS:
+            if name != "length":
+                cols[name] = np.load(os.path.join(path, name + ".npy"), mmap_mode="r")[:n]
+        cols[PLY_TIMES] = np.load(os.path.join(path, PLY_TIMES + ".npy"), mmap_mode="r")
+        return cols
+
+    def append(self, rows):
+        """
+        Ajoute des parties (dictionnaires avec les clés de COLUMNS et une liste 'ply_times').
+        Seul le dernier bloc (non plein) est réécrit ; les blocs pleins ne sont plus modifiés.
+        """
+        rows = list(rows)
+        while rows:
+            chunks = self.chunks()
+            path = chunks[-1] if chunks else None
+            current = {}
+            if path is not None:
+                current = {k: np.asarray(v) for k, v in self.read_chunk(path).items()}
+                if len(current["length"]) >= self.chunk_rows:
+                    path, current = None, {}
+            if path is None:
+                path = os.path.join(self.directory, chunk_name(len(chunks)))
+                os.makedirs(path)
+            room = self.chunk_rows - (len(current["length"]) if current else 0)
+            batch, rows = rows[:room], rows[room:]
+            times = [np.asarray(r["ply_times"], dtype="f4") for r in batch]
+            if current:
+                times.insert(0, current[PLY_TIMES][:int(current["length"].sum())])
+            save_array(os.path.join(path, PLY_TIMES + ".npy"), np.concatenate(times))
+            for name, dtype in COLUMNS.items():  # 'length' en dernier : le bloc devient valide d'un coup
+                new = np.array([r[name] for r in batch], dtype=dtype)
+                if current:
+                    new = np.concatenate([current[name], new])
+                save_array(os.path.join(path, name + ".npy"), new)
+
+
+def game_row(result, reason, black_captures, gray_captures, black_time, gray_time, total_time, ply_times):
+    """
+    Ligne d'une partie pour StatsStore.append (résultat et raison donnés par leur nom).
+    """
+    return {
+        "date": time.time(),
+        "black_captures": black_captures,
+        "gray_captures": gray_captures,
+        "result": RESULTS.index(result),
+        "reason": REASONS.index(reason),
+        "black_time": black_time,
+        "gray_time": gray_time,
+        "total_time": total_time,
+        "length": len(ply_times),
+        "ply_times": ply_times,
+    }
+
+
+def record_game(*args, directory=STATS_DIR):
+    """
+    Ajoute une partie terminée au stockage (appelé à la fin de run_game).
+    """
+    StatsStore(directory).append([game_row(*args)])
+
+
+class Aggregator:
+    """
+    Statistiques calculées en flux : sommes, extrêmes et histogrammes mis à jour bloc par bloc.
+    Deux agrégats peuvent être fusionnés (merge) pour paralléliser le calcul.
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.results = np.zeros(len(RESULTS), dtype="i8")
+        self.reasons = np.zeros(len(REASONS), dtype="i8")
+        self.lengths = np.zeros(MAX_PLIES + 1, dtype="i8")  # Histogramme des longueurs (dernière case : au-delà)
+        self.sums = {}  # colonne -> somme
+        self.squares = {}  # colonne -> somme des carrés (écart type)
+        self.ply_sum = np.zeros(MAX_PLIES + 1)  # Temps cumulé par numéro de coup
+        self.ply_count = np.zeros(MAX_PLIES + 1, dtype="i8")
+        self.ply_max = 0.0
+
+    def update(self, cols):
+        """
+        Ajoute un bloc (colonnes de StatsStore.read_chunk).
+        """
+        length = np.asarray(cols["length"], dtype="i8")
+        if not len(length):
+            return
+        self.games += len(length)
+        self.results += np.bincount(cols["result"], minlength=len(RESULTS))[:len(RESULTS)]
+        self.reasons += np.bincount(cols["reason"], minlength=len(REASONS))[:len(REASONS)]
+        self.lengths += np.bincount(np.minimum(length, MAX_PLIES), minlength=MAX_PLIES + 1)
+        for name in ("length", "black_captures", "gray_captures", "black_time", "gray_time", "total_time"):
+            v = np.asarray(cols[name], dtype="f8")
+            self.sums[name] = self.sums.get(name, 0.0) + v.sum()
+            self.squares[name] = self.squares.get(name, 0.0) + (v * v).sum()
+        times = np.asarray(cols[PLY_TIMES][:length.sum()], dtype="f8")
+        if len(times):
+            # Numéro de coup de chaque valeur : position dans la partie (0, 1, ... length-1)
+            starts = np.repeat(np.cumsum(length) - length, length)
+            ply = np.minimum(np.arange(len(times)) - starts, MAX_PLIES)
+            self.ply_sum += np.bincount(ply, weights=times, minlength=MAX_PLIES + 1)
+            self.ply_count += np.bincount(ply, minlength=MAX_PLIES + 1)
+            self.ply_max = max(self.ply_max, float(times.max()))
+
+    def merge(self, other):
+        self.games += other.games
+        self.results += other.results
+        self.reasons += other.reasons
+        self.lengths += other.lengths
+        for name, v in other.sums.items():
+            self.sums[name] = self.sums.get(name, 0.0) + v
+            self.squares[name] = self.squares.get(name, 0.0) + other.squares[name]
+        self.ply_sum += other.ply_sum
+        self.ply_count += other.ply_count
+        self.ply_max = max(self.ply_max, other.ply_max)
+        return self
+
+    def mean(self, name):
+        return self.sums[name] / self.games if self.games else 0.0
+
+    def std(self, name):
+        if not self.games:
+            return 0.0
+        m = self.mean(name)
+        return max(0.0, self.squares[name] / self.games - m * m) ** 0.5
+
+    def length_percentile(self, p):
+        """
+        Longueur en dessous de laquelle se trouvent p % des parties (histogramme).
+        """
+        cum = np.cumsum(self.lengths)
+        return int(np.searchsorted(cum, p / 100 * cum[-1])) if self.games else 0
+
+    def ply_means(self):
+        """
+        Temps moyen de réflexion par numéro de coup (NaN si aucun coup à ce numéro).
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.ply_sum / self.ply_count
+
+    def report(self):
+        lines = [f"Parties : {self.games}"]
+        if not self.games:
+            return "\n".join(lines)
+        lines.append("Résultats : " + ", ".join(f"{name} {n} ({n / self.games:.1%})"
+                                                 for name, n in zip(RESULTS, self.results) if n))
+        lines.append("Fins : " + ", ".join(f"{name} {n}" for name, n in zip(REASONS, self.reasons) if n))
+        lines.append(f"Longueur : moyenne {self.mean('length'):.1f} ± {self.std('length'):.1f} coups, "
+                     f"médiane {self.length_percentile(50)}, p90 {self.length_percentile(90)}")
+        lines.append(f"Captures : noirs {self.mean('black_captures'):.2f}, gris {self.mean('gray_captures'):.2f} "
+                     f"par partie")
+        lines.append(f"Temps utilisé : noirs {self.mean('black_time'):.1f} s, gris {self.mean('gray_time'):.1f} s, "
+                     f"durée {self.mean('total_time'):.1f} s")
+        means = self.ply_means()
+        total_plies = int(self.ply_count.sum())
+        if total_plies:
+            lines.append(f"Temps par coup : moyenne {self.ply_sum.sum() / total_plies:.2f} s, "
+                         f"max {self.ply_max:.2f} s")
+            shown = [f"{i + 1}:{means[i]:.2f}" for i in (0, 9, 19, 39, 79) if self.ply_count[i]]
+            lines.append("Moyenne au coup n (s) : " + " ".join(shown))
+        return "\n".join(lines)
+
+
+def aggregate(directory=STATS_DIR):
+    """
+    Parcourt tous les blocs du stockage et retourne l'agrégat.
+    """
+    store = StatsStore(directory)
+    agg = Aggregator()
+    for path in store.chunks():
+        agg.update(store.read_chunk(path))
+    return agg
+
+
+if __name__ == "__main__":
+    folder = sys.argv[1] if len(sys.argv) > 1 else STATS_DIR
+    start = time.perf_counter()
+    result = aggregate(folder)
+    print(result.report())
+    print(f"({time.perf_counter() - start:.2f} s)")
@@ -0,0 +1,410 @@
+"""
+Nom : Hub.py
+Auteurs : Dylan, Samuel
+Date 11.11.2024
+"""
+###############################################################################
+# Protocole texte (entrée / sortie standard) pour les matchs entre moteurs,
+# dans le style du protocole Hub des moteurs de dames.
+#
+# - Mode moteur : notre recherche (engine + timecontrol) répond aux commandes
+# - Mode match : lance deux moteurs en sous-processus, leur envoie positions et pendules,
+#   arbitre la partie et mesure le coût du protocole par coup
+# - Usage : python hub.py engine
+#           python hub.py match "cmd moteur 1" "cmd moteur 2" [parties] [cadence_s] [--variant nom]
+#           python hub.py check (numérotation des cases)
+#
+# Cases foncées numérotées de 1 à N, ligne par ligne depuis la ligne 0, de droite à gauche
+# (N = 50 en 10x10, 32 en 8x8) : numérotation standard Hub / DXP, 1 voisine de 6 et 7.
+# Position : trait ("B" noirs, "W" gris) puis N caractères
+#   b / B : pion / dame noirs, w / W : pion / dame gris, e : case vide
+# Coup : "départ-arrivée" pour un déplacement,
+#   "départxarrivéexprise1xprise2..." pour une capture (cases prises dans l'ordre)
+#
+# Commandes de l'arbitre : hub, init, set-param name=variant value=<nom de variants.py>,
+#   new-game, pos pos=..., level time=S | move-time=S, time left=S, go think, ping, stop, quit
+# Réponses du moteur : id name=... / wait, ready, info depth=... score=... nodes=... time=...,
+#   done move=..., pong, error message=... (commande mal formée, ignorée)
+###############################################################################
+
+import shlex  # Découpage des commandes des moteurs
+import subprocess  # Moteurs externes
+import sys  # Entrée / sortie standard, arguments
+import time  # Pendules et mesures
+
+import backend  # Règles du jeu
+import engine  # Recherche alpha-bêta
+import timecontrol  # Budget par coup sous pendule
+import validation  # Index des coups légaux
+import variants  # Choix de la variante (set-param, --variant)
+
+ENGINE_NAME = "Dames 10x10"  # Nom annoncé par notre moteur
+ENGINE_AUTHOR = "Dylan, Samuel"
+MAX_PLIES = 300  # Limite de coups par partie en match
+
+
+def square_number(row, col):
+    """
+    Numéro (1 à 50 en 10x10) de la case foncée (row, col) ; taille / 2 cases foncées par ligne,
+    numérotées depuis la droite comme sur le damier standard (1 voisine de 6 et 7, coins 5 et 46).
+    """
+    size = backend.variant.size
+    return row * (size // 2) + (size - 1 - col) // 2 + 1
+
+
+def square_coords(number):
+    """
+    Inverse de square_number : (row, col) de la case numéro 'number'.
+    """
+    size = backend.variant.size
+    row, k = divmod(number - 1, size // 2)
+    return row, size - 1 - (2 * k + 1 - row % 2)  # Cases foncées : row + col pair
+
+
+def check_numbering():
+    """
+    Vérifie la numérotation standard en 10x10 : 1 voisine de 6 et 7, 5 voisine de 10 seulement,
+    46 voisine de 41 seulement, et square_coords inverse de square_number.
+    Retourne True si tout est correct.
+    """
+    previous = backend.variant
+    backend.set_variant(backend.DEFAULT_VARIANT)
+    try:
+        def neighbours(number):
+            r, c = square_coords(number)
+            return sorted(square_number(r + dr, c + dc) for dr, dc in backend.DIRECTIONS
+                          if backend.is_in_bounds(r + dr, c + dc))
+        expected = {1: [6, 7], 5: [10], 46: [41]}
+        ok = all(neighbours(n) == adj for n, adj in expected.items())
+        ok &= all(square_number(*square_coords(n)) == n for n in range(1, 51))
+        ok &= sorted(square_coords(n) for n in range(1, 51)) == sorted(backend.variant.coords[sq]
+                                                                    for sq in backend.variant.dark)
+        print(f"Numérotation : {'ok' if ok else 'ERREUR'} "
+              f"(voisines de 1, 5, 46 : {[neighbours(n) for n in expected]})")
+        return ok
+    finally:
+        backend.set_variant(previous)
+
+
+def encode_position(black_pieces, gray_pieces, color):
+    """
+    Position au format du protocole : trait puis une lettre par case foncée.
+    """
+    board = ["e"] * (backend.variant.squares // 2)
+    for r, c, isQ in black_pieces:
+        board[square_number(r, c) - 1] = "B" if isQ else "b"
+    for r, c, isQ in gray_pieces:
+        board[square_number(r, c) - 1] = "W" if isQ else "w"
+    return ("B" if color == backend.PIECE_BLACK else "W") + "".join(board)
+
+
+def decode_position(text):
+    """
+    Inverse de encode_position : retourne (black_pieces, gray_pieces, couleur au trait).
+    Lève ValueError si la position est mal formée.
+    """
+    n = backend.variant.squares // 2  # Cases foncées
+    if len(text) != n + 1 or text[0] not in "BW" or any(ch not in "bBwWe" for ch in text[1:]):
+        raise ValueError(f"position invalide : {text!r}")
+    color = backend.PIECE_BLACK if text[0] == "B" else backend.PIECE_GRAY
+    black, gray = [], []
+    for i, ch in enumerate(text[1:]):
+        r, c = square_coords(i + 1)
+        if ch in "bB":
+            black.append([r, c, ch == "B"])
+        elif ch in "wW":
+            gray.append([r, c, ch == "W"])
+    return black, gray, color
+
+
+def encode_move(move):
+    """
+    Notation d'un coup du backend (piece, dest, path).
+    """
+    src = square_number(move.piece[0], move.piece[1])
+    dest = square_number(move.dest[0], move.dest[1])
+    if move.type != 'capture':
+        return f"{src}-{dest}"
+    return "x".join(str(n) for n in [src, dest] + [square_number(r, c) for r, c in move.path])
+
+
+def find_move(text, index):
+    """
+    Coup légal correspondant à la notation, ou None (coup illégal ou mal formé).
+    'index' : validation.MoveIndex de la position, construit une fois par position ;
+    un numéro hors du plateau est refusé par l'index (validation.square) ;
+    les cases prises sont comparées sans tenir compte de l'ordre.
+    """
+    try:
+        if "x" in text:
+            nums = [int(x) for x in text.split("x")]
+        else:
+            nums = [int(x) for x in text.split("-")]
+            if len(nums) != 2:
+                return None
+    except ValueError:
+        return None
+    if len(nums) < 2:
+        return None
+    return index.lookup(square_coords(nums[0]), square_coords(nums[1]), [square_coords(n) for n in nums[2:]])
+
+
+def parse_args(line):
+    """
+    Découpe une commande "nom clé=valeur ..." en (nom, dictionnaire des arguments).
+    """
+    parts = shlex.split(line)
+    if not parts:
+        return "", {}
+    args = {}
+    for p in parts[1:]:
+        key, _, value = p.partition("=")
+        args[key] = value
+    return parts[0], args
+
+
+class HubEngine:
+    """
+    Notre moteur derrière le protocole : lit les commandes, répond sur la sortie.
+    """
+
+    def __init__(self, inp=sys.stdin, out=sys.stdout):
+        self.inp, self.out = inp, out
+        self.searcher = engine.Searcher()
+        self.black_pieces, self.gray_pieces = backend.initial_pieces()
+        self.color = backend.PIECE_BLACK
+        self.time_left = float(backend.BLITZ_TIME_LIMIT)  # Temps restant (mis à jour par "time left=")
+        self.move_time = None  # Temps fixe par coup (level move-time=)
+
+    def send(self, line):
+        self.out.write(line + "\n")
+        self.out.flush()  # Sans attente : l'arbitre mesure la latence
+
+    def think(self):
+        """
+        Cherche un coup avec la pendule courante et répond "info" puis "done".
+        """
+        start = time.perf_counter()
+        if self.move_time is not None:
+            remaining = self.move_time * timecontrol.MAX_MOVES_TO_GO  # Budget ≈ move-time
+        else:
+            remaining = self.time_left
+        mv, score, _, depth = timecontrol.timed_search(self.searcher, self.black_pieces, self.gray_pieces,
+                                                       self.color, remaining)
+        used = time.perf_counter() - start
+        self.send(f"info depth={depth} score={score} nodes={self.searcher.nodes} time={used:.4f}")
+        self.send(f"done move={encode_move(mv) if mv is not None else 'none'}")
+
+    def run(self):
+        for line in self.inp:
+            try:
+                if not self.handle(line):
+                    break
+            except (KeyError, ValueError) as e:  # Commande mal formée : le moteur continue
+                detail = f"argument manquant : {e.args[0]}" if isinstance(e, KeyError) else str(e)
+                self.send('error message="{}"'.format(detail.replace('"', "'")))
+
+    def handle(self, line):
+        """
+        Exécute une commande ; retourne False pour "quit".
+        Lève KeyError ou ValueError si la commande est mal formée.
+        """
+        cmd, args = parse_args(line.strip())
+        if cmd == "hub":
+            self.send(f'id name="{ENGINE_NAME}" author="{ENGINE_AUTHOR}"')
+            self.send("wait")
+        elif cmd == "init":
+            self.send("ready")
+        elif cmd == "set-param":
+            if args["name"] == "variant":  # Les autres paramètres ne nous concernent pas
+                backend.set_variant(variants.get_variant(args["value"]))
+                self.black_pieces, self.gray_pieces = backend.initial_pieces()
+                self.color = backend.PIECE_BLACK
+                self.searcher.new_game()  # Clés de coups et de positions propres au plateau
+        elif cmd == "new-game":
+            self.searcher.new_game()
+        elif cmd == "pos":
+            self.black_pieces, self.gray_pieces, self.color = decode_position(args["pos"])
+        elif cmd == "level":
+            if "move-time" in args:
+                self.move_time = float(args["move-time"])
+            if "time" in args:
+                self.move_time = None
+                self.time_left = float(args["time"])
+        elif cmd == "time":
+            self.time_left = float(args.get("left", self.time_left))
+        elif cmd == "go":
+            self.think()
+        elif cmd == "ping":
+            self.send("pong")
+        elif cmd == "quit":
+            return False
+        # "stop" : la recherche est synchrone, rien à interrompre
+        return True
+
+
+class EngineProcess:
+    """
+    Moteur externe lancé en sous-processus (côté arbitre).
+    """
+
+    def __init__(self, command):
+        self.proc = subprocess.Popen(shlex.split(command), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     text=True, bufsize=1)  # Tampon par ligne : envoi immédiat
+        self.name = command
+        self.send("hub")
+        for line in self.lines_until("wait"):
+            cmd, args = parse_args(line)
+            if cmd == "id" and "name" in args:
+                self.name = args["name"]
+        self.send("init")
+        list(self.lines_until("ready"))
+        if backend.variant is not variants.DEFAULT:  # En 10x10, rien à envoyer (moteurs sans set-param)
+            self.send(f"set-param name=variant value={backend.variant.name}")
+
+    def send(self, line):
+        self.proc.stdin.write(line + "\n")
+
+    def lines_until(self, last):
+        """
+        Lit les lignes jusqu'à celle qui commence par 'last' (comprise).
+        """
+        while True:
+            line = self.proc.stdout.readline()
+            if not line:
+                raise EOFError(f"Le moteur {self.name} s'est arrêté")
+            line = line.strip()
+            yield line
+            if line.split(" ", 1)[0] == last:
+                return
+
+    def ping(self):
+        """
+        Aller-retour ping / pong en secondes (coût minimal du protocole).
+        """
+        t0 = time.perf_counter()
+        self.send("ping")
+        list(self.lines_until("pong"))
+        return time.perf_counter() - t0
+
+    def play(self, black_pieces, gray_pieces, color, time_left):
+        """
+        Demande un coup. Retourne (notation, temps mesuré par l'arbitre, temps annoncé par le moteur).
+        """
+        self.send(f"pos pos={encode_position(black_pieces, gray_pieces, color)}")
+        self.send(f"time left={time_left:.3f}")
+        t0 = time.perf_counter()
+        self.send("go think")
+        reported, move = None, None
+        for line in self.lines_until("done"):
+            cmd, args = parse_args(line)
+            if cmd == "info" and "time" in args:
+                reported = float(args["time"])
+            elif cmd == "done":
+                move = args.get("move")
+        return move, time.perf_counter() - t0, reported
+
+    def close(self):
+        try:
+            self.send("quit")
+            self.proc.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        self.proc.wait(timeout=5)
+
+
+def play_match_game(engines, time_limit):
+    """
+    Une partie : engines[0] a les noirs. Retourne (résultat, raison, surcoûts par coup en secondes).
+    """
+    black, gray = backend.initial_pieces()
+    color = backend.PIECE_BLACK
+    clocks = {backend.PIECE_BLACK: float(time_limit), backend.PIECE_GRAY: float(time_limit)}
+    players = {backend.PIECE_BLACK: engines[0], backend.PIECE_GRAY: engines[1]}
+    other = {"NOIR": "GRIS", "GRIS": "NOIR"}
+    history, no_capture, overheads = {}, 0, []
+    for eng in engines:
+        eng.send("new-game")
+    for _ in range(MAX_PLIES):
+        winner = backend.check_winner(black, gray)
+        if winner:
+            return winner, "matériel", overheads
+        side = "NOIR" if color == backend.PIECE_BLACK else "GRIS"
+        index = validation.MoveIndex(color, black, gray)  # Une génération de coups par position
+        if not index:
+            return other[side], "blocage", overheads
+        text, wall, reported = players[color].play(black, gray, color, clocks[color])
+        clocks[color] -= wall
+        if reported is not None:
+            overheads.append(max(0.0, wall - reported))  # Temps hors recherche : protocole, processus
+        if clocks[color] <= 0:
+            return other[side], "temps", overheads
+        mv = find_move(text or "", index)
+        if mv is None:
+            return other[side], f"coup illégal ({text})", overheads
+        delta = backend.move_to_delta(mv, black, gray, color, no_capture)
+        backend.apply_delta_to_pieces(delta, black, gray)
+        no_capture = delta["no_capture_turns"][1]
+        color = engine.opponent(color)
+        if backend.is_irreversible(delta, black, gray):
+            history.clear()  # Capture ou pion avancé : les positions antérieures ne reviendront plus
+        h = delta["hash"]
+        history[h] = history.get(h, 0) + 1
+        if no_capture >= 50:
+            return "NUL", "50 coups", overheads
+        if history[h] >= 3:
+            return "NUL", "répétition", overheads
+    return "NUL", "limite de coups", overheads
+
+
+def run_match(cmd1, cmd2, games=2, time_limit=10.0):
+    """
+    Match entre deux moteurs (couleurs alternées). Affiche le score, la latence ping
+    et le surcoût moyen / maximal du protocole par coup.
+    """
+    engines = [EngineProcess(cmd1), EngineProcess(cmd2)]
+    try:
+        pings = [min(e.ping() for _ in range(20)) for e in engines]
+        points = [0.0, 0.0]
+        all_overheads = []
+        for g in range(games):
+            order = (0, 1) if g % 2 == 0 else (1, 0)  # Indices des moteurs (noirs, gris)
+            res, reason, overheads = play_match_game([engines[order[0]], engines[order[1]]], time_limit)
+            all_overheads += overheads
+            if res == "NUL":
+                points[0] += 0.5
+                points[1] += 0.5
+            else:
+                points[order[0] if res == "NOIR" else order[1]] += 1.0
+            print(f"Partie {g + 1} : noirs {engines[order[0]].name} - gris {engines[order[1]].name} "
+                  f"-> {res} ({reason})")
+        print(f"Score : {engines[0].name} {points[0]} - {points[1]} {engines[1].name}")
+        print(f"Ping (aller-retour) : {pings[0] * 1e6:.0f} µs / {pings[1] * 1e6:.0f} µs")
+        if all_overheads:
+            ov = sorted(all_overheads)
+            print(f"Surcoût par coup ({len(ov)} coups) : moyenne {sum(ov) / len(ov) * 1000:.2f} ms | "
+                  f"médiane {ov[len(ov) // 2] * 1000:.2f} ms | max {ov[-1] * 1000:.2f} ms")
+        return points
+    finally:
+        for e in engines:
+            e.close()
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    if "--variant" in argv:
+        i = argv.index("--variant")
+        backend.set_variant(variants.get_variant(argv[i + 1]))  # Arbitre et moteurs (set-param)
+        del argv[i:i + 2]
+    if len(argv) >= 1 and argv[0] == "engine":
+        HubEngine().run()
+    elif len(argv) >= 1 and argv[0] == "check":
+        sys.exit(0 if check_numbering() else 1)
+    elif len(argv) >= 3 and argv[0] == "match":
+        n_games = int(argv[3]) if len(argv) > 3 else 2
+        tc = float(argv[4]) if len(argv) > 4 else 10.0
+        run_match(argv[1], argv[2], n_games, tc)
+    else:
+        print('Usage : python hub.py engine\n'
+              '        python hub.py match "cmd moteur 1" "cmd moteur 2" [parties] [cadence_s] [--variant nom]\n'
+              '        python hub.py check')
@@ -0,0 +1,123 @@
+"""
+Nom : Loadtest.py
+Auteurs : Dylan, Samuel
+Date 11.11.2024
+"""
+###############################################################################
+# Client de test de charge pour server.py (localhost).
+#
+# - Ouvre de nombreuses connexions inactives (spectateurs qui ne font rien)
+# - Fait jouer des parties actives : chaque joueur reconstruit le plateau
+#   à partir des différences reçues et joue un coup légal au hasard
+# - Mesure la latence coup envoyé -> différence reçue
+# - Usage : python loadtest.py [--idle N] [--games M] [--port P]
+#   (pour des milliers de connexions, augmenter la limite : ulimit -n 65536)
+###############################################################################
+
+import argparse  # Lecture des options
+import asyncio  # Connexions asynchrones
+import json  # Décodage des messages
+import random  # Choix des coups
+import time  # Mesure des latences
+
+import backend  # Génération des coups légaux côté client
+import variants  # Variante annoncée par le serveur
+
+latencies = []  # Latences mesurées (secondes)
+
+
+async def idle_client(host, port, game_id, stop):
+    """
+    Connexion inactive : rejoint une partie comme spectateur et attend.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write((json.dumps({"op": "join", "game": game_id, "watch": True}) + "\n").encode())
+    await stop.wait()
+    writer.close()
+
+
+async def player(host, port, game_id, rng, max_plies, results):
+    """
+    Joueur automatique : suit la partie par différences et joue au hasard.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write((json.dumps({"op": "join", "game": game_id}) + "\n").encode())
+    black_pieces, gray_pieces, role, sent_at = [], [], None, None
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        msg = json.loads(line)
+        ev = msg["ev"]
+        if ev == "joined":
+            role = msg["role"]
+            if "variant" in msg["state"]:  # Mêmes règles que le serveur
+                backend.set_variant(variants.get_variant(msg["state"]["variant"]))
+            black_pieces = msg["state"]["black_pieces"]
+            gray_pieces = msg["state"]["gray_pieces"]
+            continue
+        if ev == "diff":
+            backend.apply_delta_to_pieces(backend.decode_delta(msg["d"]), black_pieces, gray_pieces)
+            if sent_at is not None:
+                latencies.append(time.perf_counter() - sent_at)
+                sent_at = None
+            if msg["ply"] >= max_plies:
+                break
+        elif ev == "end":
+            results[game_id] = msg["result"]  # Reçu par les deux joueurs : une entrée par partie
+            break
+        elif ev != "start":
+            continue
+        if msg["turn"] == role:  # À nous de jouer
+            color = backend.PIECE_BLACK if role == "black" else backend.PIECE_GRAY
+            moves = backend.find_all_possible_moves(color, black_pieces, gray_pieces)
+            if not moves:
+                break
+            mv = rng.choice(moves)
+            writer.write((json.dumps({"op": "move", "from": mv.piece[:2], "to": mv.dest,
+                                      "path": [list(sq) for sq in mv.path]}) + "\n").encode())
+            sent_at = time.perf_counter()
+    writer.close()
+
+
+async def run(host, port, n_idle, n_games, max_plies):
+    """
+    Lance les connexions inactives puis les parties actives, et affiche les mesures.
+    """
+    stop = asyncio.Event()
+    t0 = time.perf_counter()
+    idle = [asyncio.create_task(idle_client(host, port, f"idle-{i % 500}", stop)) for i in range(n_idle)]
+    await asyncio.sleep(0)
+    results = {}  # Résultat par partie
+    players = []
+    for g in range(n_games):
+        rng = random.Random(g)
+        players.append(asyncio.create_task(player(host, port, f"game-{g}", rng, max_plies, results)))
+        await asyncio.sleep(0.001)  # Les noirs rejoignent avant les gris
+        players.append(asyncio.create_task(player(host, port, f"game-{g}", rng, max_plies, results)))
+    await asyncio.gather(*players)
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await asyncio.gather(*idle, return_exceptions=True)
+
+    print(f"Connexions inactives : {n_idle} | parties : {n_games} | durée : {elapsed:.2f} s")
+    counts = {}
+    for res in results.values():
+        counts[res] = counts.get(res, 0) + 1
+    print(f"Résultats : {counts}")
+    if latencies:
+        latencies.sort()
+        n = len(latencies)
+        print(f"Coups : {n} ({n / elapsed:.0f}/s) | latence p50 : {latencies[n // 2] * 1000:.2f} ms | "
+              f"p99 : {latencies[min(n - 1, int(n * 0.99))] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Test de charge du serveur de dames")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--idle", type=int, default=1000, help="connexions inactives")
+    parser.add_argument("--games", type=int, default=50, help="parties actives")
+    parser.add_argument("--plies", type=int, default=200, help="coups maximum par partie")
+    args = parser.parse_args()
+    asyncio.run(run(args.host, args.port, args.idle, args.games, args.plies))
@@ -5,13 +5,25 @@ Date 11.11.2024
 """
 ###############################################################################
 # Point d'entrée pour lancer le jeu de dames.
-# - Import de frontend (interface)
+# - Import de frontend (interface) au lancement seulement : importer main ne charge pas pygame
 # - Appelle frontend.run_game()
+# - Usage : python main.py [--variant 8x8|10x10|12x12|...-court] (10x10 par défaut, voir variants.py)
+# - Le temps de démarrage (import compris) est affiché à la première image du menu
 ###############################################################################
 
-import pygame  # On importe pygame pour gérer l'affichage et les événements
-import frontend  # On importe le frontend qui gère l'interface graphique
+import sys  # Lecture des arguments de la ligne de commande
+import time  # Mesure du temps de démarrage
 
 if __name__ == "__main__":  # Si ce fichier est exécuté directement (et non importé)
+    start = time.perf_counter()  # Avant l'import de pygame
+    if "--variant" in sys.argv:  # Variante choisie avant le placement des pièces
+        import backend
+        import variants
+        try:
+            backend.set_variant(variants.get_variant(sys.argv[sys.argv.index("--variant") + 1]))
+        except (IndexError, ValueError) as e:
+            sys.exit(f"Usage : python main.py [--variant nom] ({e})")
+    import frontend  # On importe le frontend qui gère l'interface graphique (et pygame)
+    frontend.STARTUP_T0 = start
     frontend.run_game()  # On lance le jeu en appelant la boucle principale du frontend
-    pygame.quit()  # Une fois le jeu terminé, on ferme Pygame proprement
\ No newline at end of file
+    # run_game ferme Pygame proprement une fois le jeu terminé
@@ -0,0 +1,360 @@
+"""
+Nom : Mcts.py
+Auteurs : Dylan, Samuel
+Date 11.11.2024
+"""
+###############################################################################
+# Moteur Monte-Carlo (MCTS / UCT) pour le jeu de Dames.
+#
+# - Sélection UCT, expansion avec backend.find_all_possible_moves
+# - Nœuds stockés dans des tableaux compacts (module array) et non des dictionnaires
+# - Réutilisation de l'arbre d'un coup à l'autre (re-enracinement + compactage)
+# - Parties aléatoires (playouts) regroupées par lots : l'évaluation finale
+#   est faite en une fois sur tout le lot (évaluateur remplaçable, vectorisable)
+# - Parallélisme à la racine : plusieurs processus, visites additionnées
+# - Usage : python mcts.py [playouts] [processus]
+###############################################################################
+
+import math  # Racine et logarithme pour UCT
+import multiprocessing  # Parallélisme à la racine
+import random  # Choix des coups pendant les playouts
+import sys  # Lecture des arguments de la ligne de commande
+import time  # Mesure du débit
+from array import array  # Tableaux compacts de nombres
+
+import backend  # Règles du jeu
+import engine  # Évaluation statique, make_move / unmake_move
+
+UCT_C = 1.4  # Constante d'exploration
+PLAYOUT_DEPTH = 30  # Nombre maximal de coups aléatoires par playout
+BATCH_SIZE = 32  # Playouts regroupés avant l'évaluation
+EVAL_SCALE = 200.0  # Échelle de la sigmoïde : 200 points ~ 73% de gain
+
+UNEXPANDED = -1  # first_child d'un nœud jamais développé
+
+
+def default_batch_evaluator(batch):
+    """
+    Évalue un lot de positions finales [(black_pieces, gray_pieces), ...].
+    Retourne pour chacune la probabilité de gain des noirs (entre 0 et 1).
+    Un évaluateur vectorisé (NumPy) peut être fourni à la place.
+    """
+    out = []
+    for black_pieces, gray_pieces in batch:
+        if not black_pieces:
+            out.append(0.0)
+        elif not gray_pieces:
+            out.append(1.0)
+        else:
+            score = engine.evaluate(black_pieces, gray_pieces, backend.PIECE_BLACK)
+            out.append(1.0 / (1.0 + math.exp(-score / EVAL_SCALE)))
+    return out
+
+
+def find_move_by_key(key, black_pieces, gray_pieces, color):
+    """
+    Retrouve le coup légal correspondant à une clé (départ, arrivée, chemin).
+    """
+    for mv in backend.find_all_possible_moves(color, black_pieces, gray_pieces):
+        if engine.move_key(mv) == key:
+            return mv
+    return None
+
+
+def key_to_move(key, black_pieces, gray_pieces, color):
+    """
+    Reconstruit un Move à partir de sa clé sans régénérer tous les coups.
+    """
+    src, dest, path = key
+    ally = black_pieces if color == backend.PIECE_BLACK else gray_pieces
+    size = backend.variant.size  # Cases codées comme engine.move_key
+    r, c = divmod(src, size)
+    for p in ally:
+        if p[0] == r and p[1] == c:
+            return backend.Move(p, 'capture' if path else 'move', list(divmod(dest, size)),
+                                len(path), path, p[2], 0, (r, c))
+    raise ValueError(f"Aucune pièce sur la case {src}")
+
+
+class MCTS:
+    """
+    Arbre de recherche Monte-Carlo. Chaque nœud est un indice dans des tableaux parallèles :
+    parent, premier enfant, nombre d'enfants, visites, somme des résultats et clé Zobrist.
+    Le résultat d'un nœud est vu du camp qui a joué le coup menant à ce nœud.
+    """
+
+    def __init__(self, seed=None, batch_evaluator=default_batch_evaluator, batch_size=BATCH_SIZE):
+        self.rng = random.Random(seed)
+        self.batch_evaluator = batch_evaluator
+        self.batch_size = batch_size
+        self.playouts = 0  # Playouts effectués depuis la création
+        self.clear()
+
+    def clear(self):
+        """
+        Vide l'arbre (nouvelle partie ou position inconnue).
+        """
+        self.parent = array('i')  # Indice du parent (-1 pour la racine)
+        self.first_child = array('i')  # Indice du premier enfant, UNEXPANDED si non développé
+        self.n_children = array('H')  # Nombre d'enfants (0 : position terminale une fois développée)
+        self.visits = array('I')  # Nombre de visites
+        self.value = array('d')  # Somme des résultats (camp qui a joué le coup)
+        self.hashes = array('Q')  # Clé Zobrist (renseignée au développement)
+        self.keys = []  # Clé du coup menant au nœud (départ, arrivée, chemin)
+        self.root_color = None  # Couleur au trait à la racine
+        self.new_node(-1, None)
+
+    def new_node(self, parent, key):
+        """
+        Ajoute un nœud vierge et retourne son indice.
+        """
+        self.parent.append(parent)
+        self.first_child.append(UNEXPANDED)
+        self.n_children.append(0)
+        self.visits.append(0)
+        self.value.append(0.0)
+        self.hashes.append(0)
+        self.keys.append(key)
+        return len(self.keys) - 1
+
+    def node_count(self):
+        return len(self.keys)
+
+    def bytes_per_node(self):
+        """
+        Estimation de la mémoire utilisée par nœud (tableaux + clés des coups).
+        """
+        n = self.node_count()
+        arrays = sum(a.itemsize for a in (self.parent, self.first_child, self.n_children,
+                                          self.visits, self.value, self.hashes))
+        sample = self.keys[1:min(n, 1001)]
+        key_bytes = (sum(sys.getsizeof(k) for k in sample) / len(sample)) if sample else 0
+        return arrays + 8 + key_bytes  # 8 : pointeur dans la liste des clés
+
+    def expand(self, node, black_pieces, gray_pieces, color):
+        """
+        Développe un nœud : un enfant par coup légal (enfants contigus dans les tableaux).
+        """
+        self.hashes[node] = backend.position_hash(black_pieces, gray_pieces, color == backend.PIECE_BLACK)
+        moves = backend.find_all_possible_moves(color, black_pieces, gray_pieces)
+        self.first_child[node] = len(self.keys)
+        self.n_children[node] = len(moves)
+        for mv in moves:
+            self.new_node(node, engine.move_key(mv))
+
+    def select_child(self, node):
+        """
+        Choisit l'enfant maximisant UCT (les enfants jamais visités d'abord).
+        """
+        first = self.first_child[node]
+        log_n = math.log(self.visits[node] + 1)
+        best, best_score = first, -1.0
+        for child in range(first, first + self.n_children[node]):
+            v = self.visits[child]
+            if v == 0:
+                return child
+            score = self.value[child] / v + UCT_C * math.sqrt(log_n / v)
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+    def root_for(self, black_pieces, gray_pieces, color):
+        """
+        Réutilise l'arbre si la position est la racine ou l'un de ses petits-enfants
+        (notre coup puis la réponse adverse) ; sinon repart d'un arbre vide.
+        """
+        h = backend.position_hash(black_pieces, gray_pieces, color == backend.PIECE_BLACK)
+        if self.root_color == color and self.hashes[0] == h:
+            return
+        if self.first_child[0] >= 0:
+            fc = self.first_child[0]
+            for child in range(fc, fc + self.n_children[0]):
+                if self.hashes[child] == h:  # Position atteinte en un coup (rare)
+                    self.reroot(child)
+                    self.root_color = color
+                    return
+                gc0 = self.first_child[child]
+                if gc0 < 0:
+                    continue
+                for gchild in range(gc0, gc0 + self.n_children[child]):
+                    if self.hashes[gchild] == h:
+                        self.reroot(gchild)
+                        self.root_color = color
+                        return
+        self.clear()
+        self.root_color = color
+
+    def reroot(self, new_root):
+        """
+        Fait d'un nœud la nouvelle racine en recopiant son sous-arbre dans des tableaux neufs.
+        Les enfants restent contigus (parcours en largeur).
+        """
+        old = (self.parent, self.first_child, self.n_children, self.visits, self.value, self.hashes, self.keys)
+        o_parent, o_first, o_nch, o_vis, o_val, o_hash, o_keys = old
+        self.clear()
+        self.visits[0] = o_vis[new_root]
+        self.value[0] = o_val[new_root]
+        self.hashes[0] = o_hash[new_root]
+        queue = [(new_root, 0)]  # (ancien indice, nouvel indice)
+        for old_i, new_i in queue:
+            first = o_first[old_i]
+            if first < 0:
+                continue
+            self.first_child[new_i] = len(self.keys)
+            self.n_children[new_i] = o_nch[old_i]
+            for oc in range(first, first + o_nch[old_i]):
+                nc = self.new_node(new_i, o_keys[oc])
+                self.visits[nc] = o_vis[oc]
+                self.value[nc] = o_val[oc]
+                self.hashes[nc] = o_hash[oc]
+                queue.append((oc, nc))
+
+    def run_batch(self, black_pieces, gray_pieces, color, n):
+        """
+        Effectue 'n' playouts : descente UCT, développement, partie aléatoire,
+        puis évaluation groupée des positions finales et rétropropagation.
+        """
+        batch = []  # Positions finales à évaluer
+        outcomes = []  # (chemin des nœuds, résultat déjà connu ou None, couleur finale)
+        for _ in range(n):
+            node = 0
+            path = [0]
+            undos = []
+            c = color
+            self.visits[0] += 1  # Visite comptée dès la descente (perte virtuelle)
+            # Sélection
+            while self.first_child[node] >= 0 and self.n_children[node] > 0:
+                node = self.select_child(node)
+                self.visits[node] += 1  # Les playouts suivants du lot évitent ce chemin
+                path.append(node)
+                undos.append(engine.make_move(key_to_move(self.keys[node], black_pieces, gray_pieces, c),
+                                              black_pieces, gray_pieces, c))
+                c = engine.opponent(c)
+            # Développement
+            if self.first_child[node] == UNEXPANDED:
+                self.expand(node, black_pieces, gray_pieces, c)
+                if self.n_children[node] > 0:
+                    node = self.first_child[node]
+                    self.visits[node] += 1
+                    path.append(node)
+                    undos.append(engine.make_move(key_to_move(self.keys[node], black_pieces, gray_pieces, c),
+                                                  black_pieces, gray_pieces, c))
+                    c = engine.opponent(c)
+            # Partie aléatoire
+            depth = 0
+            known = None  # Résultat connu sans évaluation (probabilité de gain des noirs)
+            while depth < PLAYOUT_DEPTH:
+                moves = backend.find_all_possible_moves(c, black_pieces, gray_pieces)
+                if not moves:  # Le camp au trait est bloqué ou n'a plus de pièces : il perd
+                    known = 0.0 if c == backend.PIECE_BLACK else 1.0
+                    break
+                undos.append(engine.make_move(self.rng.choice(moves), black_pieces, gray_pieces, c))
+                c = engine.opponent(c)
+                depth += 1
+            if known is None:
+                batch.append(([p[:] for p in black_pieces], [p[:] for p in gray_pieces]))
+            outcomes.append((path, known))
+            for undo in reversed(undos):  # Remet la position de la racine
+                engine.unmake_move(undo)
+
+        values = iter(self.batch_evaluator(batch)) if batch else iter(())
+        for path, known in outcomes:
+            p_black = known if known is not None else next(values)
+            # Le nœud de profondeur d a été atteint par un coup du camp au trait à la profondeur d - 1
+            mover = color
+            for node in path[1:]:
+                self.value[node] += p_black if mover == backend.PIECE_BLACK else 1.0 - p_black
+                mover = engine.opponent(mover)
+        self.playouts += n
+
+    def search(self, black_pieces, gray_pieces, color, playouts):
+        """
+        Lance 'playouts' playouts depuis la position et retourne (meilleur coup, taux de gain).
+        Le meilleur coup est l'enfant le plus visité.
+        """
+        self.root_for(black_pieces, gray_pieces, color)
+        done = 0
+        while done < playouts:
+            n = min(self.batch_size, playouts - done)
+            self.run_batch(black_pieces, gray_pieces, color, n)
+            done += n
+        counts = self.root_visits()
+        if not counts:
+            return None, 0.0
+        key = max(counts, key=counts.get)
+        child = self.child_by_key(0, key)
+        rate = self.value[child] / max(self.visits[child], 1)
+        return find_move_by_key(key, black_pieces, gray_pieces, color), rate
+
+    def root_visits(self):
+        """
+        Visites de chaque coup de la racine : {clé: visites}.
+        """
+        first = self.first_child[0]
+        if first < 0:
+            return {}
+        return {self.keys[ch]: self.visits[ch] for ch in range(first, first + self.n_children[0])}
+
+    def child_by_key(self, node, key):
+        first = self.first_child[node]
+        for ch in range(first, first + self.n_children[node]):
+            if self.keys[ch] == key:
+                return ch
+        return -1
+
+
+def _worker_search(args):
+    """
+    Tâche d'un processus : arbre indépendant, retourne les visites de la racine.
+    """
+    black_pieces, gray_pieces, color, playouts, seed = args
+    tree = MCTS(seed=seed)
+    tree.search(black_pieces, gray_pieces, color, playouts)
+    return tree.root_visits(), tree.node_count(), tree.bytes_per_node()
+
+
+def parallel_search(black_pieces, gray_pieces, color, playouts, workers=2):
+    """
+    Parallélisme à la racine : chaque processus construit son propre arbre,
+    les visites des coups de la racine sont additionnées.
+    Retourne (meilleur coup, statistiques).
+    """
+    per_worker = max(1, playouts // workers)
+    tasks = [(black_pieces, gray_pieces, color, per_worker, seed) for seed in range(workers)]
+    t0 = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        results = pool.map(_worker_search, tasks)
+    elapsed = time.perf_counter() - t0
+    total = {}
+    for visits, _, _ in results:
+        for key, v in visits.items():
+            total[key] = total.get(key, 0) + v
+    stats = {
+        "playouts": per_worker * workers,
+        "playouts_per_s": per_worker * workers / elapsed if elapsed > 0 else 0.0,
+        "nodes": sum(r[1] for r in results),
+        "bytes_per_node": sum(r[2] for r in results) / len(results)
+    }
+    if not total:
+        return None, stats
+    best_key = max(total, key=total.get)
+    return find_move_by_key(best_key, black_pieces, gray_pieces, color), stats
+
+
+if __name__ == "__main__":
+    n_playouts = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    n_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    black, gray = backend.initial_pieces()
+    if n_workers <= 1:
+        mcts_tree = MCTS(seed=0)
+        start = time.perf_counter()
+        move, win_rate = mcts_tree.search(black, gray, backend.PIECE_BLACK, n_playouts)
+        spent = time.perf_counter() - start
+        print(f"Coup : {move} | gain estimé : {win_rate * 100:.1f}%")
+        print(f"Playouts/s : {n_playouts / spent:.0f} | nœuds : {mcts_tree.node_count()} | "
+              f"octets/nœud : {mcts_tree.bytes_per_node():.0f}")
+    else:
+        move, info = parallel_search(black, gray, backend.PIECE_BLACK, n_playouts, n_workers)
+        print(f"Coup : {move}")
+        print(f"Playouts/s : {info['playouts_per_s']:.0f} | nœuds : {info['nodes']} | "
+              f"octets/nœud : {info['bytes_per_node']:.0f}")
@@ -0,0 +1,197 @@
+"""
+Nom : Ponder.py
+Auteurs : Dylan, Samuel
+Date 11.11.2024
+"""
+###############################################################################
+# Réflexion sur le temps de l'adversaire (ponder) pour le mode Blitz.
+#
+# - Après son coup, le moteur prédit la réponse adverse (table de transposition)
+#   et analyse la position obtenue dans un fil d'exécution séparé
+# - Ponder hit : la recherche continue (même arbre, mêmes entrées de la table)
+#   et le temps déjà réfléchi est déduit du budget du coup
+# - Ponder miss : la recherche est interrompue en quelques millisecondes
+# - Statistiques : taux de ponder hit, temps gagné par partie, latence d'arrêt
+# - Usage : python ponder.py [parties] [budget_s] [réflexion_adverse_s]
+###############################################################################
+
+import random  # Adversaire simulé
+import sys  # Lecture des arguments de la ligne de commande
+import threading  # Fil d'exécution du ponder
+import time  # Budgets et mesures
+
+import backend  # Règles du jeu
+import engine  # Recherche alpha-bêta
+
+PONDER_STOP_INTERVAL = 32  # Vérification de l'arrêt très fréquente : interruption rapide
+MAX_DEPTH = 20  # Profondeur maximale d'une recherche
+MIN_THINK = 0.02  # Temps minimal laissé à la recherche après un ponder hit (secondes)
+
+
+class PonderingEngine:
+    """
+    Joueur alpha-bêta qui réfléchit pendant le temps de l'adversaire.
+    Un seul Searcher est partagé entre la recherche normale et le ponder :
+    sa table de transposition profite aux deux.
+    """
+
+    def __init__(self, max_depth=MAX_DEPTH):
+        self.searcher = engine.Searcher()
+        self.searcher.stop_interval = PONDER_STOP_INTERVAL
+        self.searcher.should_stop = self._should_stop
+        self.max_depth = max_depth
+        self.deadline = None  # Instant limite de la recherche (None : pas de limite, ponder)
+        self.stop_event = threading.Event()  # Demande d'arrêt immédiat (ponder miss)
+        self.thread = None  # Fil du ponder en cours
+        self.ponder_hash = None  # Clé de la position attendue après la réponse prédite
+        self.ponder_start = 0.0  # Début du ponder
+        self.ponder_result = None  # (profondeur, clé du coup, score) de la dernière itération du ponder
+        self.stats = {
+            "ponders": 0,  # Ponders lancés
+            "hits": 0,  # Réponse adverse correctement prédite
+            "misses": 0,  # Réponse différente : ponder interrompu
+            "time_saved": 0.0,  # Temps de budget non consommé grâce aux ponder hits (secondes)
+            "abort_ms_max": 0.0  # Pire latence d'arrêt sur un ponder miss (millisecondes)
+        }
+
+    def _should_stop(self):
+        if self.stop_event.is_set():
+            return True
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    def hit_rate(self):
+        """
+        Proportion de ponders dont la prédiction était juste.
+        """
+        decided = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / decided if decided else 0.0
+
+    def think(self, black_pieces, gray_pieces, color, budget):
+        """
+        Choisit un coup pour 'color' en au plus 'budget' secondes.
+        Exploite le ponder en cours s'il portait sur cette position.
+        """
+        start = time.perf_counter()
+        h = backend.position_hash(black_pieces, gray_pieces, color == backend.PIECE_BLACK)
+        result = None
+        if self.thread is not None:
+            if h == self.ponder_hash:
+                # Ponder hit : le temps déjà réfléchi compte comme du temps dépensé
+                self.stats["hits"] += 1
+                pondered = start - self.ponder_start
+                self.deadline = start + max(MIN_THINK, budget - pondered)
+                self.thread.join()
+                result = self.ponder_result
+                self.stats["time_saved"] += max(0.0, budget - (time.perf_counter() - start))
+            else:
+                # Ponder miss : arrêt immédiat, la table de transposition est conservée
+                self.stats["misses"] += 1
+                self.stop_event.set()
+                self.thread.join()
+                self.stats["abort_ms_max"] = max(self.stats["abort_ms_max"],
+                                                 (time.perf_counter() - start) * 1000)
+            self.thread = None
+        self.stop_event.clear()
+
+        if result is None:
+            self.deadline = start + budget
+            for depth, mv, score in self.searcher.iterate(black_pieces, gray_pieces, color, self.max_depth):
+                if mv is not None:
+                    result = (depth, engine.move_key(mv), score)
+        self.deadline = None
+
+        moves = backend.find_all_possible_moves(color, black_pieces, gray_pieces)
+        if result is not None:
+            for mv in moves:
+                if engine.move_key(mv) == result[1]:
+                    return mv
+        return moves[0] if moves else None  # Temps trop court pour une itération complète
+
+    def ponder(self, black_pieces, gray_pieces, opp_color):
+        """
+        Lance la réflexion sur le temps adverse. La position donnée est celle après notre coup
+        ('opp_color' au trait). La réponse prédite est le meilleur coup de la table de transposition.
+        """
+        self.stop()
+        black = [p[:] for p in black_pieces]  # Copies : le fil ne touche pas aux listes du jeu
+        gray = [p[:] for p in gray_pieces]
+        moves = backend.find_all_possible_moves(opp_color, black, gray)
+        if not moves:
+            return  # Partie terminée : rien à prédire
+        entry = self.searcher.probe(black, gray, opp_color)
+        predicted = moves[0]
+        if entry and entry[3] is not None:
+            for mv in moves:
+                if engine.move_key(mv) == entry[3]:
+                    predicted = mv
+                    break
+        engine.make_move(predicted, black, gray, opp_color)
+        my_color = engine.opponent(opp_color)
+        self.ponder_hash = backend.position_hash(black, gray, my_color == backend.PIECE_BLACK)
+        self.ponder_result = None
+        self.ponder_start = time.perf_counter()
+        self.deadline = None
+        self.stop_event.clear()
+        self.stats["ponders"] += 1
+        self.thread = threading.Thread(target=self._ponder_loop, args=(black, gray, my_color), daemon=True)
+        self.thread.start()
+
+    def _ponder_loop(self, black, gray, color):
+        for depth, mv, score in self.searcher.iterate(black, gray, color, self.max_depth):
+            if mv is not None:
+                self.ponder_result = (depth, engine.move_key(mv), score)
+
+    def stop(self):
+        """
+        Interrompt le ponder en cours (fin de partie).
+        """
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+        self.stop_event.clear()
+
+
+def simulate(games=2, budget=0.3, opponent_think=0.3, max_plies=60, seed=0):
+    """
+    Parties moteur (noirs, avec ponder) contre un adversaire simulé (gris) :
+    recherche courte + temps de réflexion fixe, avec une part de coups aléatoires.
+    Affiche taux de ponder hit, temps gagné par partie et latence d'arrêt.
+    """
+    rng = random.Random(seed)
+    player = PonderingEngine()
+    rival = engine.Searcher()
+    for _ in range(games):
+        black, gray = backend.initial_pieces()
+        player.searcher.new_game()
+        color = backend.PIECE_BLACK
+        for _ in range(max_plies):
+            if not backend.find_all_possible_moves(color, black, gray):
+                break
+            if color == backend.PIECE_BLACK:
+                mv = player.think(black, gray, color, budget)
+                engine.make_move(mv, black, gray, color)
+                player.ponder(black, gray, backend.PIECE_GRAY)
+            else:
+                time.sleep(opponent_think)  # L'humain réfléchit : le moteur pondère
+                moves = backend.find_all_possible_moves(color, black, gray)
+                if rng.random() < 0.3:
+                    mv = rng.choice(moves)
+                else:
+                    mv, _ = rival.search(black, gray, color, 3)
+                engine.make_move(mv, black, gray, color)
+            color = engine.opponent(color)
+        player.stop()
+    st = player.stats
+    print(f"Parties : {games} | ponders : {st['ponders']} | hits : {st['hits']} | misses : {st['misses']}")
+    print(f"Taux de ponder hit : {player.hit_rate() * 100:.1f}% | "
+          f"temps gagné par partie : {st['time_saved'] / games:.2f} s | "
+          f"arrêt (pire cas) : {st['abort_ms_max']:.1f} ms")
+    return st
+
+
+if __name__ == "__main__":
+    n_games = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    move_budget = float(sys.argv[2]) if len(sys.argv) > 2 else 0.3
+    think_time = float(sys.argv[3]) if len(sys.argv) > 3 else 0.3
+    simulate(n_games, move_budget, think_time)
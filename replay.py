@@ -0,0 +1,181 @@
+"""
+Nom : Replay.py
+Auteurs : Dylan, Samuel
+Date 11.11.2024
+"""
+###############################################################################
+# Enregistrement et relecture des parties avec accès direct à n'importe quel coup.
+#
+# - Le fichier contient la variante, la liste des coups (différences compactes du backend)
+#   et une position complète (keyframe) tous les K coups
+# - Index des keyframes : aller au coup n coûte au plus K rejoues de différences
+# - Visionneuse pygame (draw_board / draw_pieces du frontend) avec barre de défilement
+# - Usage : python replay.py fichier.replay.json
+#   Flèches gauche/droite : coup précédent/suivant, Début/Fin, clic ou glisser sur la barre
+###############################################################################
+
+import bisect  # Recherche de la keyframe la plus proche
+import json  # Format du fichier
+import sys  # Lecture des arguments de la ligne de commande
+
+import backend  # Différences (encode/decode/apply)
+
+KEYFRAME_INTERVAL = 32  # Une position complète tous les 32 coups
+
+
+def copy_pieces(pieces):
+    return [[p[0], p[1], p[2]] for p in pieces]
+
+
+class ReplayRecorder:
+    """
+    Enregistre une partie au fil des coups : différence de chaque coup
+    et position complète tous les 'interval' coups.
+    """
+
+    def __init__(self, black_pieces, gray_pieces, interval=KEYFRAME_INTERVAL):
+        self.interval = interval
+        self.variant = backend.variant.name  # Variante de la partie (cases codées sur son plateau)
+        self.moves = []  # Différences encodées (backend.encode_delta)
+        self.keyframes = [[0, copy_pieces(black_pieces), copy_pieces(gray_pieces)]]  # [coup, noirs, gris]
+
+    def record(self, delta, black_pieces, gray_pieces):
+        """
+        Ajoute un coup (différence déjà appliquée aux listes données).
+        """
+        self.moves.append(backend.encode_delta(delta))
+        if len(self.moves) % self.interval == 0:
+            self.keyframes.append([len(self.moves), copy_pieces(black_pieces), copy_pieces(gray_pieces)])
+
+    def undo(self):
+        """
+        Retire le dernier coup enregistré (annulation dans l'interface).
+        """
+        if self.moves:
+            self.moves.pop()
+            if self.keyframes[-1][0] > len(self.moves):
+                self.keyframes.pop()  # Keyframe prise après le coup retiré
+
+    def to_dict(self):
+        return {"version": 1, "variant": self.variant, "interval": self.interval,
+                "moves": self.moves, "keyframes": self.keyframes}
+
+    def save(self, filename):
+        """
+        Écrit le fichier de relecture (JSON compact).
+        """
+        with open(filename, "w") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+
+
+class Replay:
+    """
+    Partie enregistrée en lecture : position à n'importe quel coup (seek).
+    Le coup suivant est rejoué directement depuis la position courante ;
+    sinon on repart de la keyframe précédente (au plus 'interval' différences).
+    La variante de la partie doit être celle du backend (backend.set_variant) avant la lecture.
+    """
+
+    def __init__(self, data):
+        self.variant = data.get("variant", backend.DEFAULT_VARIANT.name)  # Anciens fichiers : 10x10
+        self.interval = data["interval"]
+        self.moves = [backend.decode_delta(m) for m in data["moves"]]
+        self.keyframes = data["keyframes"]
+        self.index = [kf[0] for kf in self.keyframes]  # Coups des keyframes (triés)
+        self.ply = None  # Coup de la position courante
+        self.black_pieces, self.gray_pieces = [], []
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, "r") as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self.moves)
+
+    def seek(self, ply):
+        """
+        Place la relecture après 'ply' coups et retourne (noirs, gris).
+        """
+        ply = max(0, min(ply, len(self.moves)))
+        if self.ply is None or ply < self.ply or ply - self.ply > self.interval:
+            k = bisect.bisect_right(self.index, ply) - 1  # Keyframe la plus proche avant 'ply'
+            start, black, gray = self.keyframes[k]
+            self.black_pieces, self.gray_pieces = copy_pieces(black), copy_pieces(gray)
+            self.ply = start
+        while self.ply < ply:
+            backend.apply_delta_to_pieces(self.moves[self.ply], self.black_pieces, self.gray_pieces)
+            self.ply += 1
+        return self.black_pieces, self.gray_pieces
+
+
+def view(filename):
+    """
+    Visionneuse : affiche la partie et permet de se déplacer librement dans les coups.
+    """
+    import pygame  # Chargés seulement pour la visionneuse : le reste du module n'en dépend pas
+    import frontend
+    import variants
+
+    replay = Replay.load(filename)
+    backend.set_variant(variants.get_variant(replay.variant))  # Plateau et codage des cases de la partie
+    frontend.BOARD_SIZE = backend.variant.size
+    pygame.init()
+    frontend.init_fonts()
+    frontend.CELL_SIZE = 80
+    frontend.BOARD_MARGIN = 20
+    frontend.BOARD_PIXEL_SIZE = frontend.BOARD_SIZE * frontend.CELL_SIZE + frontend.BOARD_MARGIN * 2
+    width = frontend.BOARD_PIXEL_SIZE
+    bar_y, bar_h = frontend.BOARD_PIXEL_SIZE + 20, 24  # Barre de défilement sous le plateau
+    screen = pygame.display.set_mode((width, frontend.BOARD_PIXEL_SIZE + 90))
+    pygame.display.set_caption(f"Relecture - {filename}")
+    clock = pygame.time.Clock()
+    ply, dragging, running = 0, False, True
+    total = len(replay)
+
+    def ply_from_x(x):
+        return round(max(0, min(1, (x - 20) / (width - 40))) * total)
+
+    while running:
+        for ev in pygame.event.get():
+            if ev.type == pygame.QUIT:
+                running = False
+            elif ev.type == pygame.KEYDOWN:
+                if ev.key == pygame.K_ESCAPE:
+                    running = False
+                elif ev.key == pygame.K_RIGHT:
+                    ply = min(total, ply + 1)
+                elif ev.key == pygame.K_LEFT:
+                    ply = max(0, ply - 1)
+                elif ev.key == pygame.K_HOME:
+                    ply = 0
+                elif ev.key == pygame.K_END:
+                    ply = total
+            elif ev.type == pygame.MOUSEBUTTONDOWN and ev.button == 1 and ev.pos[1] >= bar_y - 10:
+                dragging = True
+                ply = ply_from_x(ev.pos[0])
+            elif ev.type == pygame.MOUSEBUTTONUP and ev.button == 1:
+                dragging = False
+            elif ev.type == pygame.MOUSEMOTION and dragging:
+                ply = ply_from_x(ev.pos[0])
+
+        black, gray = replay.seek(ply)
+        screen.fill((220, 220, 220))
+        frontend.draw_board(screen)
+        frontend.draw_pieces(screen, black, gray)
+        # Barre de défilement et numéro du coup
+        pygame.draw.rect(screen, frontend.PANEL_EDGE, (20, bar_y, width - 40, bar_h), 2)
+        fill = int((width - 44) * (ply / total)) if total else 0
+        pygame.draw.rect(screen, frontend.MENU_COLOR_TOP, (22, bar_y + 2, fill, bar_h - 4))
+        label = frontend.font_info.render(f"Coup {ply} / {total}", True, frontend.TEXT_COLOR)
+        screen.blit(label, (20, bar_y + bar_h + 6))
+        pygame.display.flip()
+        clock.tick(60)
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage : python replay.py fichier.replay.json")
+    else:
+        view(sys.argv[1])
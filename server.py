@@ -0,0 +1,350 @@
+"""
+Nom : Server.py
+Auteurs : Dylan, Samuel
+Date 11.11.2024
+"""
+###############################################################################
+# Serveur de parties (asyncio) pour le jeu de Dames (une variante par serveur, 10x10 par défaut).
+#
+# - Protocole local : un message JSON par ligne sur TCP
+# - Plusieurs parties simultanées, chacune avec son propre état (pas de globales)
+# - Pendules Blitz gérées côté serveur (backend.BLITZ_TIME_LIMIT)
+# - Diffusion de différences (coup joué) au lieu du plateau complet
+# - Usage : python server.py [port] [--variant nom]
+#
+# Messages client -> serveur :
+#   {"op": "join", "game": "<id>", "watch": bool}  rejoint (ou crée) une partie
+#   {"op": "move", "from": [r, c], "to": [r, c],
+#    "path": [[r, c], ...]}                        joue un coup (path pour lever l'ambiguïté)
+#   {"op": "step", "from": [r, c], "to": [r, c],
+#    "captured": [r, c]}                           une prise d'une capture en chaîne
+#   {"op": "ping"}
+# Messages serveur -> client :
+#   {"ev": "joined", "role": ..., "state": {...}}  état complet (avec la variante), une seule fois
+#   {"ev": "start", "turn": ..., "clocks": [...]}  les deux joueurs sont là
+#   {"ev": "diff", "ply": n, "d": [...], ...}      coup appliqué (backend.encode_delta)
+#   {"ev": "end", "result": ..., "reason": ...}
+#   {"ev": "step", "ok": true}                     étape de capture acceptée (séquence pas finie)
+#   {"ev": "error", "msg": ...} / {"ev": "pong"}
+###############################################################################
+
+import asyncio  # Boucle d'événements et sockets asynchrones
+import json  # Encodage des messages
+import sys  # Lecture des arguments de la ligne de commande
+
+import backend  # Règles du jeu (génération des coups, différences compactes)
+import validation  # Index des coups légaux (validation en temps constant)
+import variants  # Choix de la variante (--variant)
+
+DEFAULT_PORT = 8765  # Port d'écoute par défaut
+MAX_WRITE_BUFFER = 256 * 1024  # Au-delà, le client est trop lent : on le déconnecte
+
+
+def color_name(color):
+    """
+    Nom de la couleur utilisé dans le protocole.
+    """
+    return "black" if color == backend.PIECE_BLACK else "gray"
+
+
+def encode(msg):
+    """
+    Encode un message en une ligne JSON compacte.
+    """
+    return (json.dumps(msg, separators=(",", ":")) + "\n").encode()
+
+
+class GameSession:
+    """
+    État d'une partie hébergée par le serveur : pièces, trait, pendules,
+    compteur des 50 coups et historique des positions.
+    """
+
+    def __init__(self, game_id, time_limit=backend.BLITZ_TIME_LIMIT):
+        self.game_id = game_id
+        self.black_pieces, self.gray_pieces = backend.initial_pieces()
+        self.color = backend.PIECE_BLACK  # Couleur au trait
+        self.clocks = {backend.PIECE_BLACK: float(time_limit), backend.PIECE_GRAY: float(time_limit)}
+        self.turn_start = None  # Instant (loop.time()) où la pendule courante a démarré
+        self.flag_handle = None  # Minuterie de chute du drapeau pour le joueur au trait
+        self.no_capture_turns = 0  # Règle des 50 coups
+        self.history = {}  # Hash de position -> occurrences depuis le dernier coup irréversible
+        self.ply = 0  # Nombre de coups joués
+        self.players = {}  # Couleur -> writer du joueur
+        self.clients = set()  # Tous les writers (joueurs et spectateurs)
+        self.result = None  # (résultat, raison) quand la partie est finie
+        self.index = validation.MoveIndex(self.color, self.black_pieces, self.gray_pieces)  # Coups légaux
+        self.pending = None  # Préfixe de la capture en cours (étapes "step" déjà acceptées)
+        self.record_position()
+
+    def record_position(self, h=None):
+        """
+        Ajoute la position courante à l'historique (nulle par répétition).
+        'h' : clé Zobrist déjà connue (celle de la différence du dernier coup).
+        """
+        if h is None:
+            h = backend.position_hash(self.black_pieces, self.gray_pieces, self.color == backend.PIECE_BLACK)
+        self.history[h] = self.history.get(h, 0) + 1
+        return self.history[h]
+
+    def snapshot(self):
+        """
+        État complet, envoyé une seule fois à l'arrivée d'un client.
+        """
+        return {
+            "variant": backend.variant.name,
+            "black_pieces": self.black_pieces,
+            "gray_pieces": self.gray_pieces,
+            "turn": color_name(self.color),
+            "clocks": self.current_clocks(),
+            "ply": self.ply,
+            "no_capture_turns": self.no_capture_turns
+        }
+
+    def current_clocks(self):
+        """
+        Temps restants [noir, gris], en tenant compte de la pendule qui tourne.
+        """
+        clocks = dict(self.clocks)
+        if self.turn_start is not None and self.result is None:
+            clocks[self.color] -= asyncio.get_running_loop().time() - self.turn_start
+        return [round(max(clocks[backend.PIECE_BLACK], 0.0), 3), round(max(clocks[backend.PIECE_GRAY], 0.0), 3)]
+
+    def start_clock(self):
+        """
+        Lance la pendule du joueur au trait et arme la minuterie de chute du drapeau.
+        """
+        loop = asyncio.get_running_loop()
+        self.turn_start = loop.time()
+        if self.flag_handle:
+            self.flag_handle.cancel()
+        self.flag_handle = loop.call_later(self.clocks[self.color], self.on_flag)
+
+    def on_flag(self):
+        """
+        Temps épuisé pour le joueur au trait : l'adversaire gagne.
+        """
+        if self.result is None:
+            self.clocks[self.color] = 0.0
+            winner = "GRIS" if self.color == backend.PIECE_BLACK else "NOIR"
+            self.finish(winner, "temps")
+
+    def finish(self, result, reason):
+        """
+        Termine la partie et prévient tous les clients.
+        """
+        self.result = (result, reason)
+        if self.flag_handle:
+            self.flag_handle.cancel()
+            self.flag_handle = None
+        self.broadcast({"ev": "end", "result": result, "reason": reason, "clocks": self.current_clocks()})
+
+    def drop_player(self, writer):
+        """
+        Joueur coupé par le serveur pendant la partie : son adversaire gagne, les clients sont prévenus.
+        """
+        for color, w in self.players.items():
+            if w is writer and self.result is None:
+                self.finish("GRIS" if color == backend.PIECE_BLACK else "NOIR", "déconnexion")
+
+    def broadcast(self, msg):
+        """
+        Envoie le même message (encodé une seule fois) à tous les clients de la partie.
+        """
+        data = encode(msg)
+        for w in list(self.clients):
+            if w.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+                self.clients.discard(w)  # Client qui ne lit plus : on le coupe
+                w.close()
+                continue
+            w.write(data)
+
+    def find_move(self, src, dest, path):
+        """
+        Cherche le coup légal correspondant à (départ, arrivée, chemin) dans l'index de la position.
+        Le chemin n'est nécessaire que si plusieurs captures partagent départ et arrivée.
+        """
+        return self.index.lookup(src, dest, path)
+
+    def play_step(self, src, dest, captured):
+        """
+        Valide une étape de capture. Retourne le message de différence quand la séquence
+        est complète, "partial" si l'étape est acceptée, ou None si elle est illégale.
+        """
+        found = self.index.step(self.pending, src, dest, captured)
+        if found is None:
+            return None
+        self.pending, mv = found
+        if mv is None:
+            return "partial"
+        return self.play_move(mv)
+
+    def play(self, src, dest, path):
+        """
+        Valide et applique un coup. Retourne le message de différence, ou None si illégal.
+        """
+        mv = self.find_move(src, dest, path)
+        if mv is None:
+            return None
+        return self.play_move(mv)
+
+    def play_move(self, mv):
+        """
+        Applique un coup déjà validé et prépare l'index de la position suivante.
+        """
+        loop = asyncio.get_running_loop()
+        mover = self.color
+        if self.turn_start is not None:
+            self.clocks[mover] -= loop.time() - self.turn_start  # Décompte du temps réfléchi
+        delta = backend.move_to_delta(mv, self.black_pieces, self.gray_pieces, mover, self.no_capture_turns)
+        backend.apply_delta_to_pieces(delta, self.black_pieces, self.gray_pieces)
+        self.no_capture_turns = delta["no_capture_turns"][1]
+        self.ply += 1
+        self.color = backend.PIECE_GRAY if mover == backend.PIECE_BLACK else backend.PIECE_BLACK
+        if backend.is_irreversible(delta, self.black_pieces, self.gray_pieces):
+            self.history.clear()  # Capture ou pion avancé : les positions antérieures ne reviendront plus
+        repeats = self.record_position(delta["hash"])
+        self.index = validation.MoveIndex(self.color, self.black_pieces, self.gray_pieces)  # Une génération par position
+        self.pending = None
+        diff = {
+            "ev": "diff",
+            "ply": self.ply,
+            "d": backend.encode_delta(delta),
+            "turn": color_name(self.color),
+            "clocks": [round(self.clocks[backend.PIECE_BLACK], 3), round(self.clocks[backend.PIECE_GRAY], 3)]
+        }
+        self.broadcast(diff)
+        # Conditions de fin, dans le même ordre que la boucle de run_game
+        winner = backend.check_winner(self.black_pieces, self.gray_pieces)
+        if winner:
+            self.finish(winner, "matériel")
+        elif self.no_capture_turns >= 50:
+            self.finish("NUL", "50 coups")
+        elif repeats >= 3:
+            self.finish("NUL", "répétition")
+        elif not self.index:
+            self.finish("NOIR" if self.color == backend.PIECE_GRAY else "GRIS", "blocage")
+        else:
+            self.start_clock()
+        return diff
+
+
+class GameServer:
+    """
+    Serveur asyncio hébergeant de nombreuses parties simultanées.
+    Une connexion inactive ne coûte qu'un socket et une coroutine en attente de lecture.
+    """
+
+    def __init__(self, time_limit=backend.BLITZ_TIME_LIMIT):
+        self.time_limit = time_limit
+        self.games = {}  # Identifiant -> GameSession
+        self.connections = 0  # Connexions ouvertes
+
+    def get_game(self, game_id):
+        """
+        Retourne la partie demandée, en la créant si besoin.
+        """
+        game = self.games.get(game_id)
+        if game is None or game.result is not None:
+            game = GameSession(game_id, self.time_limit)
+            self.games[game_id] = game
+        return game
+
+    async def handle_client(self, reader, writer):
+        """
+        Boucle de lecture d'un client : une commande JSON par ligne.
+        """
+        self.connections += 1
+        game = None
+        role = None
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # Ligne plus longue que la limite du flux (LimitOverrunError)
+                    writer.write(encode({"ev": "error", "msg": "message trop long"}))
+                    if game is not None:
+                        game.drop_player(writer)
+                    break  # Flux désynchronisé : on ferme la connexion
+                if not line:
+                    break  # Connexion fermée par le client
+                try:
+                    msg = json.loads(line)
+                    op = msg["op"]
+                except (ValueError, KeyError, TypeError):
+                    writer.write(encode({"ev": "error", "msg": "message invalide"}))
+                    continue
+
+                if op == "ping":
+                    writer.write(encode({"ev": "pong"}))
+                elif op == "join":
+                    if game is not None:
+                        game.clients.discard(writer)
+                    game = self.get_game(str(msg.get("game", "default")))
+                    role = "spectator"
+                    for color in (backend.PIECE_BLACK, backend.PIECE_GRAY):
+                        if color not in game.players and not msg.get("watch"):
+                            game.players[color] = writer
+                            role = color_name(color)
+                            break
+                    game.clients.add(writer)
+                    writer.write(encode({"ev": "joined", "game": game.game_id, "role": role,
+                                         "state": game.snapshot()}))
+                    if role == "gray":
+                        game.start_clock()  # Les deux joueurs sont là : la pendule des noirs démarre
+                        game.broadcast({"ev": "start", "turn": color_name(game.color),
+                                        "clocks": game.current_clocks()})
+                elif op == "move":
+                    if game is None or game.result is not None:
+                        writer.write(encode({"ev": "error", "msg": "aucune partie en cours"}))
+                    elif role != color_name(game.color) or game.players.get(game.color) is not writer:
+                        writer.write(encode({"ev": "error", "msg": "ce n'est pas votre tour"}))
+                    elif game.play(msg.get("from"), msg.get("to"), msg.get("path")) is None:
+                        writer.write(encode({"ev": "error", "msg": "coup illégal"}))
+                elif op == "step":
+                    if game is None or game.result is not None:
+                        writer.write(encode({"ev": "error", "msg": "aucune partie en cours"}))
+                    elif role != color_name(game.color) or game.players.get(game.color) is not writer:
+                        writer.write(encode({"ev": "error", "msg": "ce n'est pas votre tour"}))
+                    else:
+                        res = game.play_step(msg.get("from"), msg.get("to"), msg.get("captured"))
+                        if res is None:
+                            writer.write(encode({"ev": "error", "msg": "étape illégale"}))
+                        elif res == "partial":
+                            writer.write(encode({"ev": "step", "ok": True}))
+                else:
+                    writer.write(encode({"ev": "error", "msg": f"opération inconnue : {op}"}))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # Client parti brutalement
+        finally:
+            self.connections -= 1
+            if game is not None:
+                game.clients.discard(writer)
+                if not game.clients:  # Plus personne : on libère la partie et sa minuterie
+                    if game.flag_handle:
+                        game.flag_handle.cancel()
+                    if self.games.get(game.game_id) is game:
+                        del self.games[game.game_id]
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """
+        Démarre l'écoute et sert indéfiniment.
+        """
+        server = await asyncio.start_server(self.handle_client, host, port, backlog=4096)
+        print(f"Serveur de dames à l'écoute sur {host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if "--variant" in args:
+        i = args.index("--variant")
+        backend.set_variant(variants.get_variant(args[i + 1]))  # Toutes les parties du serveur
+        del args[i:i + 2]
+    port_arg = int(args[0]) if args else DEFAULT_PORT
+    try:
+        asyncio.run(GameServer().serve(port=port_arg))
+    except KeyboardInterrupt:
+        print("Serveur arrêté.")
@@ -0,0 +1,249 @@
+"""
+Nom : Tactics.py
+Auteurs : Dylan, Samuel
+Date 11.11.2024
+"""
+###############################################################################
+# Recherche de combinaisons dans des collections de parties enregistrées (replay).
+#
+# - Chaque position de chaque partie passe par le moteur de règles
+# - Combinaison : meilleure capture d'au moins 3 pièces, ou capture d'une dame
+# - Sacrifice : un déplacement qui force l'adversaire à prendre,
+#   après quoi toutes ses prises laissent une combinaison plus rentable
+# - Parties rejouées par un groupe de processus, résultats écrits au fil de l'eau (JSON lines)
+# - Positions déjà vues écartées avant l'analyse : filtre de Bloom (clé Zobrist canonique)
+#   dans le processus principal, seules les positions nouvelles sont analysées, par lots
+# - Parties de la variante jouée par backend (10x10) seulement, les autres sont ignorées
+# - Usage : python tactics.py sortie.jsonl fichier.replay.json|dossier ... [--workers N]
+###############################################################################
+
+import json  # Lecture des parties et écriture des résultats
+import math  # Dimensionnement du filtre de Bloom
+import multiprocessing  # Groupe de processus
+import os  # Parcours des dossiers
+import sys  # Lecture des arguments de la ligne de commande
+import time  # Mesure du débit
+
+import backend  # Règles du jeu
+import engine  # make_move / unmake_move
+import replay  # Format des parties enregistrées
+
+MIN_COMBO = 3  # Nombre de pièces prises à partir duquel une capture est une combinaison
+BLOOM_CAPACITY = 10_000_000  # Positions distinctes attendues
+BLOOM_ERROR = 0.001  # Taux de faux positifs accepté (position nouvelle prise pour un doublon)
+REPLAY_SUFFIX = ".replay.json"  # Extension des fichiers de parties
+ANALYSIS_BATCH = 256  # Positions nouvelles par tâche d'analyse
+
+
+class BloomFilter:
+    """
+    Ensemble probabiliste de clés Zobrist (64 bits) : mémoire fixe,
+    aucun faux négatif, faux positifs rares (BLOOM_ERROR).
+    """
+
+    def __init__(self, capacity=BLOOM_CAPACITY, error=BLOOM_ERROR):
+        self.size = max(8, int(-capacity * math.log(error) / (math.log(2) ** 2)))  # Nombre de bits
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))  # Nombre de fonctions de hachage
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _indexes(self, key):
+        # Double hachage : les deux moitiés de la clé Zobrist suffisent
+        h1 = key & 0xFFFFFFFF
+        h2 = (key >> 32) | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key):
+        """
+        Ajoute la clé ; retourne True si elle était (probablement) déjà présente.
+        """
+        seen = True
+        for i in self._indexes(key):
+            byte, bit = i >> 3, 1 << (i & 7)
+            if not self.bits[byte] & bit:
+                seen = False
+                self.bits[byte] |= bit
+        return seen
+
+
+def best_capture(color, black_pieces, gray_pieces):
+    """
+    Meilleure séquence de capture pour 'color' sous la forme (nb_captures, nb_dames, coup),
+    ou None si aucune capture. Les captures retournées par find_all_possible_moves
+    sont déjà les meilleures (règle de la majorité, même recherche que explore_captures).
+    """
+    moves = backend.find_all_possible_moves(color, black_pieces, gray_pieces)
+    if not moves or moves[0].type != 'capture':
+        return None
+    return moves[0].count, moves[0].queenCapt, moves[0]
+
+
+def is_combination(found):
+    return found is not None and (found[0] >= MIN_COMBO or found[1] > 0)
+
+
+def find_sacrifice(color, black_pieces, gray_pieces):
+    """
+    Cherche un déplacement qui force l'adversaire à prendre, puis, quelle que soit sa prise,
+    laisse à 'color' une combinaison qui prend plus qu'il n'a perdu.
+    Retourne (coup, pièces données, pièces reprises au pire) ou None.
+    """
+    opp = engine.opponent(color)
+    for mv in backend.find_all_possible_moves(color, black_pieces, gray_pieces):
+        undo = engine.make_move(mv, black_pieces, gray_pieces, color)
+        replies = backend.find_all_possible_moves(opp, black_pieces, gray_pieces)
+        worst = None  # Gain minimal de 'color' sur toutes les prises adverses
+        if replies and replies[0].type == 'capture':  # L'adversaire est obligé de prendre
+            worst = math.inf
+            for rep in replies:
+                undo2 = engine.make_move(rep, black_pieces, gray_pieces, opp)
+                found = best_capture(color, black_pieces, gray_pieces)
+                engine.unmake_move(undo2)
+                if not is_combination(found) or found[0] <= rep.count:
+                    worst = None  # Une prise adverse réfute le sacrifice
+                    break
+                worst = min(worst, found[0])
+        engine.unmake_move(undo)
+        if worst is not None:
+            return mv, replies[0].count, worst
+    return None
+
+
+def position_record(path, ply, color, black_pieces, gray_pieces, key):
+    return {"file": path, "ply": ply, "color": "black" if color == backend.PIECE_BLACK else "gray",
+            "hash": key, "black": [p[:] for p in black_pieces], "gray": [p[:] for p in gray_pieces]}
+
+
+def scan_game(path):
+    """
+    Rejoue une partie enregistrée sans l'analyser et retourne (nb de positions, positions),
+    chaque position étant (fichier, coup, couleur, clé Zobrist canonique, noirs, gris).
+    Les positions répétées dans la partie ne sont retournées qu'une fois.
+    """
+    try:
+        game = replay.Replay.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Partie ignorée ({path}) : {e}", file=sys.stderr)
+        return 0, []
+    if game.variant != backend.variant.name:  # Cases codées sur un autre plateau
+        print(f"Partie ignorée ({path}) : variante {game.variant}", file=sys.stderr)
+        return 0, []
+    try:
+        black, gray = game.seek(0)
+        seen = set()  # Positions répétées dans la même partie
+        positions = []
+        for ply in range(len(game) + 1):
+            if ply < len(game):
+                color = backend.PIECE_BLACK if game.moves[ply]["color"] == "black" else backend.PIECE_GRAY
+            else:
+                color = engine.opponent(color) if ply else backend.PIECE_BLACK  # Position finale
+            key, _ = backend.canonical_hash(black, gray, color == backend.PIECE_BLACK)  # Symétrique = doublon
+            if key not in seen:
+                seen.add(key)
+                positions.append((path, ply, color, key, [p[:] for p in black], [p[:] for p in gray]))
+            if ply < len(game):
+                black, gray = game.seek(ply + 1)  # Coup suivant : une seule différence rejouée
+    except (ValueError, KeyError, IndexError, TypeError) as e:  # Différence corrompue : seek échoue
+        print(f"Partie ignorée ({path}) : {e}", file=sys.stderr)
+        return 0, []
+    return len(game) + 1, positions
+
+
+def analyse_positions(positions):
+    """
+    Cherche combinaisons et sacrifices dans un lot de positions (retournées par scan_game)
+    et retourne les résultats.
+    """
+    results = []
+    for path, ply, color, key, black, gray in positions:
+        found = best_capture(color, black, gray)
+        if is_combination(found):
+            rec = position_record(path, ply, color, black, gray, key)
+            rec.update(kind="combinaison", captures=found[0], queens=found[1],
+                       move=[list(found[2].src), list(found[2].dest)])
+            results.append(rec)
+        elif found is None:
+            sac = find_sacrifice(color, black, gray)
+            if sac is not None:
+                rec = position_record(path, ply, color, black, gray, key)
+                rec.update(kind="sacrifice", given=sac[1], captures=sac[2],
+                           move=[list(sac[0].src), list(sac[0].dest)])
+                results.append(rec)
+    return results
+
+
+def replay_files(paths):
+    """
+    Générateur des fichiers de parties : fichiers donnés et contenu des dossiers (récursif).
+    """
+    for p in paths:
+        if os.path.isdir(p):
+            for root, _, files in os.walk(p):
+                for name in sorted(files):
+                    if name.endswith(REPLAY_SUFFIX):
+                        yield os.path.join(root, name)
+        else:
+            yield p
+
+
+def mine(paths, output, workers=None, bloom=None):
+    """
+    Analyse toutes les parties avec un groupe de processus et ajoute les positions trouvées
+    à 'output' (une ligne JSON par position, écrite dès réception).
+    Les processus rejouent les parties ; le processus principal écarte les positions déjà vues
+    (filtre de Bloom) et n'envoie que les nouvelles à l'analyse, par lots.
+    """
+    bloom = bloom or BloomFilter()
+    games = positions = analysed = written = duplicates = 0
+    batch, pending = [], []  # Lot en cours de constitution, analyses envoyées (dans l'ordre)
+    start = time.perf_counter()
+
+    def collect(block):
+        nonlocal written
+        while pending and (block or pending[0].ready()):
+            for rec in pending.pop(0).get():
+                out.write(json.dumps(rec, separators=(",", ":")) + "\n")
+                written += 1
+            out.flush()  # Résultats disponibles même si le traitement est interrompu
+            block = block and len(pending) > max_pending
+
+    with multiprocessing.Pool(workers) as pool, open(output, "a") as out:
+        max_pending = 4 * (workers or os.cpu_count() or 1)  # Lots en attente au plus (mémoire bornée)
+        for count, found in pool.imap_unordered(scan_game, replay_files(paths), chunksize=16):
+            games += 1
+            positions += count
+            for pos in found:
+                if bloom.add(pos[3]):
+                    duplicates += 1  # Position déjà vue dans une autre partie : pas d'analyse
+                else:
+                    batch.append(pos)
+            if len(batch) >= ANALYSIS_BATCH:
+                analysed += len(batch)
+                pending.append(pool.apply_async(analyse_positions, (batch,)))
+                batch = []
+            collect(len(pending) > max_pending)
+            if games % 1000 == 0:
+                rate = games / (time.perf_counter() - start)
+                print(f"{games} parties | {written} positions | {rate:.0f} parties/s")
+        if batch:
+            analysed += len(batch)
+            pending.append(pool.apply_async(analyse_positions, (batch,)))
+        max_pending = 0
+        collect(True)
+    elapsed = time.perf_counter() - start
+    print(f"Terminé : {games} parties, {positions} positions, {analysed} analysées, {written} combinaisons, "
+          f"{duplicates} doublons ignorés en {elapsed:.1f} s")
+    return written
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    n_workers = None  # Par défaut : un processus par cœur
+    if "--workers" in args:
+        i = args.index("--workers")
+        n_workers = int(args[i + 1])
+        del args[i:i + 2]
+    if len(args) < 2:
+        print("Usage : python tactics.py sortie.jsonl fichier.replay.json|dossier ... [--workers N]")
+    else:
+        mine(args[1:], args[0], n_workers)
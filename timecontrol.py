@@ -0,0 +1,221 @@
+"""
+Nom : Timecontrol.py
+Auteurs : Dylan, Samuel
+Date 11.11.2024
+"""
+###############################################################################
+# Gestion du temps du moteur pour les pendules Blitz.
+#
+# - Budget par coup selon le temps restant, le matériel restant
+#   et le nombre de coups légaux
+# - Coup forcé (un seul coup légal) : réponse immédiate
+# - Instabilité du score ou du meilleur coup : temps supplémentaire
+# - Limite dure jamais dépassée (marge de sécurité)
+# - Simulation : parties sous plusieurs cadences, temps dépassés et résultats
+# - Usage : python timecontrol.py [parties_par_cadence] [cadence_s ...]
+###############################################################################
+
+import sys  # Lecture des arguments de la ligne de commande
+import time  # Mesure du temps réel
+
+import backend  # Règles du jeu
+import engine  # Recherche alpha-bêta
+
+MIN_MOVES_TO_GO = 12  # Coups restants estimés au minimum
+MAX_MOVES_TO_GO = 40  # Coups restants estimés au maximum (début de partie)
+SAFETY_MARGIN = 0.05  # Secondes gardées en réserve à chaque coup (latence, affichage)
+HARD_FRACTION = 0.25  # Jamais plus d'un quart du temps restant sur un coup
+HARD_FACTOR = 3.0  # La limite dure vaut au plus 3 fois le budget normal
+INSTABILITY_FACTOR = 1.6  # Allongement du budget quand le meilleur coup change
+SCORE_DROP = 40  # Chute de score (points) considérée comme instable
+MAX_DEPTH = 30  # Profondeur maximale de l'approfondissement itératif
+
+
+def moves_to_go(black_pieces, gray_pieces):
+    """
+    Estimation du nombre de coups restant à jouer d'après le matériel sur le plateau.
+    """
+    pieces = len(black_pieces) + len(gray_pieces)
+    return max(MIN_MOVES_TO_GO, min(MAX_MOVES_TO_GO, pieces))
+
+
+def allocate(remaining, legal_moves, black_pieces, gray_pieces):
+    """
+    Calcule (budget normal, limite dure) en secondes pour le coup à jouer.
+    - remaining : temps restant sur la pendule du moteur
+    - legal_moves : nombre de coups légaux (1 : coup forcé, réponse immédiate)
+    """
+    usable = max(0.0, remaining - SAFETY_MARGIN)
+    if legal_moves <= 1:
+        return 0.0, 0.0  # Coup forcé (capture unique ou seul déplacement)
+    soft = usable / moves_to_go(black_pieces, gray_pieces)
+    # Peu de choix : décision plus simple ; beaucoup de choix : un peu plus de temps
+    if legal_moves <= 3:
+        soft *= 0.6
+    elif legal_moves >= 12:
+        soft *= 1.3
+    hard = min(usable * HARD_FRACTION, soft * HARD_FACTOR)
+    return min(soft, hard), hard
+
+
+class TimeManager:
+    """
+    Suit une recherche itérative et décide s'il faut lancer l'itération suivante.
+    """
+
+    def __init__(self, remaining, legal_moves, black_pieces, gray_pieces):
+        self.start = time.perf_counter()
+        self.soft, self.hard = allocate(remaining, legal_moves, black_pieces, gray_pieces)
+        self.last_key = None  # Meilleur coup de l'itération précédente
+        self.last_score = None  # Score de l'itération précédente
+        self.extended = False  # Le budget a déjà été allongé
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def out_of_time(self):
+        """
+        Limite dure atteinte : la recherche doit s'interrompre (utilisé par should_stop).
+        """
+        return self.elapsed() >= self.hard
+
+    def iteration_done(self, key, score):
+        """
+        Appelée après chaque itération. Retourne True s'il faut lancer la suivante.
+        """
+        unstable = self.last_key is not None and (
+            key != self.last_key or score < self.last_score - SCORE_DROP)
+        if unstable and not self.extended:
+            self.soft = min(self.hard, self.soft * INSTABILITY_FACTOR)  # Score instable : on creuse
+            self.extended = True
+        self.last_key, self.last_score = key, score
+        # L'itération suivante coûte en général plusieurs fois la précédente
+        return self.elapsed() < self.soft * 0.5
+
+
+def timed_search(searcher, black_pieces, gray_pieces, color, remaining):
+    """
+    Choisit un coup pour 'color' avec 'remaining' secondes à la pendule.
+    Retourne (coup, score, temps utilisé, profondeur atteinte).
+    """
+    moves = backend.find_all_possible_moves(color, black_pieces, gray_pieces)
+    if not moves:
+        return None, 0, 0.0, 0
+    tm = TimeManager(remaining, len(moves), black_pieces, gray_pieces)
+    if len(moves) == 1:
+        return moves[0], 0, tm.elapsed(), 0  # Coup forcé : aucune recherche
+    previous_stop = searcher.should_stop
+    searcher.should_stop = tm.out_of_time
+    best, best_score, reached = moves[0], 0, 0
+    try:
+        for depth, mv, score in searcher.iterate(black_pieces, gray_pieces, color, MAX_DEPTH):
+            if mv is None:
+                break
+            best, best_score, reached = mv, score, depth
+            if not tm.iteration_done(engine.move_key(mv), score):
+                break
+    finally:
+        searcher.should_stop = previous_stop
+    return best, best_score, tm.elapsed(), reached
+
+
+def equal_split_search(searcher, black_pieces, gray_pieces, color, remaining):
+    """
+    Allocation naïve de référence : 1/20 du temps restant, sans coup forcé ni instabilité.
+    """
+    deadline = time.perf_counter() + remaining / 20
+    previous_stop = searcher.should_stop
+    searcher.should_stop = lambda: time.perf_counter() >= deadline
+    start = time.perf_counter()
+    moves = backend.find_all_possible_moves(color, black_pieces, gray_pieces)
+    best, best_score, reached = (moves[0] if moves else None), 0, 0
+    try:
+        for depth, mv, score in searcher.iterate(black_pieces, gray_pieces, color, MAX_DEPTH):
+            if mv is None:
+                break
+            best, best_score, reached = mv, score, depth
+            if time.perf_counter() >= deadline:
+                break
+    finally:
+        searcher.should_stop = previous_stop
+    return best, best_score, time.perf_counter() - start, reached
+
+
+def play_timed_game(black_player, gray_player, time_limit, max_plies=200):
+    """
+    Joue une partie entre deux fonctions de recherche sous une cadence donnée (secondes par camp).
+    Retourne (résultat, raison, temps restants, profondeurs moyennes).
+    """
+    black, gray = backend.initial_pieces()
+    clocks = {backend.PIECE_BLACK: float(time_limit), backend.PIECE_GRAY: float(time_limit)}
+    searchers = {backend.PIECE_BLACK: engine.Searcher(), backend.PIECE_GRAY: engine.Searcher()}
+    players = {backend.PIECE_BLACK: black_player, backend.PIECE_GRAY: gray_player}
+    depths = {backend.PIECE_BLACK: [], backend.PIECE_GRAY: []}
+    history = {}
+    no_capture = 0
+    color = backend.PIECE_BLACK
+    result = ("NUL", "limite de coups")
+    for _ in range(max_plies):
+        winner = backend.check_winner(black, gray)
+        if winner:
+            result = (winner, "matériel")
+            break
+        t0 = time.perf_counter()
+        mv, _, _, depth = players[color](searchers[color], black, gray, color, clocks[color])
+        clocks[color] -= time.perf_counter() - t0
+        if clocks[color] <= 0:
+            result = ("GRIS" if color == backend.PIECE_BLACK else "NOIR", "temps")
+            break
+        if mv is None:
+            result = ("GRIS" if color == backend.PIECE_BLACK else "NOIR", "blocage")
+            break
+        depths[color].append(depth)
+        delta = backend.move_to_delta(mv, black, gray, color, no_capture)
+        backend.apply_delta_to_pieces(delta, black, gray)
+        no_capture = delta["no_capture_turns"][1]
+        color = engine.opponent(color)
+        if backend.is_irreversible(delta, black, gray):
+            history.clear()  # Capture ou pion avancé : les positions antérieures ne reviendront plus
+        h = delta["hash"]
+        history[h] = history.get(h, 0) + 1
+        if no_capture >= 50:
+            result = ("NUL", "50 coups")
+            break
+        if history[h] >= 3:
+            result = ("NUL", "répétition")
+            break
+    avg = {c: (sum(d) / len(d) if d else 0.0) for c, d in depths.items()}
+    return result[0], result[1], clocks, avg
+
+
+def simulate(time_controls=(5.0, 15.0), games=2):
+    """
+    Pour chaque cadence : parties TimeManager contre allocation naïve (couleurs alternées).
+    Affiche les temps dépassés par le TimeManager (et par l'allocation naïve),
+    score du TimeManager et profondeur moyenne.
+    """
+    for tc in time_controls:
+        timeouts, ref_timeouts, points, depth_tm, depth_ref = 0, 0, 0.0, [], []
+        for g in range(games):
+            tm_black = (g % 2 == 0)
+            players = (timed_search, equal_split_search) if tm_black else (equal_split_search, timed_search)
+            res, reason, clocks, avg = play_timed_game(players[0], players[1], tc)
+            tm_color = backend.PIECE_BLACK if tm_black else backend.PIECE_GRAY
+            tm_name = "NOIR" if tm_black else "GRIS"
+            if reason == "temps":  # Le perdant est celui dont le drapeau est tombé
+                if res == tm_name:
+                    ref_timeouts += 1
+                else:
+                    timeouts += 1
+            points += 1.0 if res == tm_name else (0.5 if res == "NUL" else 0.0)
+            depth_tm.append(avg[tm_color])
+            depth_ref.append(avg[engine.opponent(tm_color)])
+        print(f"Cadence {tc:.0f} s : parties {games} | temps dépassés {timeouts} (naïf {ref_timeouts}) | "
+              f"score TimeManager {points}/{games} | profondeur moyenne "
+              f"{sum(depth_tm) / games:.1f} (naïf {sum(depth_ref) / games:.1f})")
+
+
+if __name__ == "__main__":
+    n_games = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    controls = tuple(float(x) for x in sys.argv[2:]) or (5.0, 15.0)
+    simulate(controls, n_games)
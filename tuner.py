@@ -0,0 +1,280 @@
+"""
+Nom : Tuner.py
+Auteurs : Dylan, Samuel
+Date 11.11.2024
+"""
+###############################################################################
+# Réglage des poids de l'évaluation (méthode "Texel") à partir de parties jouées par le moteur.
+#
+# - Auto-parties (selfplay) : positions calmes étiquetées par le résultat de la partie,
+#   enregistrées en blocs NumPy (cases : int8, résultat : float32)
+# - Caractéristiques : valeur d'un pion sur chacune des 50 cases du 10x10 (point de vue des noirs,
+#   case symétrique pour les gris) et valeur de la dame ; score = produit scalaire
+# - Plateau 10x10 seulement (variante par défaut de backend) : les poids ne servent qu'à MAN_TABLE
+# - Erreur : (résultat - sigmoïde(K * score))², K ajusté une fois sur les poids de départ
+# - Descente de gradient (Adam) vectorisée par lots, un bloc en mémoire à la fois (mmap)
+# - Export vers engine.WEIGHTS_FILE, lu par engine.load_weights au démarrage
+# - Usage : python tuner.py selfplay dossier nb_parties [--workers N] [--depth D]
+#           python tuner.py tune dossier [--epochs N] [--output poids.json]
+###############################################################################
+
+import json  # Export des poids
+import multiprocessing  # Auto-parties en parallèle
+import os  # Dossiers des blocs
+import random  # Ouvertures aléatoires
+import sys  # Lecture des arguments de la ligne de commande
+import time  # Mesure du débit
+
+import numpy as np  # Matrices de caractéristiques et gradient
+
+import backend  # Règles du jeu
+import engine  # Recherche et évaluation par défaut
+
+DARK_SQUARES = [r * 10 + c for r in range(10) for c in range(10) if (r + c) % 2 == 0]  # Indice -> case r*10+c
+SQUARE_INDEX = {sq: i for i, sq in enumerate(DARK_SQUARES)}  # Case -> indice (0 à 49) ; symétrique : 49 - i
+NUM_FEATURES = len(DARK_SQUARES) + 1  # 50 cases pour les pions + la dame
+QUEEN = len(DARK_SQUARES)  # Indice du poids de la dame
+
+CHUNK_ROWS = 1 << 20  # Positions par bloc
+BATCH_ROWS = 1 << 16  # Positions par pas de gradient
+RANDOM_PLIES = 8  # Coups aléatoires en début d'auto-partie (diversité des positions)
+SELFPLAY_DEPTH = 2  # Profondeur de recherche des auto-parties
+MAX_GAME_PLIES = 200  # Au-delà : nulle
+LEARNING_RATE = 1.0  # Pas d'Adam (en points d'évaluation)
+
+
+def encode_board(black_pieces, gray_pieces):
+    """
+    Position en 50 entiers : 0 vide, 1 / 2 pion / dame noirs, -1 / -2 pion / dame gris.
+    """
+    board = [0] * len(DARK_SQUARES)
+    for r, c, isQ in black_pieces:
+        board[SQUARE_INDEX[r * 10 + c]] = 2 if isQ else 1
+    for r, c, isQ in gray_pieces:
+        board[SQUARE_INDEX[r * 10 + c]] = -2 if isQ else -1
+    return board
+
+
+def features(boards):
+    """
+    Matrice des caractéristiques (n x NUM_FEATURES, float32) d'un lot de positions encodées.
+    Pion noir sur la case i : +1 en i ; pion gris sur la case i : -1 en 49 - i (case symétrique).
+    """
+    x = np.empty((len(boards), NUM_FEATURES), dtype=np.float32)
+    np.subtract(boards[:, :QUEEN] == 1, (boards == -1)[:, ::-1], out=x[:, :QUEEN], dtype=np.float32)
+    x[:, QUEEN] = (boards == 2).sum(axis=1) - (boards == -2).sum(axis=1)
+    return x
+
+
+def initial_weights():
+    """
+    Poids de l'évaluation actuelle du moteur (MAN_TABLE, QUEEN_VALUE).
+    """
+    w = np.array([engine.MAN_TABLE[sq] for sq in DARK_SQUARES] + [engine.QUEEN_VALUE], dtype=np.float64)
+    return w
+
+
+def export_weights(w, filename=engine.WEIGHTS_FILE):
+    """
+    Écrit le fichier de poids lu par engine.load_weights.
+    """
+    data = {"queen": round(float(w[QUEEN]), 1),
+            "man": {str(sq): round(float(w[i]), 1) for i, sq in enumerate(DARK_SQUARES)}}
+    with open(filename, "w") as f:
+        json.dump(data, f, indent=1)
+
+
+class PositionWriter:
+    """
+    Ajoute des positions étiquetées dans des blocs chunk_XXXXX (boards.npy, labels.npy).
+    """
+
+    def __init__(self, directory, chunk_rows=CHUNK_ROWS):
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        os.makedirs(directory, exist_ok=True)
+        self.index = len(chunk_dirs(directory))
+        self.boards, self.labels = [], []
+
+    def add(self, boards, labels):
+        self.boards += boards
+        self.labels += labels
+        while len(self.boards) >= self.chunk_rows:
+            self.flush(self.chunk_rows)
+
+    def flush(self, n=None):
+        n = len(self.boards) if n is None else n
+        if not n:
+            return
+        path = os.path.join(self.directory, f"chunk_{self.index:05d}")
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "boards.npy"), np.array(self.boards[:n], dtype=np.int8))
+        np.save(os.path.join(path, "labels.npy"), np.array(self.labels[:n], dtype=np.float32))  # Écrit en dernier
+        del self.boards[:n], self.labels[:n]
+        self.index += 1
+
+
+def chunk_dirs(directory):
+    return sorted(os.path.join(directory, d) for d in os.listdir(directory) if d.startswith("chunk_"))
+
+
+def iter_chunks(directory):
+    """
+    Blocs (cases, résultats) en projection mémoire : un seul bloc chargé à la fois.
+    """
+    for path in chunk_dirs(directory):
+        labels_file = os.path.join(path, "labels.npy")
+        if os.path.exists(labels_file):  # Bloc complet seulement
+            yield np.load(os.path.join(path, "boards.npy"), mmap_mode="r"), np.load(labels_file, mmap_mode="r")
+
+
+def selfplay_game(args):
+    """
+    Une auto-partie (processus de travail). Retourne (positions encodées, résultats du point de vue des noirs).
+    Seules les positions calmes (aucune prise obligatoire) après l'ouverture aléatoire sont gardées.
+    """
+    seed, depth = args
+    rng = random.Random(seed)
+    searcher = engine.Searcher()
+    black, gray = backend.initial_pieces()
+    color = backend.PIECE_BLACK
+    history, no_capture, boards = {}, 0, []
+    result = 0.5  # Nulle par défaut (50 coups, répétition, limite de coups)
+    for ply in range(MAX_GAME_PLIES):
+        if backend.check_winner(black, gray):
+            result = 1.0 if gray == [] else 0.0
+            break
+        moves = backend.find_all_possible_moves(color, black, gray)
+        if not moves:
+            result = 0.0 if color == backend.PIECE_BLACK else 1.0  # Camp bloqué : perdu
+            break
+        if ply < RANDOM_PLIES:
+            mv = rng.choice(moves)
+        else:
+            if moves[0].type != 'capture':
+                boards.append(encode_board(black, gray))
+            mv, _ = searcher.search(black, gray, color, depth)
+            mv = mv or moves[0]
+        is_capture = mv.type == 'capture'
+        engine.make_move(mv, black, gray, color)
+        no_capture = 0 if (is_capture or mv.piece[2]) else no_capture + 1
+        color = engine.opponent(color)
+        h = backend.position_hash(black, gray, color == backend.PIECE_BLACK)
+        history[h] = history.get(h, 0) + 1
+        if no_capture >= 50 or history[h] >= 3:
+            break
+    return boards, [result] * len(boards)
+
+
+def selfplay(directory, games, workers=None, depth=SELFPLAY_DEPTH, seed=0):
+    """
+    Joue 'games' auto-parties sur un groupe de processus et ajoute leurs positions au dossier.
+    """
+    writer = PositionWriter(directory)
+    positions = 0
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        jobs = ((seed + i, depth) for i in range(games))
+        for n, (boards, labels) in enumerate(pool.imap_unordered(selfplay_game, jobs, chunksize=4), 1):
+            writer.add(boards, labels)
+            positions += len(boards)
+            if n % 100 == 0:
+                print(f"{n} parties | {positions} positions | {n / (time.perf_counter() - start):.1f} parties/s")
+    writer.flush()
+    print(f"Terminé : {games} parties, {positions} positions en {time.perf_counter() - start:.1f} s")
+    return positions
+
+
+def batches(directory, batch_rows=BATCH_ROWS):
+    """
+    Lots (caractéristiques, résultats) parcourant tout le dossier, bloc par bloc.
+    """
+    for boards, labels in iter_chunks(directory):
+        for i in range(0, len(labels), batch_rows):
+            yield features(np.asarray(boards[i:i + batch_rows])), np.asarray(labels[i:i + batch_rows])
+
+
+def loss(directory, w, k):
+    """
+    Erreur quadratique moyenne de la prédiction sigmoïde(k * score) sur tout le dossier.
+    """
+    total, n = 0.0, 0
+    wf = w.astype(np.float32)
+    for x, y in batches(directory):
+        p = 1.0 / (1.0 + np.exp(-k * (x @ wf)))
+        total += float(((p - y) ** 2).sum())
+        n += len(y)
+    return total / n if n else 0.0
+
+
+def fit_k(directory, w, low=1e-4, high=0.1, steps=30):
+    """
+    Échelle K de la sigmoïde qui minimise l'erreur avec les poids donnés
+    (recherche par section dorée, K ~ pente de la probabilité de gain par point).
+    """
+    phi = (5 ** 0.5 - 1) / 2
+    a, b = np.log(low), np.log(high)  # Recherche sur log(K)
+    c, d = b - phi * (b - a), a + phi * (b - a)
+    fc, fd = loss(directory, w, np.exp(c)), loss(directory, w, np.exp(d))
+    for _ in range(steps):
+        if fc < fd:
+            b, d, fd = d, c, fc
+            c = b - phi * (b - a)
+            fc = loss(directory, w, np.exp(c))
+        else:
+            a, c, fc = c, d, fd
+            d = a + phi * (b - a)
+            fd = loss(directory, w, np.exp(d))
+    return float(np.exp((a + b) / 2))
+
+
+def tune(directory, epochs=10, lr=LEARNING_RATE, k=None, w=None):
+    """
+    Règle les poids par Adam sur des lots de BATCH_ROWS positions.
+    Retourne (poids, K, erreur de chaque époque).
+    """
+    w = initial_weights() if w is None else w
+    if k is None:
+        k = fit_k(directory, w)
+    m, v = np.zeros_like(w), np.zeros_like(w)
+    beta1, beta2, eps, t = 0.9, 0.999, 1e-8, 0
+    losses = [loss(directory, w, k)]
+    print(f"K = {k:.5f} | erreur initiale {losses[0]:.6f}")
+    for epoch in range(epochs):
+        start = time.perf_counter()
+        rows = 0
+        for x, y in batches(directory):
+            p = 1.0 / (1.0 + np.exp(-k * (x @ w.astype(np.float32))))
+            # Dérivée de (p - y)² par rapport au score, ramenée aux poids par x
+            grad = x.T @ ((2.0 * k) * (p - y) * p * (1.0 - p)) / len(y)
+            t += 1
+            m = beta1 * m + (1 - beta1) * grad
+            v = beta2 * v + (1 - beta2) * grad * grad
+            w = w - lr * (m / (1 - beta1 ** t)) / (np.sqrt(v / (1 - beta2 ** t)) + eps)
+            rows += len(y)
+        losses.append(loss(directory, w, k))
+        elapsed = time.perf_counter() - start
+        print(f"Époque {epoch + 1} : erreur {losses[-1]:.6f} | {rows} positions en {elapsed:.1f} s "
+              f"({rows / elapsed / 1e6:.2f} M/s) | dame {w[QUEEN]:.1f}")
+    return w, k, losses
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {}
+    for opt in ("--workers", "--depth", "--epochs", "--output"):
+        if opt in args:
+            i = args.index(opt)
+            options[opt] = args[i + 1]
+            del args[i:i + 2]
+    if len(args) >= 3 and args[0] == "selfplay":
+        selfplay(args[1], int(args[2]), int(options["--workers"]) if "--workers" in options else None,
+                 int(options.get("--depth", SELFPLAY_DEPTH)))
+    elif len(args) >= 2 and args[0] == "tune":
+        weights, _, _ = tune(args[1], int(options.get("--epochs", 10)))
+        out = options.get("--output", engine.WEIGHTS_FILE)
+        export_weights(weights, out)
+        print(f"Poids écrits dans {out}")
+    else:
+        print("Usage : python tuner.py selfplay dossier nb_parties [--workers N] [--depth D]\n"
+              "        python tuner.py tune dossier [--epochs N] [--output poids.json]")
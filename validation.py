@@ -0,0 +1,118 @@
+"""
+Nom : Validation.py
+Auteurs : Dylan, Samuel
+Date 11.11.2024
+"""
+###############################################################################
+# Validation en temps constant des coups envoyés par des clients non fiables.
+#
+# - Un index par position : coups légaux et préfixes de captures dans des dictionnaires
+# - Coup complet : clé (départ, arrivée, cases prises), une seule recherche
+# - Capture étape par étape : clé (départ, cases prises jusqu'ici, case atteinte),
+#   le même index sert à toutes les étapes d'une capture en chaîne
+# - Cases codées r * taille + c (variante jouée), comme les clés Zobrist du backend
+###############################################################################
+
+import backend  # Génération des coups légaux
+
+
+def square(cell):
+    """
+    Case r * taille + c d'une paire [r, c] venant d'un client, ou None si elle est invalide.
+    Seuls les entiers sont acceptés : pas de conversion (3.7, "12", True sont refusés).
+    """
+    try:
+        r, c = cell
+    except (TypeError, ValueError):
+        return None
+    if type(r) is not int or type(c) is not int:
+        return None
+    size = backend.variant.size
+    return r * size + c if 0 <= r < size and 0 <= c < size else None
+
+
+def landings(move):
+    """
+    Cases atteintes après chaque prise de la séquence : la pièce (pion ou dame)
+    s'arrête juste derrière la pièce prise, comme dans backend.Variant._captures.
+    """
+    r, c = move.src if move.src is not None else (move.piece[0], move.piece[1])
+    size = backend.variant.size
+    result = []
+    for pr, pc in move.path:
+        dr = 1 if pr > r else -1
+        dc = 1 if pc > c else -1
+        r, c = pr + dr, pc + dc
+        result.append(r * size + c)
+    return result
+
+
+class MoveIndex:
+    """
+    Index des coups légaux d'une position pour 'color'.
+    Construit une seule fois (une génération de coups), puis chaque coup
+    ou étape de capture est accepté ou refusé par une recherche dans un dictionnaire.
+    """
+
+    def __init__(self, color, black_pieces, gray_pieces, moves=None):
+        self.color = color
+        if moves is None:
+            moves = backend.find_all_possible_moves(color, black_pieces, gray_pieces)
+        self.moves = moves
+        self.full = {}  # (départ, arrivée, frozenset des prises) -> coup
+        self.ends = {}  # (départ, arrivée) -> coup, ou None si plusieurs chemins possibles
+        self.prefixes = {}  # (départ, frozenset des prises, case atteinte) -> coup si séquence complète, sinon None
+        size = backend.variant.size
+        for mv in moves:
+            r0, c0 = mv.src if mv.src is not None else (mv.piece[0], mv.piece[1])
+            src = r0 * size + c0
+            dest = mv.dest[0] * size + mv.dest[1]
+            caps = frozenset(r * size + c for r, c in mv.path)
+            self.full[(src, dest, caps)] = mv
+            self.ends[(src, dest)] = None if (src, dest) in self.ends else mv
+            if mv.type == 'capture':
+                taken = frozenset()
+                for (r, c), at in zip(mv.path, landings(mv)):
+                    taken = taken | {r * size + c}
+                    key = (src, taken, at)
+                    if self.prefixes.get(key) is None:
+                        self.prefixes[key] = mv if len(taken) == mv.count else None
+
+    def __bool__(self):
+        return bool(self.moves)
+
+    def lookup(self, src, dest, path=None):
+        """
+        Coup légal (départ, arrivée, cases prises) ou None.
+        Sans chemin, le coup n'est accepté que s'il est le seul entre ces deux cases.
+        """
+        s, d = square(src), square(dest)
+        if s is None or d is None:
+            return None
+        if path is None:
+            return self.ends.get((s, d))
+        try:
+            caps = frozenset(square(cell) for cell in path)
+        except TypeError:
+            return None
+        return self.full.get((s, d, caps))
+
+    def step(self, prefix, src, dest, captured):
+        """
+        Une étape de capture : la pièce en 'src' prend 'captured' et s'arrête en 'dest'.
+        'prefix' vaut None pour la première étape, sinon la valeur retournée par l'étape précédente.
+        Retourne (nouveau préfixe, coup complet ou None), ou None si l'étape est illégale.
+        """
+        s, d, cap = square(src), square(dest), square(captured)
+        if s is None or d is None or cap is None:
+            return None
+        if prefix is None:
+            start, taken = s, frozenset()
+        else:
+            start, taken, at = prefix
+            if s != at or cap in taken:
+                return None  # La pièce doit repartir de la case atteinte, sans reprendre une pièce
+        key = (start, taken | {cap}, d)
+        if key not in self.prefixes:
+            return None
+        return key, self.prefixes[key]
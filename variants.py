@@ -0,0 +1,180 @@
+"""
+Nom : Variants.py
+Auteurs : Dylan, Samuel
+Date 11.11.2024
+"""
+###############################################################################
+# Variantes du jeu : plateaux 8x8, 10x10 et 12x12, dames volantes ou dames courtes.
+#
+# - Catalogue des variantes (backend.Variant) : taille, rangées de pions au départ, type de dame
+# - get_variant : variante par son nom (options --variant de l'interface, du serveur, du hub)
+# - perft : nombre de positions à une profondeur donnée, avec le générateur de backend
+#   (backend.set_variant), suite de référence par variante
+# - bench : temps de find_all_possible_moves par position pour chaque variante
+# - Usage : python variants.py [perft [variante] [profondeur]] | [bench]
+###############################################################################
+
+import random  # Positions de mesure
+import sys  # Lecture des arguments de la ligne de commande
+import time  # Mesure des temps
+
+import backend  # Règles du jeu (Variant, génération des coups)
+import engine  # make_move / unmake_move
+
+# Suite perft : nombres de positions aux profondeurs 1, 2, ... depuis la position de départ
+# ("depart") et depuis une position à dames mobiles (king_position, "dames").
+PERFT_SUITE = {
+    "8x8": {"depart": [7, 49, 302, 1469, 7473, 37628, 187302],
+            "dames": [16, 92, 609, 4178, 28229, 185022, 1260342]},
+    "8x8-court": {"depart": [7, 49, 302, 1469, 7473, 37628, 187302],
+                  "dames": [12, 82, 387, 1824, 8166, 36829, 172169, 817522]},
+    "10x10": {"depart": [9, 81, 658, 4265, 27117, 167140],
+              "dames": [24, 200, 2181, 17295, 178629, 1464933]},
+    "10x10-court": {"depart": [9, 81, 658, 4265, 27117, 167140],
+                    "dames": [13, 122, 1146, 10145, 92956, 805012]},
+    "12x12": {"depart": [11, 121, 1222, 10053, 79049],
+              "dames": [29, 580, 8101, 120146, 1652026]},
+    "12x12-court": {"depart": [11, 121, 1222, 10053, 79049],
+                    "dames": [17, 187, 3074, 35287, 548692]},
+}
+
+VARIANTS = {v.name: v for v in (
+    backend.Variant("8x8", 8, 3),
+    backend.Variant("8x8-court", 8, 3, flying_kings=False),
+    backend.DEFAULT_VARIANT,  # 10x10, règles suisses
+    backend.Variant("10x10-court", 10, 4, flying_kings=False),
+    backend.Variant("12x12", 12, 5),
+    backend.Variant("12x12-court", 12, 5, flying_kings=False),
+)}
+DEFAULT = backend.DEFAULT_VARIANT  # Variante jouée quand aucune n'est choisie
+
+
+def get_variant(name):
+    """
+    Variante du catalogue par son nom. Lève ValueError (avec les noms connus) si elle n'existe pas.
+    """
+    if name not in VARIANTS:
+        raise ValueError(f"variante inconnue : {name!r} (choix : {', '.join(VARIANTS)})")
+    return VARIANTS[name]
+
+
+def perft(black_pieces, gray_pieces, color, depth):
+    """
+    Nombre de positions atteintes après 'depth' coups (feuilles de l'arbre complet),
+    avec les règles de la variante jouée par backend.
+    """
+    moves = backend.find_all_possible_moves(color, black_pieces, gray_pieces)
+    if depth == 1:
+        return len(moves)
+    other = engine.opponent(color)
+    total = 0
+    for mv in moves:
+        undo = engine.make_move(mv, black_pieces, gray_pieces, color)
+        total += perft(black_pieces, gray_pieces, other, depth - 1)
+        engine.unmake_move(undo)
+    return total
+
+
+def king_position(variant):
+    """
+    Position de test reproductible : deux dames de chaque camp et une rangée de pions dispersés,
+    aucune prise possible au départ, les dames noires ayant de longues diagonales libres
+    (déplacements de dame volante ou courte, puis prises à distance et choix de la majorité).
+    La première graine qui convient est retenue.
+    """
+    size, half = variant.size, variant.size // 2
+    mobility = 2 * size - 4 if variant.flying_kings else 6  # Déplacements de dame au moins (deux dames)
+    dark = [variant.coords[sq] for sq in variant.dark]
+    previous = backend.variant
+    backend.set_variant(variant)  # Prises et mobilité testées avec les règles de la variante
+    try:
+        for seed in range(1000):
+            rng = random.Random(seed)
+            kings = rng.sample(dark, 4)
+            free = [sq for sq in dark if sq not in kings]
+            men_black = rng.sample([sq for sq in free if 0 < sq[0] < half], half)
+            men_gray = rng.sample([sq for sq in free if half <= sq[0] < size - 1], half)
+            black = [[r, c, True] for r, c in kings[:2]] + [[r, c, False] for r, c in men_black]
+            gray = [[r, c, True] for r, c in kings[2:]] + [[r, c, False] for r, c in men_gray]
+            moves = backend.find_all_possible_moves(backend.PIECE_BLACK, black, gray)
+            replies = backend.find_all_possible_moves(backend.PIECE_GRAY, black, gray)
+            if any(mv.type == 'capture' for mv in moves + replies):
+                continue
+            if sum(1 for mv in moves if mv.isQueen) >= mobility:
+                return black, gray
+    finally:
+        backend.set_variant(previous)
+    raise ValueError(f"Aucune position à dames pour {variant.name}")
+
+
+def run_perft(names=None, max_depth=None):
+    """
+    Vérifie la suite perft de chaque variante.
+    Retourne True si toutes les valeurs sont correctes.
+    """
+    ok = True
+    previous = backend.variant
+    try:
+        for name in names or PERFT_SUITE:
+            v = get_variant(name)
+            backend.set_variant(v)
+            for label, start in (("depart", v.initial_pieces), ("dames", lambda: king_position(v))):
+                expected = PERFT_SUITE[name][label][:max_depth]
+                t0 = time.perf_counter()
+                got = []
+                for depth in range(1, len(expected) + 1):
+                    black, gray = start()
+                    got.append(perft(black, gray, backend.PIECE_BLACK, depth))
+                status = "ok" if got == expected else f"ERREUR (attendu {expected})"
+                ok &= got == expected
+                print(f"{name:12s} {label:6s} : {got} {status} ({time.perf_counter() - t0:.1f} s)")
+    finally:
+        backend.set_variant(previous)
+    return ok
+
+
+def random_positions(n, seed=0, max_plies=120):
+    """
+    Positions atteintes par des parties aléatoires dans la variante jouée (mesures et comparaisons).
+    """
+    rng = random.Random(seed)
+    out = []
+    while len(out) < n:
+        black, gray = backend.initial_pieces()
+        color = backend.PIECE_BLACK
+        for _ in range(rng.randrange(max_plies)):
+            moves = backend.find_all_possible_moves(color, black, gray)
+            if not moves:
+                break
+            engine.make_move(rng.choice(moves), black, gray, color)
+            color = engine.opponent(color)
+        out.append(([p[:] for p in black], [p[:] for p in gray], color))
+    return out
+
+
+def bench(n=2000, repeat=3):
+    """
+    Temps de backend.find_all_possible_moves par position, pour chaque variante.
+    """
+    previous = backend.variant
+    try:
+        for name, v in VARIANTS.items():
+            backend.set_variant(v)
+            positions = random_positions(n)
+            t0 = time.perf_counter()
+            for _ in range(repeat):
+                for black, gray, color in positions:
+                    backend.find_all_possible_moves(color, black, gray)
+            print(f"{name:12s} : {(time.perf_counter() - t0) / (n * repeat) * 1e6:.1f} µs/position")
+    finally:
+        backend.set_variant(previous)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args and args[0] == "bench":
+        bench()
+    else:
+        names = [args[1]] if len(args) > 1 else None
+        depth = int(args[2]) if len(args) > 2 else None
+        sys.exit(0 if run_perft(names, depth) else 1)
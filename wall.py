@@ -0,0 +1,313 @@
+"""
+Nom : Wall.py
+Auteurs : Dylan, Samuel
+Date 11.11.2024
+"""
+###############################################################################
+# Mur de spectateurs : 16 à 64 parties en direct sur un seul écran (salles de tournoi).
+#
+# - Plateaux réduits en grille, chacun dans sa propre image (tuile)
+# - Seules les tuiles dont la position a changé sont redessinées et envoyées à l'écran
+# - Damier et pièces pré-dessinés une fois pour la taille des tuiles (frontend)
+# - Sources : serveur de parties (server.py, connexions spectateur)
+#   ou parties simulées localement pour les essais
+# - Usage : python wall.py [nb_parties] [--server hôte:port] [--size LxH] [--seconds N] [--variant nom]
+#   Esc pour quitter
+###############################################################################
+
+import asyncio  # Connexions spectateur au serveur
+import json  # Décodage des messages du serveur
+import math  # Disposition de la grille
+import queue  # File entre les sources (fils) et l'affichage
+import random  # Parties simulées
+import sys  # Lecture des arguments de la ligne de commande
+import threading  # Sources de parties en arrière-plan
+import time  # Cadence des parties simulées, mesures
+
+import pygame  # Affichage
+import backend  # Différences, couleurs
+import frontend  # Damier, atlas de pièces et couleurs partagés
+import variants  # Choix de la variante (--variant)
+
+WALL_FPS = 60  # Images par seconde visées
+TILE_GAP = 6  # Espace entre deux tuiles (pixels)
+LABEL_RATIO = 0.12  # Part de la hauteur d'une tuile réservée au texte (partie, coup, résultat)
+WALL_BG = (30, 30, 30)  # Fond du mur
+LABEL_COLOR = (230, 230, 230)  # Couleur du texte des tuiles
+ERROR_COLOR = (235, 90, 80)  # Texte d'une tuile dont la source est en erreur
+MAX_EVENTS_PER_FRAME = 2000  # Messages traités au plus par image (le reste attend l'image suivante)
+
+
+class BoardTile:
+    """
+    Une partie affichée : position courante, texte et image de la tuile.
+    """
+
+    def __init__(self, game_id, rect):
+        self.game_id = game_id
+        self.rect = rect  # Emplacement de la tuile à l'écran
+        self.black_pieces, self.gray_pieces = backend.initial_pieces()
+        self.turn = "black"
+        self.ply = 0
+        self.result = None
+        self.error = None  # Message d'erreur de la source (connexion refusée, perdue...)
+        self.surface = pygame.Surface(rect.size)
+        self.dirty = True  # La tuile doit être redessinée
+
+    def handle(self, msg):
+        """
+        Applique un message du serveur (même format que server.py).
+        """
+        ev = msg.get("ev")
+        if ev == "joined":
+            state = msg["state"]
+            if state.get("variant", backend.variant.name) != backend.variant.name:  # Autre plateau
+                self.error = f"variante {state['variant']} (mur en {backend.variant.name} : --variant)"
+                self.dirty = True
+                return
+            self.black_pieces, self.gray_pieces = state["black_pieces"], state["gray_pieces"]
+            self.turn, self.ply = state["turn"], state["ply"]
+        elif ev == "diff":
+            backend.apply_delta_to_pieces(backend.decode_delta(msg["d"]), self.black_pieces, self.gray_pieces)
+            self.turn, self.ply = msg["turn"], msg["ply"]
+        elif ev == "end":
+            self.result = f"{msg['result']} ({msg['reason']})"
+        elif ev == "error":
+            self.error = msg.get("msg", "erreur")
+        else:
+            return  # start, pong : rien à redessiner
+        self.dirty = True
+
+
+class SpectatorWall:
+    """
+    Grille de tuiles : disposition, cache des images par taille et rendu incrémental.
+    """
+
+    def __init__(self, screen, game_ids):
+        self.screen = screen
+        w, h = screen.get_size()
+        n = len(game_ids)
+        cols = math.ceil(math.sqrt(n * w / h))  # Grille proche du format de l'écran
+        rows = math.ceil(n / cols)
+        tile_w = (w - TILE_GAP) // cols - TILE_GAP
+        tile_h = (h - TILE_GAP) // rows - TILE_GAP
+        label_h = max(12, int(tile_h * LABEL_RATIO))
+        self.frame = 2  # Cadre autour du damier
+        self.cell = max(2, (min(tile_w, tile_h - label_h) - 2 * self.frame) // frontend.BOARD_SIZE)
+        self.board = frontend.render_board(self.cell, self.frame)  # Damier vide, partagé par toutes les tuiles
+        self.atlas = frontend.render_sprites(self.cell)  # Pièces, partagées par toutes les tuiles
+        self.font = frontend.get_font(max(10, label_h - 4))
+        self.sprite_off = self.frame + self.cell // 2 - self.atlas["halo"].get_width() // 2
+        self.board_x = (tile_w - self.board.get_width()) // 2  # Damier centré dans la tuile
+        self.tiles = {}
+        for i, gid in enumerate(game_ids):
+            r, c = divmod(i, cols)
+            rect = pygame.Rect(TILE_GAP + c * (tile_w + TILE_GAP), TILE_GAP + r * (tile_h + TILE_GAP),
+                               tile_w, tile_h)
+            self.tiles[gid] = BoardTile(gid, rect)
+        self.label_y = self.board.get_height() + 2
+
+    def handle(self, game_id, msg):
+        tile = self.tiles.get(game_id)
+        if tile is not None:
+            tile.handle(msg)
+
+    def draw_tile(self, tile):
+        """
+        Redessine l'image d'une tuile : damier en cache, pièces en un seul blits, texte.
+        """
+        surf = tile.surface
+        surf.fill(WALL_BG)
+        surf.blit(self.board, (self.board_x, 0))
+        cell, ox, oy = self.cell, self.board_x + self.sprite_off, self.sprite_off
+        batch = []
+        for pieces, color in ((tile.black_pieces, backend.PIECE_BLACK), (tile.gray_pieces, backend.PIECE_GRAY)):
+            man, queen = self.atlas[(color, False)], self.atlas[(color, True)]
+            batch += [(queen if isQ else man, (col * cell + ox, row * cell + oy)) for row, col, isQ in pieces]
+        surf.blits(batch, doreturn=False)
+        text = tile.result or f"coup {tile.ply} - {'noirs' if tile.turn == 'black' else 'gris'}"
+        if tile.error:
+            text, color = f"erreur : {tile.error}", ERROR_COLOR
+        else:
+            color = LABEL_COLOR
+        label = self.font.render(f"{tile.game_id} : {text}", True, color)
+        surf.blit(label, (self.board_x, self.label_y))
+        tile.dirty = False
+
+    def render(self):
+        """
+        Redessine les tuiles modifiées et les copie à l'écran.
+        Retourne les rectangles à mettre à jour (pygame.display.update).
+        """
+        rects = []
+        for tile in self.tiles.values():
+            if tile.dirty:
+                self.draw_tile(tile)
+                self.screen.blit(tile.surface, tile.rect)
+                rects.append(tile.rect)
+        return rects
+
+
+def simulated_feed(game_ids, out, stop, moves_per_second=2.0, seed=0):
+    """
+    Parties aléatoires jouées localement ; produit les mêmes messages que server.py
+    (joined puis diff, end) dans la file 'out' : (id de partie, message).
+    """
+    rng = random.Random(seed)
+    games = {}
+    for gid in game_ids:
+        black, gray = backend.initial_pieces()
+        games[gid] = [black, gray, backend.PIECE_BLACK, 0, 0]  # pièces, trait, coups, compteur 50 coups
+        # Copies : comme après un passage par le réseau, la tuile a ses propres listes
+        out.put((gid, {"ev": "joined", "role": "spectator",
+                       "state": {"black_pieces": [p[:] for p in black], "gray_pieces": [p[:] for p in gray],
+                                 "turn": "black", "ply": 0}}))
+    interval = 1.0 / (moves_per_second * len(game_ids))  # Un coup d'une partie au hasard à chaque pas
+    next_t = time.perf_counter()
+    while not stop.is_set() and games:
+        gid = rng.choice(list(games))
+        black, gray, color, ply, nct = games[gid]
+        moves = backend.find_all_possible_moves(color, black, gray)
+        if not moves or nct >= 50:
+            winner = ("GRIS" if color == backend.PIECE_BLACK else "NOIR") if not moves else "NUL"
+            out.put((gid, {"ev": "end", "result": winner, "reason": "blocage" if not moves else "50 coups"}))
+            del games[gid]
+            continue
+        delta = backend.move_to_delta(rng.choice(moves), black, gray, color, nct)
+        backend.apply_delta_to_pieces(delta, black, gray)
+        color = backend.PIECE_GRAY if color == backend.PIECE_BLACK else backend.PIECE_BLACK
+        games[gid] = [black, gray, color, ply + 1, delta["no_capture_turns"][1]]
+        out.put((gid, {"ev": "diff", "ply": ply + 1, "d": backend.encode_delta(delta),
+                       "turn": "black" if color == backend.PIECE_BLACK else "gray"}))
+        next_t += interval
+        delay = next_t - time.perf_counter()
+        if delay > 0:
+            stop.wait(delay)
+
+
+def server_feed(host, port, game_ids, out, stop):
+    """
+    Une connexion spectateur (watch) par partie sur le serveur ; chaque ligne reçue
+    est décodée et placée dans la file 'out'. Une connexion refusée ou perdue est
+    signalée (stderr) et affichée sur la tuile par un message "error".
+    """
+    def fail(gid, reason):
+        print(f"Partie {gid} : {reason}", file=sys.stderr)
+        out.put((gid, {"ev": "error", "msg": reason}))
+
+    async def watch(gid):
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError as e:
+            fail(gid, f"connexion impossible ({e.strerror or e})")
+            return
+        try:
+            writer.write((json.dumps({"op": "join", "game": gid, "watch": True}) + "\n").encode())
+            await writer.drain()
+            while not stop.is_set():
+                line = await reader.readline()
+                if not line:
+                    if not stop.is_set():
+                        fail(gid, "connexion fermée par le serveur")
+                    break
+                try:
+                    out.put((gid, json.loads(line)))
+                except ValueError:
+                    fail(gid, "message illisible")
+        except OSError as e:
+            fail(gid, f"connexion perdue ({e.strerror or e})")
+        finally:
+            writer.close()
+
+    async def main():
+        tasks = [asyncio.create_task(watch(gid)) for gid in game_ids]
+        while not stop.is_set():
+            await asyncio.sleep(0.1)
+        for t in tasks:
+            t.cancel()
+        for gid, res in zip(game_ids, await asyncio.gather(*tasks, return_exceptions=True)):
+            if isinstance(res, Exception):  # Erreur imprévue (annulation exclue) : signalée aussi
+                print(f"Partie {gid} : {res!r}", file=sys.stderr)
+
+    asyncio.run(main())
+
+
+def run_wall(n_games=64, size=None, server=None, seconds=None, moves_per_second=2.0):
+    """
+    Ouvre le mur (plein écran par défaut) et l'alimente jusqu'à Esc (ou 'seconds' écoulées).
+    Affiche ensuite le nombre d'images, le temps moyen et le pire temps d'une image.
+    """
+    pygame.init()
+    frontend.init_fonts()
+    if size:
+        screen = pygame.display.set_mode(size)
+    else:
+        screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+    pygame.display.set_caption(f"Dames {backend.variant.name} - Mur de spectateurs")
+    screen.fill(WALL_BG)
+    pygame.display.flip()
+    game_ids = [f"t{i + 1}" for i in range(n_games)]
+    wall = SpectatorWall(screen, game_ids)
+    events, stop = queue.Queue(), threading.Event()
+    if server:
+        host, port = server
+        feed = threading.Thread(target=server_feed, args=(host, port, game_ids, events, stop), daemon=True)
+    else:
+        feed = threading.Thread(target=simulated_feed, args=(game_ids, events, stop, moves_per_second),
+                                daemon=True)
+    feed.start()
+
+    clock = pygame.time.Clock()
+    frame_times, tiles_drawn = [], 0
+    start = time.perf_counter()
+    running = True
+    while running:
+        clock.tick(WALL_FPS)
+        t0 = time.perf_counter()
+        for ev in pygame.event.get():
+            if ev.type == pygame.QUIT or (ev.type == pygame.KEYDOWN and ev.key == pygame.K_ESCAPE):
+                running = False
+        for _ in range(MAX_EVENTS_PER_FRAME):
+            try:
+                gid, msg = events.get_nowait()
+            except queue.Empty:
+                break
+            wall.handle(gid, msg)
+        rects = wall.render()
+        if rects:
+            pygame.display.update(rects)  # Seules les tuiles modifiées sont envoyées à l'écran
+        tiles_drawn += len(rects)
+        frame_times.append(time.perf_counter() - t0)
+        if seconds is not None and time.perf_counter() - start >= seconds:
+            running = False
+    stop.set()
+    feed.join(timeout=1.0)
+    pygame.quit()
+    elapsed = time.perf_counter() - start
+    ms = sorted(t * 1000 for t in frame_times)
+    print(f"{n_games} parties | {len(ms)} images en {elapsed:.1f} s ({len(ms) / elapsed:.0f} FPS) | "
+          f"travail par image : moyenne {sum(ms) / len(ms):.2f} ms, max {ms[-1]:.2f} ms | "
+          f"tuiles redessinées : {tiles_drawn}")
+    return ms
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {}
+    for opt in ("--server", "--size", "--seconds", "--variant"):
+        if opt in args:
+            i = args.index(opt)
+            options[opt] = args[i + 1]
+            del args[i:i + 2]
+    n = int(args[0]) if args else 64
+    if "--variant" in options:
+        backend.set_variant(variants.get_variant(options["--variant"]))  # Avant le calcul des tuiles
+        frontend.BOARD_SIZE = backend.variant.size
+    srv = None
+    if "--server" in options:
+        h, p = options["--server"].rsplit(":", 1)
+        srv = (h, int(p))
+    win = tuple(int(x) for x in options["--size"].lower().split("x")) if "--size" in options else None
+    secs = float(options["--seconds"]) if "--seconds" in options else None
+    run_wall(n, win, srv, secs)